@@ -3,6 +3,7 @@ import { spawn } from "child_process";
 import path from "path";
 import fs from "fs";
 import { fileURLToPath } from "url";
+import readline from "readline";
 import axios from "axios";
 
 
@@ -12,6 +13,101 @@ const __dirname = path.dirname(__filename);
 
 const PYTHON_BIN = process.env.PYTHON_BIN || "python";
 const PY_TIMEOUT_MS = parseInt(process.env.PY_TIMEOUT_MS || "120000", 10);
+// "1" (default): keep one warm `Job_Matching.py --serve` process; "0": spawn per request
+const PY_JOB_SERVER = (process.env.PY_JOB_SERVER ?? "1") !== "0";
+const JOB_MATCHING_SCRIPT = path.join(__dirname, "..", "job_matching_algorithm", "Job_Matching.py");
+
+// Progress events streamed by Job_Matching (--stream / "stream": true), one JSON
+// object per line. Collected so a timed-out run can still return what it found.
+function createPartialResult() {
+  return { searchParams: null, hits: [], lastEvent: null, summary: null };
+}
+
+function applyJobEvent(partial, ev) {
+  partial.lastEvent = ev.event;
+  if (ev.event === "search_body") partial.searchParams = ev.search_params;
+  else if (ev.event === "hits") partial.hits.push(...(ev.hits || []));
+  else if (ev.event === "summary") partial.summary = ev.result || {};
+}
+
+function sendPartial(res, partial, error) {
+  // hits only arrive once ranking is done, so any hits here are the final list
+  const status = partial.hits.length ? 200 : 504;
+  return res.status(status).json({
+    error,
+    partial: true,
+    lastStage: partial.lastEvent,
+    keywords: partial.searchParams,
+    jobs: partial.hits,
+  });
+}
+
+function sendMatchResult(res, data) {
+  if (data.error) {
+    return res.status(500).json({ error: data.error, _debug: data._debug_extract || data._debug_input });
+  }
+  return res.status(200).json({
+    keywords: data.search_params,
+    jobs: data.jobs.hits});
+}
+
+// Long-lived Job_Matching server (JSON-lines over stdin/stdout).
+// Models are loaded once; requests are matched to replies by id.
+let jobServer = null;
+let jobServerSeq = 0;
+
+function getJobServer() {
+  if (jobServer) return jobServer;
+
+  const proc = spawn(PYTHON_BIN, [JOB_MATCHING_SCRIPT, "--serve", "--timeout", String(PY_TIMEOUT_MS / 1000)], {
+    cwd: path.dirname(JOB_MATCHING_SCRIPT),
+    env: { ...process.env },
+  });
+  const server = { proc, pending: new Map() };
+
+  readline.createInterface({ input: proc.stdout }).on("line", (line) => {
+    let msg;
+    try { msg = JSON.parse(line); } catch { return; }
+    const waiter = msg.id != null ? server.pending.get(String(msg.id)) : null;
+    if (!waiter) return; // "ready" event or an unknown id
+    if (msg.event) {
+      waiter.onEvent?.(msg); // progress line; the reply comes later
+      return;
+    }
+    server.pending.delete(String(msg.id));
+    clearTimeout(waiter.timer);
+    waiter.resolve(msg);
+  });
+  proc.stderr.on("data", (chunk) => console.error("[job-matching]", chunk.toString("utf8").trimEnd()));
+
+  const fail = (err) => {
+    if (jobServer === server) jobServer = null;
+    for (const waiter of server.pending.values()) {
+      clearTimeout(waiter.timer);
+      waiter.reject(err);
+    }
+    server.pending.clear();
+  };
+  proc.on("error", (err) => fail(new Error(`Failed to start Python: ${err.message}`)));
+  proc.on("close", (code) => fail(new Error(`Job matching server exited with code ${code}`)));
+
+  jobServer = server;
+  return server;
+}
+
+function matchCvViaServer(cvPath, onEvent) {
+  const server = getJobServer();
+  const id = String(++jobServerSeq);
+  return new Promise((resolve, reject) => {
+    // Python enforces the same deadline; this only guards against a wedged server
+    const timer = setTimeout(() => {
+      server.pending.delete(id);
+      reject(Object.assign(new Error("Python process timed out"), { timedOut: true }));
+    }, PY_TIMEOUT_MS + 5000);
+    server.pending.set(id, { resolve, reject, timer, onEvent });
+    server.proc.stdin.write(JSON.stringify({ id, cv: cvPath, timeout: PY_TIMEOUT_MS / 1000, stream: true }) + "\n");
+  });
+}
 
 // Get all the available CVs
 export const getJobSearchCVs = async(req, res) => {
@@ -66,21 +162,37 @@ export const extractSelectedCVJobs = async (req, res) => {
     }
 
     // Resolve the Python script path
-    const scriptPath = path.join(__dirname, "..", "job_matching_algorithm", "Job_Matching.py");
+    const scriptPath = JOB_MATCHING_SCRIPT;
     if (!fs.existsSync(scriptPath)) {
       return res.status(500).json({ error: `Python script not found at ${scriptPath}` });
     }
 
-    // Spawn Python
+    const partial = createPartialResult();
+
+    if (PY_JOB_SERVER) {
+      let reply;
+      try {
+        reply = await matchCvViaServer(cvPath, (ev) => applyJobEvent(partial, ev));
+      } catch (err) {
+        if (err.timedOut) return sendPartial(res, partial, err.message);
+        return res.status(500).json({ error: err.message });
+      }
+      if (!reply.ok) {
+        if (String(reply.error || "").startsWith("timeout")) return sendPartial(res, partial, reply.error);
+        return res.status(500).json({ error: reply.error });
+      }
+      return sendMatchResult(res, reply.result || {});
+    }
+
+    // Spawn Python with NDJSON progress output; the last line is a "summary" event
     // Use cwd so any relative imports/paths inside the python script behave
-    const py = spawn(PYTHON_BIN, [scriptPath, cvPath], {
+    const py = spawn(PYTHON_BIN, [scriptPath, "--stream", cvPath], {
       cwd: path.dirname(scriptPath),
       env: {
         ...process.env,
       },
     });
 
-    let stdout = "";
     let stderr = "";
     let timedOut = false;
 
@@ -90,7 +202,11 @@ export const extractSelectedCVJobs = async (req, res) => {
       try { py.kill("SIGKILL"); } catch {}
     }, PY_TIMEOUT_MS);
 
-    py.stdout.on("data", (chunk) => (stdout += chunk.toString("utf8")));
+    readline.createInterface({ input: py.stdout }).on("line", (line) => {
+      let ev;
+      try { ev = JSON.parse(line); } catch { return; } // stray library output
+      if (ev && ev.event) applyJobEvent(partial, ev);
+    });
     py.stderr.on("data", (chunk) => (stderr += chunk.toString("utf8")));
 
     py.on("error", (err) => {
@@ -102,37 +218,18 @@ export const extractSelectedCVJobs = async (req, res) => {
       clearTimeout(timer);
 
       if (timedOut) {
-        return res.status(504).json({ error: "Python process timed out" });
+        return sendPartial(res, partial, "Python process timed out");
       }
 
-      if (code !== 0) {
-        return res.status(500).json({
-          error: `Python exited with code ${code}`,
-          stderr,
-        });
-      }
-      
-      try {
-        const data = JSON.parse(stdout);
-        return res.status(200).json({
-            keywords: data.search_params,
-            jobs: data.jobs.hits});
-      } catch {
-        try {
-          const start = stdout.lastIndexOf("{");
-          const end = stdout.lastIndexOf("}");
-          if (start !== -1 && end !== -1 && end > start) {
-            const maybe = stdout.slice(start, end + 1);
-            const data = JSON.parse(maybe);
-            return res.status(200).json(data);
-          }
-        } catch {}
-        return res.status(500).json({
-          error: "Invalid Python JSON response",
-          stderr,
-          stdoutPreview: stdout.slice(0, 5000),
-        });
+      if (partial.summary) {
+        return sendMatchResult(res, partial.summary);
       }
+
+      return res.status(500).json({
+        error: code !== 0 ? `Python exited with code ${code}` : "No summary from Python",
+        lastStage: partial.lastEvent,
+        stderr,
+      });
     });
   } catch (err) {
     console.error("extractSelectedCVJobs error:", err);
@@ -1,68 +1,85 @@
+import time
+_T_MODULE_START = time.perf_counter()
+
 import os
 import re
 import io
 import json
+import hashlib
 import datetime
-from typing import List, Dict, Optional, Tuple
+import argparse
+import importlib.util
+import threading
+from collections import OrderedDict, deque
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Tuple
 import sys
 
-import pdfplumber
-import requests
-import pycountry
-from geotext import GeoText
-from rapidfuzz import fuzz, process
+from rapidfuzz import fuzz
+from dotenv import load_dotenv
 
-import spacy
-from keybert import KeyBERT
+import perf
+from fuzzy_match import ChoiceMatcher
+load_dotenv()
 
+_MODULE_IMPORT_MS = round((time.perf_counter() - _T_MODULE_START) * 1000, 1)
 
-# NEW: OCR deps you asked to use
+# Heavy dependencies (spacy, keybert/torch, pymupdf, pdfplumber, pdf2image, pytesseract,
+# python-docx, pycountry, requests) are imported lazily at their point of
+# use via _lazy_import, so e.g. invalid input or a DOCX never pays for torch.
+_IMPORT_TIMES: Dict[str, float] = {}  # module -> ms of its first (cold) import
 
-from pdf2image import convert_from_path
-import pytesseract
-from PIL import Image
-from dotenv import load_dotenv
-load_dotenv()
+def _lazy_import(name: str):
+    # always through import_module: it takes the import lock, so a thread never gets
+    # a module another thread is still initializing (sys.modules has it from the start)
+    cold = name not in sys.modules
+    t0 = time.perf_counter()
+    mod = importlib.import_module(name)
+    if cold:
+        _IMPORT_TIMES.setdefault(name, round((time.perf_counter() - t0) * 1000, 1))
+    return mod
 
 # Tesseract/Poppler from .env
-pytesseract.pytesseract.tesseract_cmd = os.getenv("PYTESSERACT_PATH", "")
+PYTESSERACT_PATH = os.getenv("PYTESSERACT_PATH", "")
 POPPLER_PATH = os.getenv("POPPLER_PATH", "")
 
-# --- optional imports (kept as in your file)
-_EASYOCR_AVAILABLE = True
-_EASYOCR_IMPORT_ERR = None
-try:
-    import easyocr
-except Exception as e:
-    _EASYOCR_AVAILABLE = False
-    _EASYOCR_IMPORT_ERR = str(e)
-
-_PYMUPDF_AVAILABLE = True
-_PYMUPDF_IMPORT_ERR = None
-try:
-    import fitz  # PyMuPDF
-except Exception as e:
-    _PYMUPDF_AVAILABLE = False
-    _PYMUPDF_IMPORT_ERR = str(e)
-
-_DOCX_AVAILABLE = True
-_DOCX_IMPORT_ERR = None
-try:
-    import docx  # python-docx
-except Exception as e:
-    _DOCX_AVAILABLE = False
-    _DOCX_IMPORT_ERR = str(e)
-
-_WIN32_AVAILABLE = True
-try:
-    import win32com.client  # only works on Windows with MS Word installed
-except Exception:
-    _WIN32_AVAILABLE = False
-
+def _pytesseract():
+    mod = _lazy_import("pytesseract")
+    if PYTESSERACT_PATH:
+        mod.pytesseract.tesseract_cmd = PYTESSERACT_PATH
+    return mod
+
+# OCR: pages rasterized + OCR'd concurrently, at most OCR_MAX_INFLIGHT at a time
+OCR_MAX_INFLIGHT = int(os.getenv("OCR_MAX_INFLIGHT", "0") or 0) or (os.cpu_count() or 2)
+OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+
+# Per-page text/OCR decision: a page goes to OCR if its text layer is thinner than
+# PAGE_MIN_TEXT_CHARS, or if it is mostly image with only a little text on top.
+PAGE_MIN_TEXT_CHARS = 40
+PAGE_IMAGE_COVERAGE_OCR = 0.6
+
+# Cold-start budget (ms spent importing) per code path, checked by --startup-profile
+STARTUP_BUDGETS_MS = {
+    "invalid_input": 250,
+    "cached": 1000,        # CV features, CV embedding and job embeddings all cached
+    "cached+rank": 8000,   # cached CV, but new postings had to be embedded (torch + MiniLM)
+    "docx": 8000,
+    "doc": 8000,
+    "pdf": 8000,
+    "pdf+ocr": 8500,
+}
 
 APIJOBS_URL = os.getenv("JOB_API_URL", "")
 APIJOBS_KEY = os.getenv("API_JOB_DEV", "")
 
+# Job API response cache (see response_cache.py): fresh for TTL, then served stale
+# (and refreshed in the background) for another STALE window.
+API_CACHE_ENABLED = os.getenv("JOB_API_CACHE_ENABLED", "1") != "0"
+API_CACHE_TTL_S = float(os.getenv("JOB_API_CACHE_TTL_S", "900"))
+API_CACHE_STALE_S = float(os.getenv("JOB_API_CACHE_STALE_S", "3600"))
+API_CACHE_MAX_MB = int(os.getenv("JOB_API_CACHE_MAX_MB", "64"))
+
 CV_Name = "PM.pdf"
 # Default fallback if no CLI arg is provided
 CV_PATH = f"../assets/CVs/{CV_Name}"
@@ -76,9 +93,36 @@ FUZZY_TITLE_CUTOFF = 80
 EXPERIENCE_YEARS_CUSHION = 1.0
 TITLE_FILTER_CUTOFF = 78
 
+# Job fetching: pages x top role queries, fetched concurrently; stops early once
+# FETCH_TARGET_RESULTS hits survive the client-side filters.
+FETCH_PAGE_SIZE = 50
+FETCH_MAX_PAGES = int(os.getenv("JOB_FETCH_MAX_PAGES", "2"))
+FETCH_MAX_QUERIES = int(os.getenv("JOB_FETCH_MAX_QUERIES", "3"))
+FETCH_CONCURRENCY = int(os.getenv("JOB_FETCH_CONCURRENCY", "4"))
+FETCH_TARGET_RESULTS = int(os.getenv("JOB_FETCH_TARGET_RESULTS", "30"))
+
+# Local job index (see job_index.py): every fetched hit is upserted; with --local-index
+# searches are answered from it unless it has fewer than JOB_INDEX_MIN_RESULTS postings
+# fetched within JOB_INDEX_FRESH_S. Postings not re-fetched for MAX_AGE are deleted.
+JOB_INDEX_ENABLED = os.getenv("JOB_INDEX_ENABLED", "1") != "0"
+JOB_INDEX_PATH = os.getenv("JOB_INDEX_PATH", "")  # default: <cache dir>/jobs.sqlite3
+JOB_INDEX_FRESH_S = float(os.getenv("JOB_INDEX_FRESH_S", str(24 * 3600)))
+JOB_INDEX_MAX_AGE_S = float(os.getenv("JOB_INDEX_MAX_AGE_S", str(14 * 24 * 3600)))
+JOB_INDEX_MIN_RESULTS = int(os.getenv("JOB_INDEX_MIN_RESULTS", str(FETCH_TARGET_RESULTS)))
+LOCAL_INDEX_DEFAULT = os.getenv("JOB_MATCHING_LOCAL_INDEX", "0") == "1"
+
+# Offline gazetteer (see gazetteer.py): compiled from data/gazetteer.tsv.gz on first use
+GAZETTEER_INDEX_PATH = os.getenv("GAZETTEER_INDEX_PATH", "")  # default: <cache dir>/gazetteer.idx
+
 # If no country can be inferred, omit "country" (global search)
 DEFAULT_COUNTRY = ""
 
+# CV feature cache (content-addressed, see cv_features_cache_key)
+# Bump CV_FEATURES_VERSION whenever extraction or heuristics change output.
+CV_FEATURES_VERSION = "6"
+CV_CACHE_ENABLED = os.getenv("CV_CACHE_ENABLED", "1") != "0"
+CV_CACHE_MAX_MB = int(os.getenv("CV_CACHE_MAX_MB", "256"))
+
 # Country aliases (US/UK/etc.)
 COUNTRY_ALIASES = {
     "us": "United States", "usa": "United States", "u.s.": "United States", "u.s.a": "United States",
@@ -91,31 +135,6 @@ COUNTRY_ALIASES = {
     "north korea": "Korea, Democratic People's Republic of",
 }
 
-# City -> Country seeds (extend over time)
-CITY_TO_COUNTRY = {
-    # Sri Lanka
-    "colombo": "Sri Lanka", "galle": "Sri Lanka", "kandy": "Sri Lanka", "jaffna": "Sri Lanka",
-    "negombo": "Sri Lanka", "matara": "Sri Lanka", "kurunegala": "Sri Lanka", "gampaha": "Sri Lanka",
-    # UK
-    "london": "United Kingdom", "manchester": "United Kingdom", "birmingham": "United Kingdom",
-    # USA
-    "new york": "United States", "los angeles": "United States", "san francisco": "United States", "seattle": "United States",
-    # UAE
-    "dubai": "United Arab Emirates", "abu dhabi": "United Arab Emirates",
-    # Canada
-    "toronto": "Canada", "vancouver": "Canada",
-    # Australia
-    "sydney": "Australia", "melbourne": "Australia",
-    # Singapore
-    "singapore": "Singapore",
-    # Germany
-    "berlin": "Germany", "munich": "Germany",
-    # France
-    "paris": "France",
-    # India
-    "mumbai": "India", "bangalore": "India", "bengaluru": "India", "delhi": "India",
-}
-
 # Role synonyms / canonical labels
 ROLE_SYNONYMS: Dict[str, List[str]] = {
     "Software Engineer": [
@@ -250,42 +269,274 @@ def resolve_cv_path_from_arg(arg: Optional[str]) -> Tuple[Optional[str], dict]:
 # =========================
 # Helpers (PDF text first; OCR fallback using pdf2image + pytesseract)
 # =========================
-def pdf_to_text(pdf_file: str) -> str:
-    all_text = ""
-    with pdfplumber.open(pdf_file) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ""
-            all_text += text + "\n"
-    return clean_whitespace(all_text)
+def _pymupdf():
+    try:
+        return _lazy_import("pymupdf")
+    except ImportError:  # PyMuPDF < 1.24 only ships the `fitz` name
+        return _lazy_import("fitz")
+
+def _needs_ocr(layer_chars: int, coverage: float) -> bool:
+    return layer_chars < PAGE_MIN_TEXT_CHARS or (
+        coverage >= PAGE_IMAGE_COVERAGE_OCR and layer_chars < PAGE_MIN_TEXT_CHARS * 4
+    )
+
+def _page_image_coverage(page) -> float:
+    area = float(page.width * page.height) or 1.0
+    covered = 0.0
+    for im in page.images:
+        covered += abs((im["x1"] - im["x0"]) * (im["bottom"] - im["top"]))
+    return min(1.0, covered / area)
+
+def pdf_pages_pymupdf(path: str, page_numbers: Optional[List[int]] = None) -> List[Dict]:
+    pymupdf = _pymupdf()
+    pages = []
+    with pymupdf.open(path) as doc:
+        for i in page_numbers or range(1, doc.page_count + 1):
+            t0 = time.perf_counter()
+            page = doc[i - 1]
+            text = page.get_text("text", sort=True)
+            area = abs(page.rect) or 1.0
+            covered = sum(abs(pymupdf.Rect(im["bbox"]) & page.rect) for im in page.get_image_info())
+            pages.append({
+                "page": i,
+                "text": text,
+                "layer_chars": sum(1 for c in text if not c.isspace()),
+                "image_coverage": min(1.0, covered / area),
+                "ms": (time.perf_counter() - t0) * 1000,
+            })
+    return pages
+
+def pdf_pages_pdfplumber(path: str, page_numbers: Optional[List[int]] = None) -> List[Dict]:
+    pdfplumber = _lazy_import("pdfplumber")
+    pages = []
+    with pdfplumber.open(path) as pdf:
+        for i in page_numbers or range(1, len(pdf.pages) + 1):
+            t0 = time.perf_counter()
+            page = pdf.pages[i - 1]
+            layer_chars = len(page.chars)
+            coverage = _page_image_coverage(page)
+            # layout extraction is the slow part: skip it for pages that go to OCR anyway
+            text = "" if _needs_ocr(layer_chars, coverage) else (page.extract_text() or "")
+            pages.append({
+                "page": i,
+                "text": text,
+                "layer_chars": layer_chars,
+                "image_coverage": coverage,
+                "ms": (time.perf_counter() - t0) * 1000,
+            })
+    return pages
+
+# Text-layer engines, fastest first: name -> (module names, pages(path, page_numbers)).
+# Engines none of whose modules is installed are skipped; PDF_TEXT_ENGINES reorders or limits them.
+PDF_ENGINES: Dict[str, Tuple[Tuple[str, ...], Callable[..., List[Dict]]]] = {
+    "pymupdf": (("pymupdf", "fitz"), pdf_pages_pymupdf),
+    "pdfplumber": (("pdfplumber",), pdf_pages_pdfplumber),
+}
+PDF_ENGINE_ORDER = [e.strip() for e in os.getenv("PDF_TEXT_ENGINES", "pymupdf,pdfplumber").split(",") if e.strip()]
+
+# A text-layer page is garbage (-> next engine, then OCR) below this share of readable chars,
+# e.g. fonts without a ToUnicode map that come out as "(cid:12)" or private-use glyphs.
+PAGE_MIN_TEXT_QUALITY = 0.85
+_CID_RE = re.compile(r"\(cid:\d+\)")
+
+@lru_cache(maxsize=1)
+def pdf_engines() -> List[Tuple[str, Callable[..., List[Dict]]]]:
+    """[(name, pages_fn)] for the configured engines that are importable here, in order."""
+    out = []
+    for name in PDF_ENGINE_ORDER:
+        if name not in PDF_ENGINES:
+            continue
+        modules, fn = PDF_ENGINES[name]
+        if any(importlib.util.find_spec(m) is not None for m in modules):
+            out.append((name, fn))
+    return out
+
+def text_quality(text: str) -> float:
+    """Share of non-space chars that are readable (letters, digits, punctuation), 0..1."""
+    text = _CID_RE.sub("\ufffd", text)
+    total = bad = 0
+    for c in text:
+        if c.isspace():
+            continue
+        total += 1
+        if c == "\ufffd" or not c.isprintable() or "\ue000" <= c <= "\uf8ff":
+            bad += 1
+    return 1.0 - bad / total if total else 0.0
+
+def classify_pdf_pages(path: str) -> List[Dict]:
+    """
+    Text layer per page from the first available engine (PyMuPDF); pages whose text there
+    is garbage are retried with the next engine (pdfplumber), and pages with no usable
+    text from any engine, or scanned-looking ones, are marked for OCR.
+    Returns [{page, needs_ocr, text, engine, layer_chars, image_coverage, ms}] in page order.
+    """
+    engines = pdf_engines()
+    if not engines:
+        raise RuntimeError("no PDF text engine available (install pymupdf or pdfplumber)")
+    pages: Dict[int, Dict] = {}
+    retry: Optional[List[int]] = None  # None: every page
+    for name, fn in engines:
+        for p in fn(path, retry):
+            p["engine"] = name
+            p["quality"] = text_quality(p["text"]) if p["text"] else 0.0
+            prev = pages.get(p["page"])
+            if prev is not None:
+                tried, ms = prev["tried"] + [name], prev["ms"] + p["ms"]
+                if p["quality"] < prev["quality"]:
+                    p = prev  # the fallback did no better: keep the first engine's text
+                p.update(tried=tried, ms=ms)
+            else:
+                p["tried"] = [name]
+            pages[p["page"]] = p
+        retry = [n for n, p in sorted(pages.items())
+                 if not _needs_ocr(p["layer_chars"], p["image_coverage"]) and p["quality"] < PAGE_MIN_TEXT_QUALITY]
+        if not retry:
+            break
+
+    out = []
+    for n in sorted(pages):
+        p = pages[n]
+        needs_ocr = _needs_ocr(p["layer_chars"], p["image_coverage"]) or p["quality"] < PAGE_MIN_TEXT_QUALITY
+        entry = {
+            "page": n,
+            "needs_ocr": needs_ocr,
+            "text": "" if needs_ocr else p["text"],
+            "engine": p["engine"],
+            "layer_chars": p["layer_chars"],
+            "image_coverage": round(p["image_coverage"], 2),
+            "quality": round(p["quality"], 2),
+            "ms": int(p["ms"]),
+        }
+        if len(p["tried"]) > 1:
+            entry["tried"] = p["tried"]
+        out.append(entry)
+    return out
+
+def pdf_to_text_hybrid(path: str) -> Tuple[str, Dict]:
+    """
+    Per-page hybrid: text-layer pages come from the PDF engines (see classify_pdf_pages),
+    scanned or garbage pages go through OCR (in parallel), and everything is merged back
+    in page order. Each page's debug entry names the engine that produced its text.
+    """
+    rec = perf.current()
+    with rec.stage("pdf.text_layer"):
+        pages = classify_pdf_pages(path)
+    ocr_pages = [p["page"] for p in pages if p["needs_ocr"]]
+    with rec.stage("pdf.ocr"):
+        ocr_texts, ocr_stats = ocr_pdf_pages(path, ocr_pages)
+    rec.count("pdf.pages", len(pages))
+    rec.count("pdf.ocr_pages", len(ocr_pages))
+    rec.count("pdf.fallback_pages", sum(1 for p in pages if "tried" in p))
+    ocr_by_page = {st["page"]: st for st in ocr_stats}
+
+    chunks, page_dbg = [], []
+    for p in pages:
+        entry = {"page": p["page"], "layer_chars": p["layer_chars"], "image_coverage": p["image_coverage"],
+                 "quality": p["quality"]}
+        if "tried" in p:
+            entry["tried"] = p["tried"]
+        if p["needs_ocr"]:
+            text = ocr_texts.get(p["page"], "")
+            st = ocr_by_page.get(p["page"], {})
+            entry.update({"engine": "ocr", "ms": p["ms"] + st.get("raster_ms", 0) + st.get("ocr_ms", st.get("ms", 0))})
+            if "error" in st:
+                entry["error"] = st["error"]
+        else:
+            text = p["text"]
+            entry.update({"engine": p["engine"], "ms": p["ms"]})
+        entry["chars"] = len(text)
+        chunks.append(text)
+        page_dbg.append(entry)
+
+    engines = list(dict.fromkeys(e["engine"] for e in page_dbg))
+    debug = {
+        "engine": "+".join(e if e != "ocr" else "pytesseract" for e in engines),
+        "ocr_pages": ocr_pages,
+        "ocr_workers": max(1, min(OCR_MAX_INFLIGHT, len(ocr_pages))) if ocr_pages else 0,
+        "pages": page_dbg,
+    }
+    return clean_whitespace("\n".join(chunks)), debug
 
 def clean_whitespace(t: str) -> str:
     t = re.sub(r"[ \t]+", " ", t)
     t = re.sub(r"\n{2,}", "\n", t)
     return t.strip()
 
+def pdf_page_count(path: str) -> int:
+    pdf2image = _lazy_import("pdf2image")
+    info = pdf2image.pdfinfo_from_path(path, poppler_path=POPPLER_PATH)
+    return int(info.get("Pages", 0))
+
+def _ocr_pdf_page(path: str, page_no: int) -> Tuple[int, str, Dict]:
+    """Rasterize a single page and OCR it. The image only lives for this call."""
+    stats = {"page": page_no}
+    t0 = time.perf_counter()
+    try:
+        pdf2image, pytesseract = _lazy_import("pdf2image"), _pytesseract()
+        images = pdf2image.convert_from_path(path, dpi=OCR_DPI, first_page=page_no, last_page=page_no,
+                                             poppler_path=POPPLER_PATH)
+        t1 = time.perf_counter()
+        text = pytesseract.image_to_string(images[0], lang="eng") if images else ""
+        for im in images:
+            im.close()
+    except Exception as e:
+        stats.update({"chars": 0, "error": str(e), "ms": int((time.perf_counter() - t0) * 1000)})
+        return page_no, "", stats
+    t2 = time.perf_counter()
+    stats.update({
+        "chars": len(text),
+        "raster_ms": int((t1 - t0) * 1000),
+        "ocr_ms": int((t2 - t1) * 1000),
+    })
+    return page_no, text, stats
+
+def ocr_pdf_pages(path: str, page_numbers: List[int], max_inflight: int = OCR_MAX_INFLIGHT) -> Tuple[Dict[int, str], List[Dict]]:
+    """
+    OCR the given 1-based pages. Each worker rasterizes one page, OCRs it and drops the
+    image, so at most `max_inflight` page images exist at once. pdftoppm and tesseract
+    are separate processes, so threads are enough to keep every core busy.
+    Returns ({page_no: text}, per-page stats in page order).
+    """
+    texts: Dict[int, str] = {}
+    stats: List[Dict] = []
+    if not page_numbers:
+        return texts, stats
+    workers = max(1, min(max_inflight, len(page_numbers)))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for page_no, text, st in ex.map(perf.in_context(lambda n: _ocr_pdf_page(path, n)), page_numbers):
+            texts[page_no] = text
+            stats.append(st)
+    return texts, stats
+
 def ocr_pdf_with_pytesseract(path: str) -> Tuple[str, Dict]:
     """
     Convert each PDF page to an image via Poppler (pdf2image), then OCR with Tesseract.
+    Pages are processed in parallel (see ocr_pdf_pages).
     Returns (text, debug_dict)
     """
-    debug = {"engine": "pytesseract+pdf2image", "pages": []}
+    t0 = time.perf_counter()
     try:
-        pages = convert_from_path(path, poppler_path=POPPLER_PATH)
+        n_pages = pdf_page_count(path)
     except Exception as e:
         return "", {"error": f"pdf2image failed: {e}"}
 
-    text_chunks = []
-    for i, page in enumerate(pages, start=1):
-        text = pytesseract.image_to_string(page, lang="eng")
-        text_chunks.append(text)
-        debug["pages"].append({"page": i, "chars": len(text)})
+    texts, page_stats = ocr_pdf_pages(path, list(range(1, n_pages + 1)))
+    debug = {
+        "engine": "pytesseract+pdf2image",
+        "workers": max(1, min(OCR_MAX_INFLIGHT, n_pages)),
+        "pages": page_stats,
+        "ms": int((time.perf_counter() - t0) * 1000),
+    }
+    text_chunks = [texts.get(i, "") for i in range(1, n_pages + 1)]
     return clean_whitespace("\n".join(text_chunks)), debug
 
 # --- DOCX
 def docx_to_text(path: str) -> Tuple[str, Dict]:
     dbg = {"engine": "python-docx", "paras": 0}
-    if not _DOCX_AVAILABLE:
-        return "", {"engine": "python-docx", "error": _DOCX_IMPORT_ERR}
+    try:
+        docx = _lazy_import("docx")  # python-docx
+    except Exception as e:
+        return "", {"engine": "python-docx", "error": str(e)}
     try:
         d = docx.Document(path)
         parts = []
@@ -300,14 +551,16 @@ def docx_to_text(path: str) -> Tuple[str, Dict]:
 # --- DOC (Windows COM fallback)
 def doc_to_text_via_word(path: str) -> Tuple[str, Dict]:
     dbg = {"engine": "win32com+Word", "converted": False}
-    if not _WIN32_AVAILABLE:
+    try:
+        win32com_client = _lazy_import("win32com.client")  # only works on Windows with MS Word installed
+    except Exception:
         return "", {"engine": "win32com+Word", "error": "win32com not available or not Windows/MS Word not installed"}
     try:
         import tempfile
         base = os.path.splitext(os.path.basename(path))[0]
         tmp_docx = os.path.join(tempfile.gettempdir(), f"{base}__conv.docx")
 
-        word = win32com.client.Dispatch("Word.Application")
+        word = win32com_client.Dispatch("Word.Application")
         word.Visible = False
         doc = word.Documents.Open(path)
         doc.SaveAs(tmp_docx, FileFormat=16)  # 16 = wdFormatXMLDocument (.docx)
@@ -326,11 +579,12 @@ def doc_to_text_via_word(path: str) -> Tuple[str, Dict]:
         dbg["error"] = f"Word automation failed: {e}"
         return "", dbg
 
-# --- Central router (PDF → text → OCR fallback)
+# --- Central router (PDF → per-page text/OCR)
 def extract_text_any(path: str) -> Tuple[str, Dict]:
     """
     Returns (text, debug_info).
-    - PDF: pdfplumber -> if too little text, OCR with pdf2image + pytesseract (YOUR method).
+    - PDF: per page, PyMuPDF (pdfplumber where its text is garbage) for pages with a text
+      layer, pdf2image + pytesseract for scanned ones.
     - DOCX: python-docx
     - DOC: Word COM (Windows) -> docx -> python-docx
     """
@@ -338,14 +592,18 @@ def extract_text_any(path: str) -> Tuple[str, Dict]:
     debug = {"file": path, "ext": ext, "steps": []}
 
     if ext == ".pdf":
-        t_pdf = pdf_to_text(path)
-        debug["steps"].append({"step": "pdfplumber", "chars": len(t_pdf)})
-        if len(t_pdf) >= 50:  # heuristic threshold
-            return t_pdf, debug
-
-        t_ocr, dbg_ocr = ocr_pdf_with_pytesseract(path)
-        debug["steps"].append({"step": "ocr_fallback", **dbg_ocr, "chars": len(t_ocr)})
-        return t_ocr, debug
+        t0 = time.perf_counter()
+        try:
+            t_pdf, dbg_pdf = pdf_to_text_hybrid(path)
+        except Exception as e:
+            # unreadable text layer: fall back to OCR'ing every page
+            debug["steps"].append({"step": "pdf_hybrid", "error": str(e)})
+            t_ocr, dbg_ocr = ocr_pdf_with_pytesseract(path)
+            debug["steps"].append({"step": "ocr_fallback", **dbg_ocr, "chars": len(t_ocr)})
+            return t_ocr, debug
+        debug["steps"].append({"step": "pdf_hybrid", **dbg_pdf, "chars": len(t_pdf),
+                               "ms": int((time.perf_counter() - t0) * 1000)})
+        return t_pdf, debug
 
     elif ext == ".docx":
         t, dbg = docx_to_text(path)
@@ -363,18 +621,39 @@ def extract_text_any(path: str) -> Tuple[str, Dict]:
 # =========================
 # spaCy & KeyBERT
 # =========================
+# We only read GPE/LOC entities, so everything except the NER component is dropped.
+SPACY_EXCLUDE = ["tagger", "parser", "attribute_ruler", "lemmatizer", "senter"]
+
+# Locations normally sit in the header/contact block; NER runs there first and only
+# falls back to the full text if nothing was found.
+NER_HEADER_LINES = 15
+NER_HEADER_CHARS = 1500
+
+@lru_cache(maxsize=1)
 def load_spacy():
+    # cached: the server mode loads it once in the parent and workers reuse it
+    spacy = _lazy_import("spacy")
     try:
-        return spacy.load("en_core_web_sm")
+        nlp = spacy.load("en_core_web_sm", exclude=SPACY_EXCLUDE)
     except OSError as e:
         raise RuntimeError("spaCy model 'en_core_web_sm' is not installed. "
                            "Run: python -m spacy download en_core_web_sm") from e
-
+    # en_core_web_sm's ner carries its own tok2vec; the shared one only feeds the
+    # (excluded) tagger/parser, so drop it unless something still listens to it.
+    if "tok2vec" in nlp.pipe_names:
+        if not getattr(nlp.get_pipe("tok2vec"), "listening_components", None):
+            nlp.remove_pipe("tok2vec")
+    return nlp
+
+@lru_cache(maxsize=1)
 def load_keybert():
-    return KeyBERT(model="all-MiniLM-L6-v2")
+    return _lazy_import("keybert").KeyBERT(model="all-MiniLM-L6-v2")
 
-def spacy_gpe_locations(nlp, text: str) -> List[str]:
-    doc = nlp(text)
+def cv_header_region(text: str) -> str:
+    head = "\n".join(text.splitlines()[:NER_HEADER_LINES])
+    return head[:NER_HEADER_CHARS]
+
+def _gpe_from_doc(doc) -> List[str]:
     vals = []
     for ent in doc.ents:
         if ent.label_ in ("GPE", "LOC"):
@@ -387,95 +666,186 @@ def spacy_gpe_locations(nlp, text: str) -> List[str]:
             out.append(v)
     return out
 
-def keybert_keywords(kb: KeyBERT, text: str, top_n: int = 20) -> List[str]:
+def spacy_gpe_locations(nlp, text: str, header_first: bool = True) -> List[str]:
+    rec = perf.current()
+    if header_first:
+        head = cv_header_region(text)
+        with rec.stage("spacy.ner_header"):
+            found = _gpe_from_doc(nlp(head))
+        if found or len(head) >= len(text):
+            return found
+    with rec.stage("spacy.ner_full"):
+        return _gpe_from_doc(nlp(text))
+
+def spacy_gpe_locations_batch(nlp, texts: List[str], n_process: int = 1, batch_size: int = 32) -> List[List[str]]:
+    """
+    spacy_gpe_locations for many documents via nlp.pipe: all headers in one batched
+    pass, then one more pass over the full text of the documents that came up empty.
+    """
+    out = [_gpe_from_doc(d) for d in nlp.pipe((cv_header_region(t) for t in texts),
+                                              n_process=n_process, batch_size=batch_size)]
+    retry = [i for i, found in enumerate(out) if not found and len(cv_header_region(texts[i])) < len(texts[i])]
+    if retry:
+        docs = nlp.pipe((texts[i] for i in retry), n_process=n_process, batch_size=batch_size)
+        for i, d in zip(retry, docs):
+            out[i] = _gpe_from_doc(d)
+    return out
+
+KEYBERT_OPTS = dict(keyphrase_ngram_range=(1, 3), stop_words="english", use_mmr=True, diversity=0.6)
+
+def _clean_keywords(pairs) -> List[str]:
+    kws = []
+    for k, _ in pairs:
+        k = re.sub(r"[^A-Za-z0-9\.\+#/ ]", "", k).strip().lower()
+        if 2 <= len(k) <= 40:
+            kws.append(k)
+    return sorted(set(kws), key=lambda x: any(h in x for h in SOFT_ALLOWLIST_HINTS), reverse=True)
+
+def keybert_keywords(kb, text: str, top_n: int = 20) -> List[str]:
     try:
-        pairs = kb.extract_keywords(
-            text,
-            keyphrase_ngram_range=(1, 3),
-            stop_words="english",
-            use_mmr=True,
-            diversity=0.6,
-            top_n=top_n
-        )
-        kws = []
-        for k, _ in pairs:
-            k = re.sub(r"[^A-Za-z0-9\.\+#/ ]", "", k).strip().lower()
-            if 2 <= len(k) <= 40:
-                kws.append(k)
-        return sorted(set(kws), key=lambda x: any(h in x for h in SOFT_ALLOWLIST_HINTS), reverse=True)
+        with perf.current().stage("keybert.extract"):
+            return _clean_keywords(kb.extract_keywords(text, top_n=top_n, **KEYBERT_OPTS))
     except Exception:
         return []
 
+def keybert_keywords_batch(kb, texts: List[str], top_n: int = 20) -> List[List[str]]:
+    """keybert_keywords for many documents; KeyBERT embeds all docs/candidates in batches."""
+    if not texts:
+        return []
+    try:
+        res = kb.extract_keywords(texts, top_n=top_n, **KEYBERT_OPTS)
+    except Exception:
+        return [keybert_keywords(kb, t, top_n=top_n) for t in texts]
+    if len(texts) == 1:  # KeyBERT returns a flat list for a single document
+        res = [res]
+    return [_clean_keywords(pairs) for pairs in res]
+
 # =========================
-# Country/City extraction (GeoText + spaCy)
+# Country/City extraction (gazetteer + spaCy)
 # =========================
+@lru_cache(maxsize=2048)
+def lookup_country(name: str) -> Optional[str]:
+    """Memoized pycountry lookup (the uncached lookup is slow). Canonical name or None."""
+    try:
+        return _lazy_import("pycountry").countries.lookup(name).name
+    except LookupError:
+        return None
+
+@lru_cache(maxsize=2048)
 def normalize_country(name: Optional[str]) -> Optional[str]:
     if not name:
         return None
     norm = re.sub(r"[^\w\s\.]", "", name).strip().lower()
     if norm in COUNTRY_ALIASES:
         return COUNTRY_ALIASES[norm]
+    return lookup_country(name) or name.strip().title()
+
+def _trie_pattern(words: List[str]) -> str:
+    """
+    Regex for a set of literal words, factored as a prefix trie:
+    ["india", "indonesia"] -> "ind(?:ia|onesia)". The regex engine then dispatches
+    on one char per level instead of retrying every alternative at each position.
+    """
+    trie: Dict[str, dict] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        is_end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not is_end:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if is_end else group
+
+    return build(trie)
+
+class CountryMatcher:
+    """
+    Every pycountry name / official name / common name plus COUNTRY_ALIASES,
+    compiled once into a single pattern. find_all() is one pass over the text.
+    """
+    def __init__(self):
+        forms: Dict[str, str] = {}  # lowercased surface form -> canonical country name
+        for c in _lazy_import("pycountry").countries:
+            for attr in ("name", "official_name", "common_name"):
+                v = getattr(c, attr, None)
+                if v:
+                    forms.setdefault(v.lower(), c.name)
+        forms.update(COUNTRY_ALIASES)
+        self.forms = forms
+        # lookarounds rather than \b, so aliases ending in a dot ("u.s.") match too
+        self.pattern = re.compile(r"(?<!\w)" + _trie_pattern(list(forms)) + r"(?!\w)")
+
+    def find_all(self, text: str) -> List[Tuple[int, str, str]]:
+        """[(offset, matched_text, canonical_country)] in text order."""
+        return [(m.start(), m.group(0), self.forms[m.group(0)])
+                for m in self.pattern.finditer(text.lower())]
+
+@lru_cache(maxsize=1)
+def country_matcher() -> CountryMatcher:
+    return CountryMatcher()
+
+@lru_cache(maxsize=1)
+def gazetteer():
+    """
+    The offline gazetteer (mmapped; compiled from the bundled seed if needed), or None
+    if no index could be opened or written: location then works from country names only.
+    """
+    from disk_cache import DEFAULT_CACHE_ROOT
+    from gazetteer import open_gazetteer
     try:
-        m = pycountry.countries.lookup(name)
-        return m.name
-    except LookupError:
-        return name.strip().title()
+        return open_gazetteer(GAZETTEER_INDEX_PATH or os.path.join(DEFAULT_CACHE_ROOT, "gazetteer.idx"))
+    except OSError as e:
+        sys.stderr.write(f"gazetteer unavailable, city resolution off: {e}\n")
+        return None
 
 def resolve_city_to_country(city: str) -> Optional[str]:
-    if not city:
-        return None
-    key = city.strip().lower()
-    if key in CITY_TO_COUNTRY:
-        return CITY_TO_COUNTRY[key]
-    best_key, best_score, _ = process.extractOne(
-        key, list(CITY_TO_COUNTRY.keys()), scorer=fuzz.token_set_ratio
-    )
-    if best_score >= 90:
-        return CITY_TO_COUNTRY[best_key]
-    return None
+    gaz = gazetteer()
+    place = gaz.resolve(city) if city and gaz is not None else None
+    return place.country if place else None
 
-def extract_country_city(text: str, nlp) -> Tuple[Optional[str], Optional[str], str]:
-    places = GeoText(text)
-    spacy_places = spacy_gpe_locations(nlp, text)
+def extract_country_city(text: str, nlp, spacy_places: Optional[List[str]] = None) -> Tuple[Optional[str], Optional[str], str]:
+    gaz = gazetteer()
+    places = gaz.find_places(text) if gaz is not None else []
+    if spacy_places is None:
+        spacy_places = spacy_gpe_locations(nlp, text)
 
     # 1) Country directly
-    candidates_country = list(places.countries)
+    candidates_country = [p.country for _, p in places if p.kind == "country"]
     for token in spacy_places:
-        try:
-            _ = pycountry.countries.lookup(token)
+        if lookup_country(token):
             candidates_country.append(token)
-        except Exception:
-            pass
     if candidates_country:
         for c in candidates_country:
             nc = normalize_country(c)
             if nc:
                 return nc, None, "country"
 
-    # 2) Aliases
-    low = text.lower()
-    for alias, canon in COUNTRY_ALIASES.items():
-        if re.search(rf"\b{re.escape(alias)}\b", low):
-            return canon, None, "country"
-
-    # 3) Full names
-    for c in pycountry.countries:
-        nm = c.name.lower()
-        if re.search(rf"\b{re.escape(nm)}\b", low):
-            return c.name, None, "country"
-
-    # 4) City -> Country
-    city_pool = list(places.cities)
+    # 2) Aliases + full/official names, one pass; the earliest mention wins
+    mentions = country_matcher().find_all(text)
+    if mentions:
+        return mentions[0][2], None, "country"
+
+    # 3) City -> Country: places named in the text first, then spaCy's (resolved lazily)
+    city_pool = [(surface, p.country) for surface, p in places if p.kind != "country"]
+    seen = {surface.lower() for surface, _ in city_pool}
     for token in spacy_places:
-        if token.lower() not in [c.lower() for c in city_pool]:
-            city_pool.append(token)
+        if token.lower() not in seen:
+            seen.add(token.lower())
+            city_pool.append((token, None))
 
     if city_pool:
-        for city in city_pool:
-            guess = resolve_city_to_country(city)
+        for city, guess in city_pool:
+            guess = guess or resolve_city_to_country(city)
             if guess:
                 return guess, city, "city->country"
-        return None, city_pool[0], "city_only"
+        return None, city_pool[0][0], "city_only"
 
     return None, None, "fallback"
 
@@ -491,6 +861,16 @@ def likely_title_lines(text: str) -> List[str]:
     cutoff = max(3, int(len(lines) * TITLE_SCAN_RATIO))
     return lines[:cutoff]
 
+@lru_cache(maxsize=1)
+def title_heads_matcher() -> ChoiceMatcher:
+    return ChoiceMatcher(TITLE_HEADS)
+
+@lru_cache(maxsize=1)
+def role_synonym_matcher() -> ChoiceMatcher:
+    # same order as the old nested loop, so ties still go to the first label
+    pairs = [(s, label) for label, syns in ROLE_SYNONYMS.items() for s in syns + [label]]
+    return ChoiceMatcher([s for s, _ in pairs], labels=[label for _, label in pairs])
+
 def extract_job_title(text: str) -> str:
     for ln in likely_title_lines(text):
         ln_low = ln.lower()
@@ -500,10 +880,10 @@ def extract_job_title(text: str) -> str:
             m = re.search(pat, ln_low, flags=re.IGNORECASE)
             if m:
                 return normalize_title(m.group(0))
-    for ln in likely_title_lines(text):
-        if len(ln) < MIN_TITLE_LEN:
-            continue
-        match, score, _ = process.extractOne(ln.lower(), TITLE_HEADS, scorer=fuzz.partial_ratio)
+    lines = [ln for ln in likely_title_lines(text) if len(ln) >= MIN_TITLE_LEN]
+    scores = title_heads_matcher().max_scores(lines, scorer=fuzz.partial_ratio,
+                                              score_cutoff=FUZZY_TITLE_CUTOFF)
+    for ln, score in zip(lines, scores):
         if score >= FUZZY_TITLE_CUTOFF:
             return normalize_title(ln)
     tokens = re.findall(r"[A-Za-z][A-Za-z\.\+#/]*", text[:2000])
@@ -521,14 +901,8 @@ def normalize_title(title: str) -> str:
 def canonicalize_role(raw_title: str) -> str:
     if not raw_title:
         return ""
-    cand = raw_title.lower()
-    best_label, best_score = "", 0
-    for label, syns in ROLE_SYNONYMS.items():
-        for s in syns + [label]:
-            score = fuzz.partial_ratio(cand, s)
-            if score > best_score:
-                best_label, best_score = label, score
-    return best_label if best_score >= 80 else normalize_title(raw_title)
+    best = role_synonym_matcher().best(raw_title, scorer=fuzz.partial_ratio, score_cutoff=80)
+    return best[0] if best else normalize_title(raw_title)
 
 def role_synonyms_for(label_or_title: str) -> List[str]:
     if not label_or_title:
@@ -641,39 +1015,218 @@ def infer_seniority_level(years: float) -> str:
 # =========================
 # API building & calling
 # =========================
-def build_search_body(country: Optional[str], role: Optional[str]) -> dict:
-    body = {"from": 0, "size": 50}
+def build_search_body(country: Optional[str], role: Optional[str],
+                      offset: int = 0, size: int = FETCH_PAGE_SIZE) -> dict:
+    body = {"from": offset, "size": size}
     if role:
         body["q"] = role
     if country:
         body["country"] = country
     return body
 
+_HTTP_SESSION = None
+# fetch_jobs' worker threads all reach _http_session() / api_cache() on their first call
+_HTTP_INIT_LOCK = threading.Lock()
+
+def _http_session():
+    """One keep-alive session per process (connection reuse instead of a new TLS handshake per call)."""
+    global _HTTP_SESSION
+    with _HTTP_INIT_LOCK:
+        if _HTTP_SESSION is None:
+            requests = _lazy_import("requests")
+            sess = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            sess.mount("http://", adapter)
+            sess.mount("https://", adapter)
+            sess.headers.update({"Content-Type": "application/json", "apikey": APIJOBS_KEY})
+            _HTTP_SESSION = sess
+    return _HTTP_SESSION
+
 def call_api_jobs(body: dict) -> dict:
-    headers = {"Content-Type": "application/json", "apikey": APIJOBS_KEY}
-    resp = requests.post(APIJOBS_URL, headers=headers, json=body, timeout=30)
+    rec = perf.current()
+    t0 = time.perf_counter()
+    try:
+        resp = _http_session().post(APIJOBS_URL, json=body, timeout=30)
+    except Exception:
+        rec.count("http.job_api.errors")
+        raise
+    finally:
+        rec.observe("http.job_api_ms", (time.perf_counter() - t0) * 1000)
+    rec.count(f"http.job_api.status_{resp.status_code}")
     try:
         return resp.json()
     except ValueError:
         return {"ok": False, "error": "Non-JSON response", "status_code": resp.status_code, "text": resp.text}
 
+def normalize_search_body(body: dict) -> dict:
+    out = {}
+    for k, v in body.items():
+        out[k] = re.sub(r"\s+", " ", v).strip().lower() if isinstance(v, str) else v
+    return out
+
+_API_CACHE = None
+
+def api_cache():
+    global _API_CACHE
+    with _HTTP_INIT_LOCK:
+        if _API_CACHE is None:
+            from disk_cache import DiskCache, DEFAULT_CACHE_ROOT
+            from response_cache import ResponseCache
+            disk = DiskCache(os.path.join(DEFAULT_CACHE_ROOT, "api"), API_CACHE_MAX_MB * 1024 * 1024)
+            _API_CACHE = ResponseCache(disk, API_CACHE_TTL_S, API_CACHE_STALE_S,
+                                       should_cache=lambda d: isinstance(d, dict) and "hits" in d)
+    return _API_CACHE
+
+def call_api_jobs_cached(body: dict) -> Tuple[dict, str]:
+    """call_api_jobs behind the shared response cache. Returns (data, cache_status)."""
+    if not API_CACHE_ENABLED:
+        return call_api_jobs(body), "disabled"
+    cache = api_cache()
+    key = cache.key_for(APIJOBS_URL, json.dumps(normalize_search_body(body), sort_keys=True))
+    return cache.get_or_fetch(key, lambda: call_api_jobs(body))
+
+def api_cache_stats() -> dict:
+    return api_cache().snapshot() if API_CACHE_ENABLED and _API_CACHE is not None else {}
+
+# =========================
+# Job fetching (pages x synonyms, concurrent, deduplicated)
+# =========================
+def search_queries_for(role: Optional[str], role_terms: List[str], max_queries: int = FETCH_MAX_QUERIES) -> List[Optional[str]]:
+    """The role itself first, then the longest (most specific) synonyms; short abbreviations are skipped."""
+    if not role:
+        return [None]
+    queries, seen = [role], {role.lower()}
+    for term in sorted(role_terms, key=len, reverse=True):
+        if len(queries) >= max_queries:
+            break
+        if len(term) >= 6 and term.lower() not in seen:
+            seen.add(term.lower())
+            queries.append(term)
+    return queries
+
+def _norm_key(*parts) -> str:
+    return "|".join(re.sub(r"[^a-z0-9]+", " ", str(p or "").lower()).strip() for p in parts)
+
+def job_dedup_keys(hit: dict) -> List[str]:
+    """A hit is a duplicate if its id/url or its normalized (title, company) was seen before."""
+    keys = []
+    jid = hit.get("id") or hit.get("_id") or hit.get("job_id")
+    if jid:
+        keys.append(f"id:{jid}")
+    url = hit.get("url") or hit.get("website") or hit.get("apply_url")
+    if url:
+        keys.append(f"url:{url}")
+    title = hit.get("title") or hit.get("job_title")
+    company = hit.get("hiringOrganizationName") or hit.get("company") or hit.get("company_name")
+    if title and company:
+        keys.append(f"tc:{_norm_key(title, company)}")
+    return keys
+
+def fetch_jobs(country: Optional[str], role: Optional[str], role_terms: List[str],
+               years_exp: float) -> Tuple[dict, dict]:
+    """
+    Fetch up to FETCH_MAX_PAGES pages for each of the top role queries concurrently, in
+    waves: page 0 of every query first, and a query's next page only once its previous
+    page came back full and fewer than FETCH_TARGET_RESULTS hits pass the role and
+    experience filters. At most FETCH_CONCURRENCY requests are in flight, and requests
+    are only submitted when a slot frees up, so an early stop leaves nothing queued.
+    Hits are merged in (page, query) order and deduplicated.
+    Returns ({"ok", "hits"}, fetch_debug).
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    queries = search_queries_for(role, role_terms)
+    pending = deque((0, qi) for qi in range(len(queries)))  # (page, query index) not yet submitted
+
+    responses: Dict[int, List[dict]] = {}
+    seen, passing = set(), 0
+    ok, errors, statuses = False, [], {}
+    early_stop, started = False, 0
+
+    ex = ThreadPoolExecutor(max_workers=max(1, FETCH_CONCURRENCY))
+    running: Dict[object, Tuple[int, int]] = {}
+    try:
+        while pending or running:
+            while pending and len(running) < max(1, FETCH_CONCURRENCY):
+                page, qi = pending.popleft()
+                body = build_search_body(country, queries[qi], offset=page * FETCH_PAGE_SIZE)
+                running[ex.submit(perf.in_context(call_api_jobs_cached), body)] = (page, qi)
+                started += 1
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                page, qi = running.pop(fut)
+                q = queries[qi]
+                try:
+                    data, status = fut.result()
+                except Exception as e:
+                    errors.append({"query": q, "page": page, "error": f"{type(e).__name__}: {e}"})
+                    continue
+                statuses[status] = statuses.get(status, 0) + 1
+                perf.current().count(f"cache.api.{status}")
+                ok = ok or bool(isinstance(data, dict) and data.get("ok"))
+                hits = _api_hits(data)
+                responses[page * len(queries) + qi] = hits
+                if len(hits) >= FETCH_PAGE_SIZE and page + 1 < FETCH_MAX_PAGES:
+                    pending.append((page + 1, qi))  # a short page means the query has no more
+                fresh = []
+                for h in hits:
+                    keys = job_dedup_keys(h)
+                    if not any(k in seen for k in keys):
+                        fresh.append(h)
+                    seen.update(keys)
+                passing += len(filter_hits_by_experience(filter_hits_by_role(fresh, role_terms), years_exp)) if fresh else 0
+            if passing >= FETCH_TARGET_RESULTS:
+                early_stop = True
+                break
+    finally:
+        # nothing is queued; requests still running finish in the background (and fill the cache)
+        ex.shutdown(wait=False, cancel_futures=True)
+
+    merged, seen, dupes = [], set(), 0
+    for i in sorted(responses):
+        for h in responses[i]:
+            keys = job_dedup_keys(h)
+            if keys and any(k in seen for k in keys):
+                dupes += 1
+                continue
+            seen.update(keys)
+            merged.append(h)
+
+    debug = {
+        "queries": queries,
+        "requests_planned": len(queries) * FETCH_MAX_PAGES,
+        "requests_started": started,
+        "requests_done": len(responses),
+        "duplicates_removed": dupes,
+        "filtered_estimate": passing,
+        "early_stop": early_stop,
+        "cache_statuses": statuses,
+    }
+    if early_stop:
+        # pages that were never requested, and requests whose response is not used
+        debug["requests_skipped"] = len(pending)
+        debug["requests_abandoned"] = len(running)
+    if errors:
+        debug["errors"] = errors
+    data = {"ok": ok, "hits": merged}
+    if errors and not responses:
+        data["error"] = errors[0]["error"]
+    return data, debug
+
 # =========================
 # Client-side filters (optional)
 # =========================
+@lru_cache(maxsize=64)
+def role_terms_matcher(role_terms: Tuple[str, ...]) -> ChoiceMatcher:
+    return ChoiceMatcher(role_terms)
+
 def filter_hits_by_role(hits: List[dict], role_terms: List[str], cutoff: int = TITLE_FILTER_CUTOFF) -> List[dict]:
     if not role_terms:
         return hits
-    keep = []
-    for h in hits:
-        title = (h.get("title") or h.get("job_title") or "").lower()
-        best = 0
-        for term in role_terms:
-            s = fuzz.partial_ratio(title, term.lower())
-            if s > best:
-                best = s
-        if best >= cutoff:
-            keep.append(h)
-    return keep
+    titles = [h.get("title") or h.get("job_title") or "" for h in hits]
+    scores = role_terms_matcher(tuple(role_terms)).max_scores(titles, scorer=fuzz.partial_ratio,
+                                                              score_cutoff=cutoff)
+    return [h for h, score in zip(hits, scores) if score >= cutoff]
 
 REQUIRED_YEARS_RE = re.compile(
     r"(?P<min>\d{1,2})\s*(?:\+|plus)?\s*(?:-|\u2013|\u2014|to)?\s*(?P<max>\d{1,2})?\s*"
@@ -707,95 +1260,967 @@ def filter_hits_by_experience(hits: List[dict], candidate_years: float, cushion:
     if not hits:
         return hits
     keep = []
-    for h in hits:
-        req = extract_required_years_from_job(h)
+    for h, feats in zip(hits, job_features_for(hits)):
+        req = feats["required_years"]
         if req is None or req <= candidate_years + cushion:
             keep.append(h)
     return keep
 
 # =========================
-# Main entry
+# Per-job feature store
 # =========================
-def cv_path_to_jobs(cv_path: str) -> dict:
-    if not os.path.exists(cv_path):
-        return {"error": f"File not found: {cv_path}"}
+# Bump JOB_FEATURES_VERSION whenever compute_job_features changes output.
+JOB_FEATURES_VERSION = "1"
+JOB_FEATURE_STORE_ENABLED = os.getenv("JOB_FEATURE_STORE_ENABLED", "1") != "0"
+JOB_FEATURES_MEMORY_SIZE = int(os.getenv("JOB_FEATURES_MEMORY_SIZE", "20000"))
+
+JOB_SENIORITY_PATTERNS = [
+    (re.compile(r"\b(?:intern(?:ship)?|trainee|graduate|entry[- ]level)\b", re.IGNORECASE), "Intern/Entry"),
+    (re.compile(r"\b(?:junior|jr\.?|associate)\b", re.IGNORECASE), "Junior"),
+    (re.compile(r"\b(?:lead|principal|staff|head|director)\b", re.IGNORECASE), "Lead/Principal"),
+    (re.compile(r"\b(?:senior|sr\.?)\b", re.IGNORECASE), "Senior"),
+]
+
+class MemoryLRU:
+    """Thread-safe in-memory LRU, shared by every request in the process."""
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self._items: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> list:
+        with self._lock:
+            out = []
+            for k in keys:
+                v = self._items.get(k)
+                if v is not None:
+                    self._items.move_to_end(k)
+                out.append(v)
+            return out
+
+    def put_many(self, keys: List[str], values) -> None:
+        with self._lock:
+            for k, v in zip(keys, values):
+                self._items[k] = v
+                self._items.move_to_end(k)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+_JOB_FEATURES = MemoryLRU(JOB_FEATURES_MEMORY_SIZE)
+_JOB_FEATURE_COUNTERS = {"memory": 0, "store": 0, "computed": 0}
+_JOB_FEATURE_LOCK = threading.Lock()
+
+def job_feature_key(hit: dict) -> str:
+    """Job id + hash of every field the features are computed from (+ features version)."""
+    h = hashlib.sha1()
+    for k in ("title", "job_title", "description", "requirements"):
+        v = hit.get(k)
+        if isinstance(v, str):
+            h.update(v.encode("utf-8"))
+        h.update(b"\x1f")
+    jid = hit.get("id") or hit.get("_id") or hit.get("job_id") or ""
+    return f"{JOB_FEATURES_VERSION}:{jid}:{h.hexdigest()[:20]}"
+
+def job_seniority(title: str, required_years: Optional[float]) -> Optional[str]:
+    for pat, level in JOB_SENIORITY_PATTERNS:
+        if pat.search(title):
+            return level
+    return infer_seniority_level(required_years) if required_years is not None else None
+
+def compute_job_features(hit: dict) -> dict:
+    title = hit.get("title") or hit.get("job_title") or ""
+    years = extract_required_years_from_job(hit)
+    return {
+        "required_years": years,
+        "title_norm": normalize_title(title) if title else "",
+        "role": canonicalize_role(title),
+        "seniority": job_seniority(title, years),
+    }
 
-    # central text extraction router (PDF with OCR fallback)
-    text, debug_extract = extract_text_any(cv_path)
-    if not text or len(text) < 20:
-        return {"error": "Could not extract text from file (no content found).",
-                "_debug_extract": debug_extract}
+def job_features_for(hits: List[dict]) -> List[dict]:
+    """
+    Features for every hit: in-memory LRU, then the SQLite store (one query for all
+    misses), then compute_job_features for the rest, which are written back.
+    """
+    if not hits:
+        return []
+    keys = [job_feature_key(h) for h in hits]
+    feats = _JOB_FEATURES.get_many(keys)
+    from_memory = sum(f is not None for f in feats)
+    missing = [i for i, f in enumerate(feats) if f is None]
 
-    # Load AI components
-    nlp = load_spacy()
-    kb = load_keybert()
+    from_store = 0
+    if missing and JOB_FEATURE_STORE_ENABLED:
+        try:
+            stored = job_index().get_features([keys[i] for i in missing])
+        except Exception:
+            stored = {}
+        for i in missing:
+            if keys[i] in stored:
+                feats[i] = stored[keys[i]]
+                from_store += 1
+
+    computed = [i for i in missing if feats[i] is None]
+    for i in computed:
+        feats[i] = compute_job_features(hits[i])
+    if computed and JOB_FEATURE_STORE_ENABLED:
+        try:
+            job_index().put_features([(keys[i], feats[i]) for i in computed])
+        except Exception:
+            pass
+    _JOB_FEATURES.put_many([keys[i] for i in missing], [feats[i] for i in missing])
+    rec = perf.current()
+    rec.count("job_features.memory", from_memory)
+    rec.count("job_features.store", from_store)
+    rec.count("job_features.computed", len(computed))
+    with _JOB_FEATURE_LOCK:
+        _JOB_FEATURE_COUNTERS["memory"] += from_memory
+        _JOB_FEATURE_COUNTERS["store"] += from_store
+        _JOB_FEATURE_COUNTERS["computed"] += len(computed)
+    return feats
+
+def job_feature_stats() -> dict:
+    with _JOB_FEATURE_LOCK:
+        return dict(_JOB_FEATURE_COUNTERS)
 
-    # Country/City detection
-    country_final, city_found, mode = extract_country_city(text, nlp)
+# =========================
+# Ranking (MiniLM embeddings, same model as KeyBERT)
+# =========================
+RANK_ENABLED = os.getenv("JOB_MATCHING_RANK", "1") != "0"
+RANK_MODEL = "all-MiniLM-L6-v2"
+RANK_CV_CHARS = 2000     # MiniLM truncates at 256 tokens anyway
+RANK_JOB_CHARS = 1000    # title + start of the description
+JOB_EMBED_CACHE_SIZE = int(os.getenv("JOB_MATCHING_EMBED_CACHE", "5000"))
+
+_JOB_EMBEDDINGS = MemoryLRU(JOB_EMBED_CACHE_SIZE)
+
+def job_rank_text(hit: dict) -> str:
+    title = hit.get("title") or hit.get("job_title") or ""
+    desc = hit.get("description") or ""
+    return f"{title}. {desc}"[:RANK_JOB_CHARS]
+
+def job_embedding_key(hit: dict, text: str) -> str:
+    # text is part of the key so an edited posting with the same id is re-encoded
+    jid = hit.get("id") or hit.get("_id") or hit.get("job_id") or ""
+    return f"{jid}:{hashlib.sha1(text.encode('utf-8')).hexdigest()}"
+
+def cv_rank_vector(feats: Optional[dict]) -> Optional[List[float]]:
+    """The CV embedding stored with cached features, if it was made by RANK_MODEL."""
+    emb = (feats or {}).get("cv_embedding") or {}
+    return emb.get("vector") if emb.get("model") == RANK_MODEL else None
+
+def _stored_job_embeddings(keys: List[str]) -> Dict[str, bytes]:
+    if not keys or not JOB_FEATURE_STORE_ENABLED:
+        return {}
+    try:
+        return job_index().get_embeddings([f"{RANK_MODEL}:{k}" for k in keys])
+    except Exception:
+        return {}
 
+def rank_hits(kb, cv_text: str, hits: List[dict],
+              cv_vector: Optional[List[float]] = None) -> Tuple[List[dict], dict, Optional[List[float]]]:
+    """
+    Sort hits by cosine similarity to the CV. Job embeddings come from the in-memory LRU,
+    then the job index's embedding store; the CV (unless `cv_vector` is given) and the
+    remaining jobs are encoded in one batch, loading the model only then (`kb` may be None).
+    Returns (hits with match_score, best first; debug; CV vector). On any failure hits
+    keep API order.
+    """
+    debug = {"model": RANK_MODEL, "hits": len(hits), "encoded": 0, "cached": 0, "stored": 0}
+    if not hits or not cv_text:
+        return hits, debug, cv_vector
+    t0 = time.perf_counter()
+    try:
+        np = _lazy_import("numpy")
+        texts = [job_rank_text(h) for h in hits]
+        keys = [job_embedding_key(h, t) for h, t in zip(hits, texts)]
+        vecs = _JOB_EMBEDDINGS.get_many(keys)
+        missing = [i for i, v in enumerate(vecs) if v is None]
+        stored = _stored_job_embeddings([keys[i] for i in missing])
+        for i in missing:
+            blob = stored.get(f"{RANK_MODEL}:{keys[i]}")
+            if blob is not None:
+                vecs[i] = np.frombuffer(blob, dtype=np.float32)
+        from_store = [i for i in missing if vecs[i] is not None]
+        missing = [i for i in missing if vecs[i] is None]
+        _JOB_EMBEDDINGS.put_many([keys[i] for i in from_store], [vecs[i] for i in from_store])
+
+        cv_vec = np.asarray(cv_vector, dtype=np.float32) if cv_vector else None
+        inputs = ([] if cv_vec is not None else [cv_text[:RANK_CV_CHARS]]) + [texts[i] for i in missing]
+        if inputs:
+            kb = kb if kb is not None else load_keybert()
+            emb = np.asarray(kb.model.embed(inputs), dtype=np.float32)
+            norms = np.linalg.norm(emb, axis=1, keepdims=True)
+            emb = emb / np.where(norms == 0, 1.0, norms)
+            if cv_vec is None:
+                cv_vec, emb = emb[0], emb[1:]
+            for j, i in enumerate(missing):
+                vecs[i] = emb[j]
+            _JOB_EMBEDDINGS.put_many([keys[i] for i in missing], emb)
+            if missing and JOB_FEATURE_STORE_ENABLED:
+                try:
+                    job_index().put_embeddings([(f"{RANK_MODEL}:{keys[i]}", vecs[i].tobytes()) for i in missing])
+                except Exception:
+                    pass
+
+        scores = np.vstack(vecs) @ cv_vec
+        order = np.argsort(-scores, kind="stable")
+    except Exception as e:
+        debug["error"] = f"{type(e).__name__}: {e}"
+        return hits, debug, cv_vector
+    debug.update(encoded=len(missing), stored=len(from_store), cached=len(hits) - len(missing) - len(from_store),
+                 cv_cached=cv_vector is not None, ms=round((time.perf_counter() - t0) * 1000, 1))
+    perf.current().count("rank.encoded", len(missing))
+    perf.current().count("rank.cached", len(hits) - len(missing))
+    ranked = [{**hits[i], "match_score": round(float(scores[i]), 4)} for i in order]
+    return ranked, debug, cv_vector or [round(float(x), 6) for x in cv_vec]
+
+def rank_job_hits(kb, cv_text: str, hits: List[dict],
+                  cv_vector: Optional[List[float]] = None) -> Tuple[List[dict], dict, Optional[List[float]]]:
+    if not RANK_ENABLED:
+        return hits, {"enabled": False}, cv_vector
+    return rank_hits(kb, cv_text, hits, cv_vector=cv_vector)
+
+def remember_cv_vector(feats: dict, cv_vector: Optional[List[float]]) -> bool:
+    """Put the CV embedding into the feature record. True if the record changed (store it again)."""
+    if not cv_vector or cv_rank_vector(feats) is not None:
+        return False
+    feats["cv_embedding"] = {"model": RANK_MODEL, "vector": cv_vector}
+    return True
+
+# =========================
+# Local job index (SQLite FTS5)
+# =========================
+_JOB_INDEX = None
+
+def job_index():
+    global _JOB_INDEX
+    if _JOB_INDEX is None:
+        from disk_cache import DEFAULT_CACHE_ROOT
+        from job_index import JobIndex
+        _JOB_INDEX = JobIndex(JOB_INDEX_PATH or os.path.join(DEFAULT_CACHE_ROOT, "jobs.sqlite3"))
+    return _JOB_INDEX
+
+# hit fields naming the posting's country, then free-text location fields ("Colombo, Sri Lanka")
+HIT_COUNTRY_FIELDS = ("country", "country_code", "countryCode")
+HIT_LOCATION_FIELDS = ("location", "region", "city")
+
+def hit_country(hit: dict) -> Optional[str]:
+    """The posting's own country, normalized like the CV's country, or None."""
+    for field in HIT_COUNTRY_FIELDS:
+        v = hit.get(field)
+        if isinstance(v, str) and v.strip():
+            return normalize_country(v.strip())
+    for field in HIT_LOCATION_FIELDS:
+        v = hit.get(field)
+        if not isinstance(v, str) or not v.strip():
+            continue
+        mentions = country_matcher().find_all(v)
+        if mentions:
+            return mentions[-1][2]
+        country = resolve_city_to_country(v.split(",")[0].strip())
+        if country:
+            return country
+    return None
+
+def index_job_hits(hits: List[dict], country: Optional[str]) -> dict:
+    """
+    Upsert fetched hits into the local index (and expire old postings now and then).
+    Each posting is stored under its own country; the search `country` is only used
+    for hits that do not say where they are.
+    """
+    rows = []
+    for h, feats in zip(hits, job_features_for(hits)):
+        keys = job_dedup_keys(h)
+        if keys:
+            rows.append({
+                "key": keys[0],
+                "title": h.get("title") or h.get("job_title") or "",
+                "description": h.get("description") or "",
+                "country": hit_country(h) or country,
+                "required_years": feats["required_years"],
+                "payload": h,
+            })
+    t0 = time.perf_counter()
+    try:
+        idx = job_index()
+        info = {"upserted": idx.upsert(rows)}
+        expired = idx.maybe_expire(JOB_INDEX_MAX_AGE_S)
+        if expired is not None:
+            info["expired"] = expired
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    info["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    return info
+
+def search_job_index(country: Optional[str], role_terms: List[str], years_exp: float) -> Tuple[List[dict], dict]:
+    """Fresh local postings for (role terms, country, years), best bm25 first."""
+    t0 = time.perf_counter()
+    try:
+        hits = job_index().search(role_terms, country=country,
+                                  max_years=years_exp + EXPERIENCE_YEARS_CUSHION,
+                                  max_age_s=JOB_INDEX_FRESH_S,
+                                  limit=FETCH_PAGE_SIZE * FETCH_MAX_PAGES)
+    except Exception as e:
+        return [], {"error": f"{type(e).__name__}: {e}"}
+    return hits, {"hits": len(hits), "ms": round((time.perf_counter() - t0) * 1000, 1)}
+
+# =========================
+# CV feature cache
+# =========================
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def cv_features_cache_key(cv_path: str) -> str:
+    """
+    SHA-256 of the file bytes + extractor/model versions. The month is part of the
+    key because "2021 - Present" style ranges resolve against today's date.
+    """
+    parts = [
+        file_sha256(cv_path),
+        CV_FEATURES_VERSION,
+        "en_core_web_sm", "all-MiniLM-L6-v2",
+        datetime.date.today().strftime("%Y-%m"),
+    ]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+_CV_CACHE = None
+
+def cv_cache():
+    global _CV_CACHE
+    if _CV_CACHE is None:
+        from disk_cache import DiskCache, DEFAULT_CACHE_ROOT
+        _CV_CACHE = DiskCache(os.path.join(DEFAULT_CACHE_ROOT, "cv"), CV_CACHE_MAX_MB * 1024 * 1024)
+    return _CV_CACHE
+
+def lookup_cached_features(cv_path: str) -> Tuple[Optional[dict], Optional[str], dict]:
+    """(cached_features_or_None, cache_key, cache_info) for a CV file."""
+    if not CV_CACHE_ENABLED:
+        return None, None, {"enabled": False}
+    try:
+        key = cv_features_cache_key(cv_path)
+        cached = cv_cache().get(key)
+    except OSError as e:
+        return None, None, {"enabled": True, "error": str(e)}
+    return cached, key, {"enabled": True, "hit": cached is not None, "key": key[:16]}
+
+def store_cached_features(key: Optional[str], feats: dict, cache_info: dict) -> None:
+    if not key or "error" in feats:  # failures may be transient (missing tesseract etc.)
+        return
+    try:
+        cv_cache().put(key, feats)
+    except OSError as e:
+        cache_info["error"] = str(e)
+
+# =========================
+# Main entry
+# =========================
+# Threads for the per-CV stage graph (see cv_pipeline_stages)
+STAGE_WORKERS = int(os.getenv("JOB_MATCHING_STAGE_WORKERS", "4"))
+
+def role_features(text: str) -> dict:
     # Role (heuristics) + canonicalization
     raw_role = extract_job_title(text)
     role_final = canonicalize_role(raw_role)
-    role_terms = role_synonyms_for(role_final if role_final else raw_role)
+    return {
+        "role_raw": raw_role,
+        "role_final": role_final,
+        "role_terms": role_synonyms_for(role_final if role_final else raw_role),
+    }
 
-    # Experience
+def experience_features(text: str) -> dict:
     years_exp, exp_debug = extract_experience_years(text)
-    level = infer_seniority_level(years_exp)
+    return {
+        "experience_years": years_exp,
+        "experience_level": infer_seniority_level(years_exp),
+        "experience_debug": exp_debug,
+    }
 
+def features_from_text(text: str, debug_extract: dict, nlp, kb,
+                       spacy_places: Optional[List[str]] = None,
+                       keywords: Optional[List[str]] = None) -> dict:
+    """
+    All NLP/heuristic stages on already-extracted text, run one after another.
+    Batch mode passes in NER places and KeyBERT keywords computed for many CVs at once.
+    """
+    country_final, city_found, mode = extract_country_city(text, nlp, spacy_places=spacy_places)
+    feats = {
+        "text": text,
+        "_debug_extract": debug_extract,
+        "country_mode": mode,
+        "country_final": country_final,
+        "city_found": city_found,
+    }
+    feats.update(role_features(text))
+    feats.update(experience_features(text))
     # KeyBERT skills/phrases (telemetry only)
-    top_keywords = keybert_keywords(kb, text, top_n=25)
-
-    # Build request
-    body = build_search_body(country_final or None, role_final or raw_role or None)
+    feats["keywords"] = keywords if keywords is not None else keybert_keywords(kb, text, top_n=25)
+    return feats
 
-    # Call API
-    data = call_api_jobs(body)
-    hits = data.get("hits", []) if isinstance(data, dict) else []
+def search_body_for(country_final: Optional[str], role: dict) -> dict:
+    return build_search_body(country_final or None, role["role_final"] or role["role_raw"] or None)
 
-    # Optional client filtering
+def fetch_jobs_for(country_final: Optional[str], role: dict, experience: dict,
+                   local_index: bool = False) -> Tuple[dict, dict]:
+    """
+    Local index first when `local_index` (enough fresh postings -> no API call), otherwise
+    the job API. Hits from real API calls (cache misses) are upserted into the index.
+    """
+    country = country_final or None
+    local_debug = None
+    if local_index and JOB_INDEX_ENABLED:
+        hits, local_debug = search_job_index(country, role["role_terms"], experience["experience_years"])
+        if len(hits) >= JOB_INDEX_MIN_RESULTS:
+            return {"ok": True, "hits": hits}, {"source": "local_index", "local_index": local_debug,
+                                                 "cache_statuses": {}}
+        local_debug["fallback"] = "thin or stale"
+
+    data, debug = fetch_jobs(country, role["role_final"] or role["role_raw"] or None,
+                             role["role_terms"], experience["experience_years"])
+    debug["source"] = "api"
+    if local_debug is not None:
+        debug["local_index"] = local_debug
+    # re-upserting cached responses would only bump fetched_at, unless the index just came up short
+    if JOB_INDEX_ENABLED and data.get("hits") and (debug["cache_statuses"].get("miss") or local_debug is not None):
+        debug["indexed"] = index_job_hits(data["hits"], country)
+    return data, debug
+
+def filter_job_hits(hits: List[dict], role_terms: List[str], years_exp: float) -> Tuple[List[dict], List[dict]]:
+    """Client-side filters. Returns (hits_after_role_filter, final_hits)."""
     hits_role = filter_hits_by_role(hits, role_terms, cutoff=TITLE_FILTER_CUTOFF) if hits else []
     hits_role_or_all = hits_role if hits_role else hits
     hits_exp = filter_hits_by_experience(hits_role_or_all, candidate_years=years_exp, cushion=EXPERIENCE_YEARS_CUSHION)
     final_hits = hits_exp if hits_exp else hits_role_or_all
+    return hits_role, final_hits
+
+def _api_hits(data) -> List[dict]:
+    return data.get("hits", []) if isinstance(data, dict) else []
 
+def assemble_result(feats: dict, body: dict, data: dict, hits_role: List[dict], final_hits: List[dict]) -> dict:
     return {
         "search_params": body,
-        "_debug_extract": debug_extract,  # so you can see which extractor ran
+        "_debug_extract": feats["_debug_extract"],  # so you can see which extractor ran
         "extracted": {
-            "country_mode": mode,               # "country" | "city->country" | "city_only" | "fallback"
-            "country_final": country_final,     # what we used (or None)
-            "city_found": city_found,           # city seen in CV (we do NOT send to API)
-            "role_raw": raw_role,
-            "role_final": role_final,
-            "role_terms_used_for_filtering": role_terms,
-            "experience_years_estimate": years_exp,
-            "experience_level": level,
-            "experience_debug": exp_debug,
-            "keybert_top_keywords": top_keywords[:12],
+            "country_mode": feats["country_mode"],  # "country" | "city->country" | "city_only" | "fallback"
+            "country_final": feats["country_final"],  # what we used (or None)
+            "city_found": feats["city_found"],  # city seen in CV (we do NOT send to API)
+            "role_raw": feats["role_raw"],
+            "role_final": feats["role_final"],
+            "role_terms_used_for_filtering": feats["role_terms"],
+            "experience_years_estimate": feats["experience_years"],
+            "experience_level": feats["experience_level"],
+            "experience_debug": feats["experience_debug"],
+            "keybert_top_keywords": feats["keywords"][:12],
         },
         "jobs": {
             "ok": data.get("ok", False),
-            "total_before_filter": len(hits),
+            "total_before_filter": len(_api_hits(data)),
             "after_role_filter": len(hits_role),
             "after_experience_filter": len(final_hits),
             "hits": final_hits
         }
     }
 
+def jobs_for_features(feats: dict, call_api: bool = True, kb=None, local_index: bool = False) -> dict:
+    """
+    Search body -> job API -> client-side filters -> ranking, sequentially (batch mode).
+    A newly computed CV embedding is added to `feats` (see remember_cv_vector).
+    """
+    body = search_body_for(feats["country_final"], feats)
+    data, fetch_debug = (fetch_jobs_for(feats["country_final"], feats, feats, local_index=local_index)
+                         if call_api else ({"ok": False, "skipped": True}, None))
+    hits_role, final_hits = filter_job_hits(_api_hits(data), feats["role_terms"], feats["experience_years"])
+    ranked, rank_debug, cv_vector = rank_job_hits(kb, feats["text"], final_hits, cv_vector=cv_rank_vector(feats))
+    remember_cv_vector(feats, cv_vector)
+    result = assemble_result(feats, body, data, hits_role, ranked)
+    result["jobs"]["ranking"] = rank_debug
+    if fetch_debug:
+        result["jobs"]["fetch"] = fetch_debug
+    return result
+
+def cv_pipeline_stages(cv_path: str, cached: Optional[dict], local_index: bool = False) -> List["Stage"]:
+    """
+    Stage graph for one CV:
+
+        text ─┬─ role ───────┬─ search_body
+              ├─ experience ─┼─ api (fetch_jobs) ── filters ── rank
+        nlp ──┴─ location ───┘                                  │
+        kb ───── keywords          (telemetry only)             kb
+
+    With cached features the text/NLP stages just hand back the cached values and
+    there is no kb stage: rank uses the cached CV embedding and loads the model only
+    if some job embedding is in neither the LRU nor the job index.
+    """
+    from stage_graph import Stage, StageAbort
+
+    if cached is not None:
+        stages = [
+            Stage("text", (), lambda _: (cached["text"], cached["_debug_extract"])),
+            Stage("location", (), lambda _: (cached["country_final"], cached["city_found"], cached["country_mode"])),
+            Stage("role", (), lambda _: {k: cached[k] for k in ("role_raw", "role_final", "role_terms")}),
+            Stage("experience", (), lambda _: {k: cached[k] for k in ("experience_years", "experience_level", "experience_debug")}),
+            Stage("keywords", (), lambda _: cached["keywords"]),
+            Stage("rank", ("filters", "text"),
+                  lambda r: rank_job_hits(None, r["text"][0], r["filters"][1], cv_vector=cv_rank_vector(cached))),
+        ]
+    else:
+        def text_stage(_):
+            # central text extraction router (PDF with per-page OCR)
+            text, debug_extract = extract_text_any(cv_path)
+            if not text or len(text) < 20:
+                raise StageAbort({"error": "Could not extract text from file (no content found).",
+                                  "_debug_extract": debug_extract})
+            perf.current().count("text.chars", len(text))
+            return text, debug_extract
+
+        stages = [
+            Stage("text", (), text_stage),
+            Stage("nlp", (), lambda _: load_spacy()),
+            Stage("kb", (), lambda _: load_keybert()),
+            Stage("location", ("text", "nlp"), lambda r: extract_country_city(r["text"][0], r["nlp"])),
+            Stage("role", ("text",), lambda r: role_features(r["text"][0])),
+            Stage("experience", ("text",), lambda r: experience_features(r["text"][0])),
+            Stage("keywords", ("text", "kb"), lambda r: keybert_keywords(r["kb"], r["text"][0], top_n=25)),
+            Stage("rank", ("filters", "text", "kb"), lambda r: rank_job_hits(r["kb"], r["text"][0], r["filters"][1])),
+        ]
+
+    stages += [
+        Stage("search_body", ("location", "role"), lambda r: search_body_for(r["location"][0], r["role"])),
+        Stage("api", ("location", "role", "experience"),
+              lambda r: fetch_jobs_for(r["location"][0], r["role"], r["experience"], local_index=local_index)),
+        Stage("filters", ("api", "role", "experience"),
+              lambda r: filter_job_hits(_api_hits(r["api"][0]), r["role"]["role_terms"],
+                                        r["experience"]["experience_years"])),
+    ]
+    return stages
+
+def cv_path_to_jobs(cv_path: str, local_index: Optional[bool] = None,
+                    emit: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    Match one CV. Adds a `_perf` section (and a metrics-file block) unless perf is disabled.
+    With `emit`, progress events (see stage_events) are passed to it as stages finish.
+    """
+    rec = perf.start()
+    try:
+        result = match_cv_path(cv_path, local_index=local_index, emit=emit)
+    finally:
+        perf.stop()
+    if isinstance(rec, perf.Recorder):
+        snap = rec.finish()
+        result["_perf"] = snap
+        if perf.METRICS_FILE:
+            try:
+                perf.append_metrics(perf.METRICS_FILE, snap,
+                                    labels={"outcome": "error" if "error" in result else "ok"})
+            except OSError:
+                pass
+    return result
+
+def match_cv_path(cv_path: str, local_index: Optional[bool] = None,
+                  emit: Optional[Callable[[dict], None]] = None) -> dict:
+    from stage_graph import run_stages, critical_path, StageAbort
+
+    if not os.path.exists(cv_path):
+        return {"error": f"File not found: {cv_path}"}
+    if local_index is None:
+        local_index = LOCAL_INDEX_DEFAULT
+
+    cached, cache_key, cache_info = lookup_cached_features(cv_path)
+    perf.current().count("cache.cv_features." + ("hit" if cached is not None else "miss"))
+    stages = cv_pipeline_stages(cv_path, cached, local_index=local_index)
+    on_done = None
+    if emit is not None:
+        t0 = time.perf_counter()
+
+        def on_done(name, value):
+            for ev in stage_events(name, value):
+                emit({**ev, "t_ms": round((time.perf_counter() - t0) * 1000, 1)})
+    try:
+        r, timeline = run_stages(stages, max_workers=STAGE_WORKERS, around=perf.current().stage,
+                                 on_done=on_done)
+    except StageAbort as e:
+        return {**e.result, "_stages": {"timeline": e.timeline}}
+
+    text, debug_extract = r["text"]
+    country_final, city_found, mode = r["location"]
+    feats = {
+        "text": text,
+        "_debug_extract": debug_extract,
+        "country_mode": mode,
+        "country_final": country_final,
+        "city_found": city_found,
+        **r["role"],
+        **r["experience"],
+        "keywords": r["keywords"],
+    }
+    ranked, rank_debug, cv_vector = r["rank"]
+    if cached is not None:
+        feats = {**cached, **feats}
+    if remember_cv_vector(feats, cv_vector) or cached is None:
+        store_cached_features(cache_key, feats, cache_info)
+
+    hits_role, _ = r["filters"]
+    data, fetch_debug = r["api"]
+    result = assemble_result(feats, r["search_body"], data, hits_role, ranked)
+    result["jobs"]["ranking"] = rank_debug
+    result["jobs"]["fetch"] = fetch_debug
+    result["_cache"] = {
+        "cv_features": cache_info,
+        "api": {"calls": fetch_debug["cache_statuses"], "counters": api_cache_stats()},
+        "job_features": job_feature_stats(),
+    }
+    result["_stages"] = {
+        "workers": STAGE_WORKERS,
+        "timeline": timeline,
+        "critical_path": critical_path(stages, timeline),
+    }
+    return result
+
 # =========================
-# Run
+# Streaming (--stream)
 # =========================
-if __name__ == "__main__":
-    
-    arg = sys.argv[1] if len(sys.argv) > 1 else None
+HIT_BATCH_SIZE = 10
+
+def stage_events(name: str, value) -> List[dict]:
+    """Compact progress events for a finished pipeline stage (none for internal stages)."""
+    if name == "text":
+        text, dbg = value
+        step = (dbg.get("steps") or [{}])[-1]
+        ev = {"event": "text", "chars": len(text), "engine": step.get("engine") or step.get("step")}
+        if "pages" in step:
+            ev["pages"] = len(step["pages"])
+            ev["ocr_pages"] = len(step.get("ocr_pages") or [])
+        return [ev]
+    if name == "location":
+        country_final, city_found, mode = value
+        return [{"event": "country", "country_final": country_final, "city_found": city_found,
+                 "country_mode": mode}]
+    if name == "role":
+        return [{"event": "role", **value}]
+    if name == "experience":
+        return [{"event": "experience", "experience_years": value["experience_years"],
+                 "experience_level": value["experience_level"]}]
+    if name == "keywords":
+        return [{"event": "keywords", "keywords": value[:12]}]
+    if name == "search_body":
+        return [{"event": "search_body", "search_params": value}]
+    if name == "api":
+        data, dbg = value
+        return [{"event": "fetch", "ok": bool(data.get("ok")), "total": len(_api_hits(data)),
+                 "source": dbg.get("source"), "requests": dbg.get("requests_done")}]
+    if name == "filters":
+        hits_role, final_hits = value
+        return [{"event": "filters", "after_role_filter": len(hits_role),
+                 "after_experience_filter": len(final_hits)}]
+    if name == "rank":
+        hits = value[0]
+        return [{"event": "hits", "batch": i // HIT_BATCH_SIZE, "hits": hits[i:i + HIT_BATCH_SIZE]}
+                for i in range(0, len(hits), HIT_BATCH_SIZE)]
+    return []
+
+def ndjson_writer(stream=None) -> Callable[[dict], None]:
+    """emit(event) -> one compact JSON line on `stream` (stdout), flushed right away."""
+    stream = stream or sys.stdout
+    lock = threading.Lock()
+
+    def emit(ev: dict) -> None:
+        line = json.dumps(ev, ensure_ascii=False, separators=(",", ":"))
+        with lock:
+            stream.write(line + "\n")
+            stream.flush()
+    return emit
+
+# =========================
+# Batch mode (--batch <dir|manifest.jsonl>)
+# =========================
+CV_EXTENSIONS = (".pdf", ".docx", ".doc")
+BATCH_NLP_SIZE = 16
+
+def iter_batch_inputs(src: str) -> List[dict]:
+    """
+    A directory (every .pdf/.docx/.doc under it) or a JSONL manifest whose lines use the
+    same shape as the CLI argument: {"cvId": 1, "filepath": "assets/CVs/x.pdf"}.
+    Returns [{"path": abs_path_or_None, "cvId": ..., "error": ...}] in a stable order.
+    """
+    items = []
+    if os.path.isdir(src):
+        for dirpath, _, files in os.walk(src):
+            for fn in files:
+                if fn.lower().endswith(CV_EXTENSIONS):
+                    items.append({"path": os.path.abspath(os.path.join(dirpath, fn))})
+        return sorted(items, key=lambda it: it["path"])
+
+    with open(src, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            path, dbg = resolve_cv_path_from_arg(line)
+            item = {"path": path, "line": n}
+            if dbg.get("cvId") is not None:
+                item["cvId"] = dbg["cvId"]
+            if not path:
+                item["error"] = dbg.get("error", "invalid manifest line")
+            items.append(item)
+    return items
+
+def _batch_extract(path: str) -> dict:
+    """Process-pool task: CV feature cache lookup, else text extraction."""
+    cached, key, cache_info = lookup_cached_features(path)
+    rec = {"path": path, "text": "", "debug": {}, "cached": cached, "key": key, "cache_info": cache_info}
+    if cached is None:
+        rec["text"], rec["debug"] = extract_text_any(path)
+    return rec
+
+def run_batch(src: str, out_path: Optional[str] = None, checkpoint: Optional[str] = None,
+              workers: int = 0, call_api: bool = True, local_index: bool = False) -> dict:
+    """
+    Match many CVs with the models loaded once: text extraction runs in a process pool,
+    NER and KeyBERT run over groups of BATCH_NLP_SIZE CVs, and one JSON line per CV is
+    written as soon as its group finishes. Paths that matched successfully go to
+    `checkpoint`, so a re-run with the same checkpoint resumes where the last one
+    stopped and retries the CVs that failed (API errors, timeouts).
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    items = iter_batch_inputs(src)
+    done = set()
+    if checkpoint and os.path.exists(checkpoint):
+        with open(checkpoint, "r", encoding="utf-8") as f:
+            done = {ln.rstrip("\n") for ln in f if ln.strip()}
+
+    out = open(out_path, "a", encoding="utf-8") if out_path else sys.stdout
+    ckpt = open(checkpoint, "a", encoding="utf-8") if checkpoint else None
+    stats = {"total": len(items), "skipped_checkpoint": 0, "ok": 0, "errors": 0, "cache_hits": 0}
+    meta = {}
+
+    def emit(rec: dict) -> None:
+        out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        out.flush()
+        if ckpt and rec.get("ok") and rec.get("path"):
+            ckpt.write(rec["path"] + "\n")
+            ckpt.flush()
+        stats["ok" if rec.get("ok") else "errors"] += 1
+
+    def flush_group(group: List[dict], nlp, kb) -> None:
+        fresh = [g for g in group if g["cached"] is None]
+        places = spacy_gpe_locations_batch(nlp, [g["text"] for g in fresh]) if fresh else []
+        keywords = keybert_keywords_batch(kb, [g["text"] for g in fresh], top_n=25)
+        for g, pl, kw in zip(fresh, places, keywords):
+            g["places"], g["keywords"] = pl, kw
+        for g in group:
+            base = {"path": g["path"], **meta.get(g["path"], {})}
+            try:
+                if g["cached"] is not None:
+                    feats = g["cached"]
+                    stats["cache_hits"] += 1
+                else:
+                    feats = features_from_text(g["text"], g["debug"], nlp, kb,
+                                               spacy_places=g["places"], keywords=g["keywords"])
+                had_vector = cv_rank_vector(feats) is not None
+                try:
+                    result = jobs_for_features(feats, call_api=call_api, kb=kb, local_index=local_index)
+                finally:
+                    if g["cached"] is None or (not had_vector and cv_rank_vector(feats) is not None):
+                        store_cached_features(g["key"], feats, g["cache_info"])
+                result["_cache"] = {"cv_features": g["cache_info"]}
+                emit({**base, "ok": True, "result": result})
+            except Exception as e:
+                emit({**base, "ok": False, "error": f"{type(e).__name__}: {e}"})
+
+    t0 = time.perf_counter()
+    todo = []
+    for it in items:
+        if it.get("path") and it["path"] in done:
+            stats["skipped_checkpoint"] += 1
+        elif it.get("error"):
+            emit({"path": it.get("path"), "line": it.get("line"), "ok": False, "error": it["error"]})
+        else:
+            todo.append(it["path"])
+            meta[it["path"]] = {k: it[k] for k in ("cvId", "line") if k in it}
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers or None) as pool:
+            # submit before loading models so forked extraction workers stay small
+            futures = {pool.submit(_batch_extract, p): p for p in todo}
+            nlp, kb = (load_spacy(), load_keybert()) if futures else (None, None)
+            group = []
+            for fut in as_completed(futures):
+                path = futures[fut]
+                try:
+                    rec = fut.result()
+                except Exception as e:
+                    emit({"path": path, **meta.get(path, {}), "ok": False,
+                          "error": f"extract failed: {type(e).__name__}: {e}"})
+                    continue
+                if rec["cached"] is None and (not rec["text"] or len(rec["text"]) < 20):
+                    emit({"path": path, **meta.get(path, {}), "ok": False,
+                          "error": "Could not extract text from file (no content found).",
+                          "_debug_extract": rec["debug"]})
+                    continue
+                group.append(rec)
+                if len(group) >= BATCH_NLP_SIZE:
+                    flush_group(group, nlp, kb)
+                    group = []
+            if group:
+                flush_group(group, nlp, kb)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if ckpt:
+            ckpt.close()
+
+    elapsed = time.perf_counter() - t0
+    processed = stats["ok"] + stats["errors"]
+    stats["elapsed_s"] = round(elapsed, 2)
+    stats["cvs_per_sec"] = round(processed / elapsed, 3) if elapsed > 0 else None
+    return stats
+
+# =========================
+# Server mode (long-lived, prefork; see job_matching_server.py)
+# =========================
+def warm_models() -> None:
+    """Load spaCy + KeyBERT and open the gazetteer (called once before forking)."""
+    load_spacy()
+    load_keybert()
+    gazetteer()
+
+def handle_request(req: dict, local_index: bool = False,
+                   emit: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    Server request handler: {"cv": <path or JSON arg>, "local_index"?, "stream"?} -> same
+    dict the CLI prints. The server passes `emit` for stream requests (progress events).
+    """
+    if req.get("cv") is None:  # never fall back to the CLI's default CV_PATH for a request
+        return {"error": "CV file not found or input invalid", "_debug_input": {"error": "missing 'cv'"}}
+    resolved_path, dbg = resolve_cv_path_from_arg(req.get("cv"))
+    if not resolved_path:
+        return {"error": "CV file not found or input invalid", "_debug_input": dbg}
+    return cv_path_to_jobs(resolved_path, local_index=bool(req.get("local_index", local_index)), emit=emit)
+
+# =========================
+# Startup profile (--startup-profile)
+# =========================
+def startup_code_path(resolved_path: Optional[str], result: Optional[dict]) -> str:
+    if not resolved_path:
+        return "invalid_input"
+    if ((result or {}).get("_cache") or {}).get("cv_features", {}).get("hit"):
+        return "cached+rank" if "keybert" in _IMPORT_TIMES else "cached"
+    ext = os.path.splitext(resolved_path)[1].lower().lstrip(".")
+    if ext == "pdf" and "pytesseract" in _IMPORT_TIMES:
+        return "pdf+ocr"
+    return ext
+
+def startup_report(code_path: str) -> dict:
+    """
+    -X importtime style breakdown of what this run spent on imports: the eager
+    module-level imports plus every lazy import, most expensive first.
+    """
+    lazy = dict(sorted(_IMPORT_TIMES.items(), key=lambda kv: kv[1], reverse=True))
+    imports_ms = round(_MODULE_IMPORT_MS + sum(lazy.values()), 1)
+    budget = STARTUP_BUDGETS_MS.get(code_path)
+    return {
+        "code_path": code_path,
+        "module_import_ms": _MODULE_IMPORT_MS,
+        "lazy_imports_ms": lazy,
+        "imports_total_ms": imports_ms,
+        "wall_ms": round((time.perf_counter() - _T_MODULE_START) * 1000, 1),
+        "budget_ms": budget,
+        "over_budget": budget is not None and imports_ms > budget,
+    }
+
+def _print_startup_report(rep: dict) -> None:
+    out = sys.stderr
+    out.write(f"startup profile [{rep['code_path']}]\n")
+    out.write(f"  {rep['module_import_ms']:>9.1f} ms  <module-level imports>\n")
+    for name, ms in rep["lazy_imports_ms"].items():
+        out.write(f"  {ms:>9.1f} ms  {name}\n")
+    verdict = "OVER BUDGET" if rep["over_budget"] else "ok"
+    out.write(f"  {rep['imports_total_ms']:>9.1f} ms  total imports (budget {rep['budget_ms']} ms: {verdict})\n")
 
-    resolved_path, dbg = resolve_cv_path_from_arg(arg)
+# =========================
+# Run
+# =========================
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Match a CV against the job API.")
+    ap.add_argument("cv", nargs="?", default=None,
+                    help="CV path (abs or relative to project root) or JSON {\"cvId\", \"filepath\"}")
+    ap.add_argument("--serve", action="store_true",
+                    help="run as a long-lived JSON-lines server on stdin/stdout")
+    ap.add_argument("--workers", type=int, default=int(os.getenv("JOB_MATCHING_WORKERS", "0") or 0),
+                    help="server/batch worker processes (default: cpu_count - 1 / cpu_count)")
+    ap.add_argument("--timeout", type=float, default=float(os.getenv("JOB_MATCHING_TIMEOUT_S", "120")),
+                    help="server per-request timeout in seconds")
+    ap.add_argument("--max-jobs", type=int, default=int(os.getenv("JOB_MATCHING_MAX_JOBS", "200")),
+                    help="recycle a server worker after this many requests")
+    ap.add_argument("--max-rss-mb", type=float, default=float(os.getenv("JOB_MATCHING_MAX_RSS_MB", "1500")),
+                    help="recycle a server worker once its RSS exceeds this many MB")
+    ap.add_argument("--batch", metavar="DIR_OR_MANIFEST",
+                    help="match every CV in a directory or JSONL manifest, one JSON line per CV")
+    ap.add_argument("--out", help="batch: append results to this file instead of stdout")
+    ap.add_argument("--checkpoint", help="batch: file of successfully matched paths, used to resume (default: <out>.done)")
+    ap.add_argument("--skip-api", action="store_true", help="batch: run extraction/heuristics only")
+    ap.add_argument("--local-index", action="store_true", default=LOCAL_INDEX_DEFAULT,
+                    help="answer from the local job index, calling the API only if it is thin or stale")
+    ap.add_argument("--stream", action="store_true",
+                    help="write NDJSON progress events as stages finish, then a final summary event")
+    ap.add_argument("--metrics-file", default=perf.METRICS_FILE or None,
+                    help="append per-run metrics to this file in Prometheus text format")
+    ap.add_argument("--startup-profile", action="store_true",
+                    help="add a _startup import-time report (also to stderr); exit 3 if over budget")
+    args = ap.parse_args(argv)
+    if args.metrics_file:
+        perf.METRICS_FILE = args.metrics_file
+        os.environ["JOB_MATCHING_METRICS_FILE"] = args.metrics_file  # spawned server workers
+
+    if args.serve:
+        from job_matching_server import serve, DEFAULT_WORKERS
+        from functools import partial
+        serve(partial(handle_request, local_index=args.local_index), warmup=warm_models,
+              workers=args.workers or DEFAULT_WORKERS,
+              timeout_s=args.timeout,
+              max_jobs=args.max_jobs,
+              max_rss_mb=args.max_rss_mb)
+        return 0
+
+    if args.batch:
+        checkpoint = args.checkpoint or (f"{args.out}.done" if args.out else None)
+        stats = run_batch(args.batch, out_path=args.out, checkpoint=checkpoint,
+                          workers=args.workers, call_api=not args.skip_api,
+                          local_index=args.local_index)
+        sys.stderr.write(json.dumps({"batch": stats}) + "\n")
+        return 0 if stats["errors"] == 0 else 2
+
+    emit = ndjson_writer() if args.stream else None
+    resolved_path, dbg = resolve_cv_path_from_arg(args.cv)
     if not resolved_path:
-        print(json.dumps({
+        result = {
             "error": "CV file not found or input invalid",
             "_debug_input": dbg
-        }, indent=2))
-        sys.exit(1)
+        }
+        status = 1
+    else:
+        if emit:
+            emit({"event": "start", "cv": resolved_path})
+        result = cv_path_to_jobs(resolved_path, local_index=args.local_index, emit=emit)
+        status = 0
+
+    if args.startup_profile:
+        rep = startup_report(startup_code_path(resolved_path, result))
+        result["_startup"] = rep
+        _print_startup_report(rep)
+        if rep["over_budget"] and status == 0:
+            status = 3
+
+    if emit:
+        emit({"event": "summary", "ok": "error" not in result, "result": result})
+    else:
+        print(json.dumps(result, indent=2))
+    return status
 
-    result = cv_path_to_jobs(resolved_path)
-    print(json.dumps(result, indent=2))
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark: shared ChoiceMatcher (one rapidfuzz cdist/extractOne call) vs
+the old per-pair Python loops for the role filter, role canonicalisation and
+title detection. (City -> country lookup moved to the gazetteer, see
+bench/bench_gazetteer.py.)
+
+    python bench/bench_fuzzy_match.py [--sizes 50,1000,10000] [--repeat 5]
+
+The old loops are reproduced below; both sides must return the same result.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+from rapidfuzz import fuzz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Job_Matching as jm  # noqa: E402
+
+TITLE_WORDS = ["Senior", "Junior", "Lead", "Staff", "Principal", "Remote", "Contract", "II", "III"]
+ROLES = ["Software Engineer", "Backend Developer", "Data Analyst", "Product Manager",
+         "Registered Nurse", "Sales Associate", "DevOps Engineer", "Accountant",
+         "Warehouse Operative", "Frontend Developer", "Machine Learning Engineer"]
+
+
+def legacy_filter_hits_by_role(hits, role_terms, cutoff=jm.TITLE_FILTER_CUTOFF):
+    keep = []
+    for h in hits:
+        title = (h.get("title") or h.get("job_title") or "").lower()
+        best = 0
+        for term in role_terms:
+            s = fuzz.partial_ratio(title, term.lower())
+            if s > best:
+                best = s
+        if best >= cutoff:
+            keep.append(h)
+    return keep
+
+
+def legacy_canonicalize_role(raw_title):
+    cand = raw_title.lower()
+    best_label, best_score = "", 0
+    for label, syns in jm.ROLE_SYNONYMS.items():
+        for s in syns + [label]:
+            score = fuzz.partial_ratio(cand, s)
+            if score > best_score:
+                best_label, best_score = label, score
+    return best_label if best_score >= 80 else jm.normalize_title(raw_title)
+
+
+def synthetic_hits(n, seed):
+    rnd = random.Random(seed)
+    return [{"id": i, "title": f"{rnd.choice(TITLE_WORDS)} {rnd.choice(ROLES)} {rnd.choice(TITLE_WORDS)}"}
+            for i in range(n)]
+
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    return (time.perf_counter() - t0) / repeat * 1000, out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="50,1000,10000")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    role_terms = jm.role_synonyms_for("Software Engineer")
+    jm.filter_hits_by_role(synthetic_hits(10, 0), role_terms)  # warm-up: numpy import, matcher build
+    print(f"role filter ({len(role_terms)} terms)")
+    for n in [int(x) for x in args.sizes.split(",")]:
+        hits = synthetic_hits(n, n)
+        legacy_ms, a = timed(lambda: legacy_filter_hits_by_role(hits, role_terms), args.repeat)
+        new_ms, b = timed(lambda: jm.filter_hits_by_role(hits, role_terms), args.repeat)
+        assert [h["id"] for h in a] == [h["id"] for h in b]
+        print(f"  {n:>6} hits: legacy {legacy_ms:9.2f} ms   matcher {new_ms:8.2f} ms   "
+              f"{legacy_ms / new_ms:6.1f}x   kept {len(b)}")
+
+    titles = [h["title"] for h in synthetic_hits(200, 7)]
+    legacy_ms, a = timed(lambda: [legacy_canonicalize_role(t) for t in titles], args.repeat)
+    new_ms, b = timed(lambda: [jm.canonicalize_role(t) for t in titles], args.repeat)
+    assert a == b
+    print(f"canonicalize_role x{len(titles)}: legacy {legacy_ms:8.2f} ms   matcher {new_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Offline gazetteer vs the old GeoText + CITY_TO_COUNTRY location lookup.
+
+    python bench/bench_gazetteer.py [--repeat 200] [--cities 300]
+
+Reports:
+- cold start in a fresh process: `import geotext` (which parses its city list
+  into Python objects) against opening the compiled, mmapped index
+- place detection per CV-like text: GeoText(text) against Gazetteer.find_places,
+  hits on an embedded city name and false positives on place-free CV text
+  (capitalized skills, products, headings and names, some of them also city names)
+- disambiguation: which country find_places picks for shared names with context
+- city -> country: the old dict + extractOne scan against Gazetteer.resolve,
+  exact and with one typo, and how many cities each resolves correctly
+
+The test cities are drawn from the seed (population >= 100k); the old dict and
+its lookup are reproduced below.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import subprocess
+
+from rapidfuzz import fuzz, process
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+import gazetteer  # noqa: E402
+from disk_cache import DEFAULT_CACHE_ROOT  # noqa: E402
+
+LEGACY_CITY_TO_COUNTRY = {
+    "colombo": "Sri Lanka", "galle": "Sri Lanka", "kandy": "Sri Lanka", "jaffna": "Sri Lanka",
+    "negombo": "Sri Lanka", "matara": "Sri Lanka", "kurunegala": "Sri Lanka", "gampaha": "Sri Lanka",
+    "london": "United Kingdom", "manchester": "United Kingdom", "birmingham": "United Kingdom",
+    "new york": "United States", "los angeles": "United States", "san francisco": "United States",
+    "seattle": "United States", "dubai": "United Arab Emirates", "abu dhabi": "United Arab Emirates",
+    "toronto": "Canada", "vancouver": "Canada", "sydney": "Australia", "melbourne": "Australia",
+    "singapore": "Singapore", "berlin": "Germany", "munich": "Germany", "paris": "France",
+    "mumbai": "India", "bangalore": "India", "bengaluru": "India", "delhi": "India",
+}
+INDEX = os.path.join(DEFAULT_CACHE_ROOT, "gazetteer.idx")
+FILLER = ("Led a cross functional team delivering payment features with Python and AWS. "
+          "Improved deployment frequency by automating CI pipelines. Mentored junior engineers. ").split()
+# capitalized CV vocabulary with no place in it (several are also GeoNames city names)
+CV_TERMS = """Python Java Spring Boot React Angular Mobile Web Cloud AWS Aurora Lambda Kafka Tableau Excel
+Jira Confluence Agile Scrum Orange Apple Amazon Microsoft Oracle University College Summary Profile Experience
+Education Skills Projects Senior Engineer Developer Manager Cypress Jest Unity Delta Vista Summit Phoenix
+March Present Liberty Union Central Federal Independence Meta Crystal Pearl Sterling Jupiter Orion Vite""".split()
+PERSON_NAMES = ["Jane Doe", "Kasun Perera", "Madison Clark", "Tom Jackson", "Priya Nair", "Ali Lincoln"]
+CONTEXT_CASES = [  # (text, surface, expected country)
+    ("Santa Clara office, California", "Santa Clara", "United States"),
+    ("Software engineer at our Santa Clara office. Previously across California", "Santa Clara", "United States"),
+    ("Atlanta, Georgia", "Georgia", "United States"),
+    ("Tbilisi, Georgia", "Georgia", "Georgia"),
+    ("Mobile, Alabama", "Mobile", "United States"),
+    ("Location: Aurora", "Aurora", "United States"),
+    ("Based in Victoria, Australia", "Victoria", "Australia"),
+    ("Hamilton, New Zealand", "Hamilton", "New Zealand"),
+    ("Perth, Scotland", "Perth", "United Kingdom"),
+]
+
+
+def legacy_city(city):
+    key = city.strip().lower()
+    if key in LEGACY_CITY_TO_COUNTRY:
+        return LEGACY_CITY_TO_COUNTRY[key]
+    best = process.extractOne(key, list(LEGACY_CITY_TO_COUNTRY), scorer=fuzz.token_set_ratio, score_cutoff=90)
+    return LEGACY_CITY_TO_COUNTRY[best[0]] if best else None
+
+
+def cold_ms(code):
+    """Median wall time of `code` in a fresh interpreter (import + work), over 3 runs."""
+    runs = []
+    for _ in range(3):
+        out = subprocess.run([sys.executable, "-c", f"import time; t=time.perf_counter(); {code}; "
+                              "print((time.perf_counter()-t)*1000)"],
+                             cwd=ROOT, capture_output=True, text=True, check=True)
+        runs.append(float(out.stdout.split()[-1]))
+    return sorted(runs)[1]
+
+
+def typo(rnd, s):
+    i = rnd.randrange(1, len(s) - 1)
+    return s[:i] + s[i + 1:]
+
+
+def timed(fn, items, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        out = [fn(x) for x in items]
+    return (time.perf_counter() - t0) / (repeat * len(items)) * 1000, out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--cities", type=int, default=300)
+    args = ap.parse_args()
+    rnd = random.Random(0)
+
+    gaz = gazetteer.open_gazetteer(INDEX)  # compile once if needed
+    cities = [(name, country) for name, country, kind, pop, _ in gazetteer.read_seed()
+              if kind == "city" and pop >= 100_000 and " " not in name and len(name) >= 6]
+    cities = rnd.sample(cities, min(args.cities, len(cities)))
+
+    geotext_cold = cold_ms("import geotext; geotext.GeoText('Colombo')")
+    gaz_cold = cold_ms(f"import gazetteer; g = gazetteer.open_gazetteer({INDEX!r}); g.find_places('Colombo')")
+    print(f"cold start:  geotext {geotext_cold:8.1f} ms   gazetteer {gaz_cold:8.1f} ms")
+
+    import geotext
+    texts = []
+    for name, _ in cities[:50]:
+        words = [rnd.choice(FILLER) for _ in range(150)]
+        words.insert(rnd.randrange(len(words)), f"{name},")
+        texts.append(" ".join(words))
+    geo_ms, geo = timed(lambda t: geotext.GeoText(t).cities, texts, args.repeat)
+    gaz_ms, found = timed(gaz.find_places, texts, args.repeat)
+    geo_hits = sum(name in g for (name, _), g in zip(cities, geo))
+    gaz_hits = sum(any(s == name for s, _ in f) for (name, _), f in zip(cities, found))
+    print(f"detect/text: geotext {geo_ms:8.3f} ms   gazetteer {gaz_ms:8.3f} ms   "
+          f"found {geo_hits}/{len(texts)} vs {gaz_hits}/{len(texts)}")
+
+    clean = []
+    for _ in range(50):
+        words = [rnd.choice(FILLER + CV_TERMS) for _ in range(150)]
+        clean.append(rnd.choice(PERSON_NAMES) + "\n" + " ".join(words))
+    geo_fp = [c for t in clean for c in geotext.GeoText(t).cities]
+    gaz_fp = [s for t in clean for s, _ in gaz.find_places(t)]
+    print(f"false positives on {len(clean)} place-free texts: geotext {len(geo_fp)} "
+          f"({len(set(geo_fp))} distinct)   gazetteer {len(gaz_fp)} ({len(set(gaz_fp))} distinct: "
+          f"{', '.join(sorted(set(gaz_fp))[:8])})")
+
+    context_ok = 0
+    for text, surface, country in CONTEXT_CASES:
+        got = dict(gaz.find_places(text)).get(surface)
+        context_ok += got is not None and got.country == country
+        if got is None or got.country != country:
+            print(f"  context miss: {text!r}: {surface} -> {got and got.country}, expected {country}")
+    print(f"context disambiguation: {context_ok}/{len(CONTEXT_CASES)}")
+
+    for label, queries in (("exact", [n for n, _ in cities]), ("1 typo", [typo(rnd, n) for n, _ in cities])):
+        old_ms, old = timed(legacy_city, queries, max(1, args.repeat // 10))
+        new_ms, new = timed(lambda q: gaz.resolve(q), queries, max(1, args.repeat // 10))
+        old_ok = sum(o == c for o, (_, c) in zip(old, cities))
+        new_ok = sum(p is not None and p.country == c for p, (_, c) in zip(new, cities))
+        print(f"resolve {label:6s}: dict+extractOne {old_ms:6.3f} ms  {old_ok:4d}/{len(cities)}   "
+              f"gazetteer {new_ms:6.3f} ms  {new_ok:4d}/{len(cities)}")
+    legacy_ok = sum(gaz.resolve(k).country == v for k, v in LEGACY_CITY_TO_COUNTRY.items())
+    print(f"old dict entries resolved the same: {legacy_ok}/{len(LEGACY_CITY_TO_COUNTRY)}")
+    ok = legacy_ok == len(LEGACY_CITY_TO_COUNTRY) and context_ok == len(CONTEXT_CASES)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
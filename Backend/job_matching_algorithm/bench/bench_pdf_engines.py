@@ -0,0 +1,82 @@
+"""
+PDF text-layer engines side by side: PyMuPDF vs pdfplumber per file, and the
+engine registry (classify_pdf_pages: PyMuPDF first, pdfplumber only for garbage
+pages) that the pipeline uses.
+
+    python bench/bench_pdf_engines.py [--dir ../assets/CVs] [--repeat 5]
+
+Text agreement is the rapidfuzz ratio of each engine's cleaned text against
+pdfplumber's (the previous engine). Scanned pages have no text layer with either
+engine and go to OCR, which is not timed here.
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+import statistics
+
+from rapidfuzz import fuzz
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+import Job_Matching as jm  # noqa: E402
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(HERE)), "assets", "CVs")
+
+
+def timed(fn, path, repeat):
+    out, times = None, []
+    for _ in range(repeat + 1):  # first call warms imports/caches and is dropped
+        t0 = time.perf_counter()
+        out = fn(path)
+        times.append((time.perf_counter() - t0) * 1000)
+    return out, statistics.median(times[1:])
+
+
+def engine_text(pages):
+    return jm.clean_whitespace("\n".join(
+        p["text"] for p in pages if not jm._needs_ocr(p["layer_chars"], p["image_coverage"])))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dir", default=DEFAULT_DIR)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.dir, "*.pdf")))
+    if not files:
+        print(f"no PDFs in {args.dir}")
+        return 1
+    engines = dict(jm.pdf_engines())
+    print(f"engines available: {', '.join(engines)}")
+    print(f"{'file':40s} {'pages':>5s} {'text':>4s}" + "".join(f" {n + ' ms':>14s}" for n in engines)
+          + f" {'registry ms':>12s} {'agree':>6s}")
+
+    totals = {n: 0.0 for n in engines}
+    totals["registry"] = 0.0
+    for path in files:
+        texts, row = {}, []
+        for name, fn in engines.items():
+            pages, ms = timed(fn, path, args.repeat)
+            texts[name] = engine_text(pages)
+            totals[name] += ms
+            row.append(ms)
+        pages, reg_ms = timed(jm.classify_pdf_pages, path, args.repeat)
+        totals["registry"] += reg_ms
+        n_text = sum(1 for p in pages if not p["needs_ocr"])
+        reg_text = jm.clean_whitespace("\n".join(p["text"] for p in pages))
+        ref = texts.get("pdfplumber", "")
+        agree = f"{fuzz.ratio(reg_text, ref):5.1f}" if (reg_text or ref) else "    -"
+        print(f"{os.path.basename(path)[:40]:40s} {len(pages):5d} {n_text:4d}"
+              + "".join(f" {ms:14.1f}" for ms in row) + f" {reg_ms:12.1f} {agree:>6s}")
+
+    print("total ms: " + ", ".join(f"{n} {ms:.0f}" for n, ms in totals.items()))
+    if "pdfplumber" in totals and totals["registry"] > 0:
+        print(f"registry vs pdfplumber: {totals['pdfplumber'] / totals['registry']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
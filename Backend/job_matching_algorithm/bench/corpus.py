@@ -0,0 +1,174 @@
+"""
+Deterministic synthetic CV corpus for the benchmark suite.
+
+    python bench/corpus.py [--out bench/.corpus] [--seed 7]
+
+Generates text PDFs of several page counts (PyMuPDF), image-only "scanned" PDFs
+(the text pages rendered to images, no text layer) and DOCX files (python-docx),
+spread over several countries, roles and experience levels. A manifest.json
+next to the files records what each CV should be detected as.
+
+Same seed -> same content; PDFs are byte-identical, DOCX files differ only in
+their zip timestamps.
+"""
+import os
+import json
+import random
+import datetime
+import argparse
+from typing import List
+
+DEFAULT_OUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".corpus")
+DEFAULT_SEED = 7
+
+# (country, a city in it that Job_Matching knows)
+LOCATIONS = [
+    ("Sri Lanka", "Colombo"),
+    ("United Kingdom", "London"),
+    ("United States", "Seattle"),
+    ("Canada", "Toronto"),
+    ("Australia", "Sydney"),
+    ("Germany", "Berlin"),
+    ("Singapore", "Singapore"),
+]
+ROLES = [
+    "Software Engineer", "Data Scientist", "Product Manager", "DevOps Engineer",
+    "Frontend Developer", "Data Analyst", "Accountant", "Marketing Manager",
+]
+SKILLS = [
+    "Python", "Java", "SQL", "AWS", "Docker", "Kubernetes", "React", "TypeScript", "Excel",
+    "Tableau", "Agile", "Scrum", "Terraform", "Node.js", "Machine Learning", "Power BI",
+]
+FILLER = (
+    "Delivered features end to end with a focus on reliability and measurable impact. "
+    "Worked closely with stakeholders to refine requirements and prioritise the roadmap. "
+    "Reduced operating costs by automating manual processes and improving monitoring. "
+    "Mentored colleagues, reviewed designs and ran knowledge sharing sessions. "
+    "Owned incident response and wrote post-mortems that led to lasting fixes. "
+).split(". ")
+
+# (kind, pages) per generated CV; page count only applies to PDFs
+DEFAULT_SPEC = [
+    ("pdf_text", 1), ("pdf_text", 2), ("pdf_text", 5), ("pdf_text", 10), ("pdf_text", 20),
+    ("pdf_scanned", 1), ("pdf_scanned", 2),
+    ("docx", 1), ("docx", 1), ("docx", 1),
+]
+
+
+def _pymupdf():
+    try:
+        import pymupdf
+    except ImportError:  # PyMuPDF < 1.24
+        import fitz as pymupdf
+    return pymupdf
+
+
+def cv_sections(rnd: random.Random, name: str, role: str, country: str, city: str,
+                years: int, pages: int) -> List[List[str]]:
+    """Lines of text per page. Header (name, role, location) first, like a real CV."""
+    first = [
+        name,
+        role,
+        f"{city}, {country} | {name.lower().replace(' ', '.')}@example.com | +00 000 0000",
+        "",
+        "SUMMARY",
+        f"{role} with {years} years of experience building and running production systems.",
+        "",
+        "SKILLS",
+        ", ".join(rnd.sample(SKILLS, 6)),
+        "",
+        "EXPERIENCE",
+    ]
+    out = [first]
+    for p in range(pages):
+        lines = [] if p else first[:]
+        if p:
+            lines.append(f"EXPERIENCE (continued, page {p + 1})")
+        for job in range(3):
+            start = 2024 - years + job
+            lines.append(f"{role} - Company {rnd.randint(1, 999)} ({start} - {start + 1})")
+            for _ in range(4):
+                lines.append("- " + rnd.choice(FILLER).strip() + ".")
+            lines.append("")
+        if p:
+            out.append(lines)
+        else:
+            out[0] = lines
+    out[-1] += ["EDUCATION", f"BSc in Computer Science, University of {city}"]
+    return out
+
+
+def write_text_pdf(path: str, pages: List[List[str]]) -> None:
+    pymupdf = _pymupdf()
+    doc = pymupdf.open()
+    for lines in pages:
+        page = doc.new_page(width=595, height=842)  # A4
+        page.insert_textbox(pymupdf.Rect(50, 50, 545, 800), "\n".join(lines), fontsize=10, fontname="helv")
+    doc.set_metadata({})
+    doc.save(path, garbage=3, deflate=True, no_new_id=True)
+    doc.close()
+
+
+def write_scanned_pdf(path: str, pages: List[List[str]], dpi: int = 150) -> None:
+    """Render each text page to an image and keep only the images (no text layer)."""
+    pymupdf = _pymupdf()
+    src = pymupdf.open()
+    for lines in pages:
+        page = src.new_page(width=595, height=842)
+        page.insert_textbox(pymupdf.Rect(50, 50, 545, 800), "\n".join(lines), fontsize=10, fontname="helv")
+    out = pymupdf.open()
+    for page in src:
+        pix = page.get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY)
+        new = out.new_page(width=page.rect.width, height=page.rect.height)
+        new.insert_image(new.rect, pixmap=pix)
+    out.set_metadata({})
+    out.save(path, garbage=3, deflate=True, no_new_id=True)
+    out.close()
+    src.close()
+
+
+def write_docx(path: str, pages: List[List[str]]) -> None:
+    import docx
+    d = docx.Document()
+    for lines in pages:
+        for ln in lines:
+            if ln.isupper():
+                d.add_heading(ln.title(), level=2)
+            elif ln:
+                d.add_paragraph(ln)
+    d.core_properties.created = d.core_properties.modified = datetime.datetime(2024, 1, 1)
+    d.save(path)
+
+
+def build_corpus(out_dir: str = DEFAULT_OUT, seed: int = DEFAULT_SEED, spec=None) -> List[dict]:
+    """Write the corpus and manifest.json; returns the manifest entries."""
+    rnd = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = []
+    for i, (kind, pages) in enumerate(spec or DEFAULT_SPEC):
+        country, city = LOCATIONS[i % len(LOCATIONS)]
+        role = ROLES[i % len(ROLES)]
+        years = rnd.randint(1, 15)
+        name = f"Candidate {i:02d}"
+        sections = cv_sections(rnd, name, role, country, city, years, pages)
+        ext = "docx" if kind == "docx" else "pdf"
+        path = os.path.join(out_dir, f"{i:02d}_{kind}_p{pages}.{ext}")
+        {"pdf_text": write_text_pdf, "pdf_scanned": write_scanned_pdf, "docx": write_docx}[kind](path, sections)
+        manifest.append({"path": path, "kind": kind, "pages": pages, "country": country,
+                         "city": city, "role": role, "years": years})
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"seed": seed, "cvs": manifest}, f, indent=2)
+    return manifest
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", default=DEFAULT_OUT)
+    ap.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = ap.parse_args()
+    for m in build_corpus(args.out, args.seed):
+        print(f"{m['kind']:12s} p{m['pages']:<3d} {m['country']:15s} {m['role']:20s} {m['path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Benchmark suite: per-stage and end-to-end timings over the synthetic CV corpus.
+
+    python bench/run_bench.py [--repeat 3] [--save bench/baselines/local.json]
+    python bench/run_bench.py --compare bench/baselines/local.json [--threshold 0.2]
+
+Stages: extract_text_any (per CV kind and page count), extract_country_city,
+extract_job_title, extract_experience_years, keybert_keywords, the role and
+experience filters, and cv_path_to_jobs end to end with the job API served by
+bench/stub_job_api.py. The corpus (bench/corpus.py) is generated if missing.
+
+The CV, API-response and job-feature caches, the local job index and the
+ranking LRU are disabled or cleared, so every repeat does the full work. Stages
+that need something this machine lacks (spaCy model, KeyBERT, poppler/tesseract)
+are listed as skipped rather than failing the run.
+
+--compare exits 1 if any stage's median is more than --threshold slower than the
+baseline and by more than --min-delta-ms (so noise on sub-millisecond stages
+does not count).
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+from typing import Callable, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import corpus  # noqa: E402
+import stub_job_api  # noqa: E402
+
+
+class Timings:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.skipped: Dict[str, str] = {}
+
+    def time(self, key: str, fn: Callable, *args, **kwargs):
+        t0 = time.perf_counter()
+        out = fn(*args, **kwargs)
+        self.samples.setdefault(key, []).append((time.perf_counter() - t0) * 1000)
+        return out
+
+    def skip(self, key: str, reason: str) -> None:
+        self.skipped.setdefault(key, reason)
+
+    def results(self) -> Dict[str, dict]:
+        out = {}
+        for key, vals in sorted(self.samples.items()):
+            vals = sorted(vals)
+            n = len(vals)
+            out[key] = {
+                "n": n,
+                "median_ms": round(vals[n // 2] if n % 2 else (vals[n // 2 - 1] + vals[n // 2]) / 2, 3),
+                "p90_ms": round(vals[min(n - 1, int(n * 0.9))], 3),
+                "min_ms": round(vals[0], 3),
+            }
+        return out
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _ocr_available(jm) -> Optional[str]:
+    """None if OCR can run here, else the reason it can't."""
+    if not (jm.POPPLER_PATH or shutil.which("pdftoppm")):
+        return "poppler (pdftoppm) not found"
+    if not (jm.PYTESSERACT_PATH or shutil.which("tesseract")):
+        return "tesseract not found"
+    return None
+
+
+def _load(t: Timings, key: str, fn: Callable):
+    try:
+        return t.time(key, fn)
+    except Exception as e:
+        t.skip(key, f"{type(e).__name__}: {e}")
+        return None
+
+
+def run_suite(manifest: List[dict], repeat: int, api_delay_ms: float) -> dict:
+    server, url = stub_job_api.start(delay_ms=api_delay_ms)
+    tmp = tempfile.mkdtemp(prefix="jm-bench-")
+    os.environ.update({
+        "JOB_API_URL": url,
+        "JOB_MATCHING_CACHE_DIR": tmp,
+        "CV_CACHE_ENABLED": "0",
+        "JOB_API_CACHE_ENABLED": "0",
+        "JOB_INDEX_ENABLED": "0",
+        "JOB_FEATURE_STORE_ENABLED": "0",
+    })
+    import Job_Matching as jm  # after the env is set: it reads config at import
+
+    def cold_job_caches() -> None:
+        jm._JOB_FEATURES._items.clear()
+        jm._JOB_EMBEDDINGS._items.clear()
+
+    t = Timings()
+    ocr_missing = _ocr_available(jm)
+    nlp = _load(t, "load_spacy", jm.load_spacy)
+    kb = _load(t, "load_keybert", jm.load_keybert)
+
+    accuracy = {"country": [0, 0], "role": [0, 0], "years": [0, 0]}  # [correct, checked]
+    try:
+        # pass 0 is a warm-up (lazy imports, regex/matcher compilation) and is not kept
+        for rep in range(repeat + 1):
+            warm = Timings() if rep == 0 else t
+            for cv in manifest:
+                tag = f"{cv['kind']}_p{cv['pages']}"
+                if cv["kind"] == "pdf_scanned" and ocr_missing:
+                    t.skip(f"extract_text_any[{tag}]", ocr_missing)
+                    continue
+                text, _ = warm.time(f"extract_text_any[{tag}]", jm.extract_text_any, cv["path"])
+                if not text:
+                    continue
+
+                role_raw = warm.time("extract_job_title", jm.extract_job_title, text)
+                years, _ = warm.time("extract_experience_years", jm.extract_experience_years, text)
+                country = None
+                if nlp is not None:
+                    country, _, _ = warm.time("extract_country_city", jm.extract_country_city, text, nlp)
+                else:
+                    t.skip("extract_country_city", "spaCy model not available")
+                if kb is not None:
+                    warm.time("keybert_keywords", jm.keybert_keywords, kb, text, top_n=25)
+                else:
+                    t.skip("keybert_keywords", "KeyBERT not available")
+
+                if rep == 1:
+                    checks = {"role": cv["role"].lower() in (role_raw or "").lower(),
+                              "years": abs((years or 0) - cv["years"]) <= 1}
+                    if nlp is not None:
+                        checks["country"] = country == cv["country"]
+                    for k, ok in checks.items():
+                        accuracy[k][0] += int(ok)
+                        accuracy[k][1] += 1
+
+                role_terms = jm.role_synonyms_for(jm.canonicalize_role(cv["role"]))
+                hits = (stub_job_api.stub_hits({"q": cv["role"], "from": 0, "size": 50})
+                        + stub_job_api.stub_hits({"q": cv["role"], "from": 50, "size": 50}))
+                cold_job_caches()
+                kept = warm.time("filter_hits_by_role[100]", jm.filter_hits_by_role, hits, role_terms)
+                warm.time("filter_hits_by_experience[100]", jm.filter_hits_by_experience, kept, float(cv["years"]))
+
+                if nlp is not None and kb is not None:
+                    cold_job_caches()
+                    warm.time(f"end_to_end[{tag}]", jm.cv_path_to_jobs, cv["path"])
+                else:
+                    t.skip(f"end_to_end[{tag}]", "spaCy model / KeyBERT not available")
+    finally:
+        server.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+            "api_delay_ms": api_delay_ms,
+            "corpus": len(manifest),
+        },
+        "results": t.results(),
+        "skipped": t.skipped,
+        "accuracy": accuracy,
+    }
+
+
+def compare(base: dict, cur: dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """Print a comparison table; returns the stages that regressed."""
+    regressions = []
+    b, c = base["results"], cur["results"]
+    print(f"{'stage':42s} {'base ms':>10s} {'now ms':>10s} {'change':>8s}")
+    for key in sorted(set(b) | set(c)):
+        if key not in c:
+            print(f"{key:42s} {b[key]['median_ms']:10.2f} {'-':>10s}   (not run now)")
+            continue
+        if key not in b:
+            print(f"{key:42s} {'-':>10s} {c[key]['median_ms']:10.2f}   (new)")
+            continue
+        old, new = b[key]["median_ms"], c[key]["median_ms"]
+        change = (new - old) / old if old > 0 else 0.0
+        bad = new > old * (1 + threshold) and new - old > min_delta_ms
+        if bad:
+            regressions.append(key)
+        print(f"{key:42s} {old:10.2f} {new:10.2f} {change:+7.0%}{'  REGRESSION' if bad else ''}")
+    return regressions
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--corpus", default=corpus.DEFAULT_OUT, help="corpus dir (generated if missing)")
+    ap.add_argument("--seed", type=int, default=corpus.DEFAULT_SEED)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--api-delay-ms", type=float, default=50)
+    ap.add_argument("--save", help="write results as a JSON baseline")
+    ap.add_argument("--compare", help="baseline JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    ap.add_argument("--min-delta-ms", type=float, default=1.0)
+    args = ap.parse_args()
+
+    manifest_path = os.path.join(args.corpus, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)["cvs"]
+    else:
+        manifest = corpus.build_corpus(args.corpus, args.seed)
+
+    res = run_suite(manifest, args.repeat, args.api_delay_ms)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
+
+    for key, reason in sorted(res["skipped"].items()):
+        print(f"skipped {key}: {reason}")
+    acc = ", ".join(f"{k} {ok}/{n}" for k, (ok, n) in res["accuracy"].items() if n)
+    if acc:
+        print(f"accuracy: {acc}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        regressions = compare(base, res, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"{len(regressions)} stage(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        return 0
+
+    print(f"{'stage':42s} {'median ms':>10s} {'p90 ms':>10s} {'n':>4s}")
+    for key, r in res["results"].items():
+        print(f"{key:42s} {r['median_ms']:10.2f} {r['p90_ms']:10.2f} {r['n']:4d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
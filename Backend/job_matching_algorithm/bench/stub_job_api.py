@@ -0,0 +1,88 @@
+"""
+Local stand-in for the job search API, for benchmarks.
+
+    python bench/stub_job_api.py [--port 8765] [--delay-ms 50]
+
+POST a search body ({"q", "country", "from", "size"}) and get back
+{"ok": true, "hits": [...]}: deterministic postings for that query and offset,
+a mix of matching and unrelated titles with "N years of experience" in the
+description. `delay_ms` simulates network + server latency.
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+OTHER_TITLES = ["Chef", "Warehouse Operative", "Sales Associate", "Registered Nurse", "Barista"]
+TOTAL_PER_QUERY = 120  # postings per query before pages run dry
+
+
+def stub_hits(body: dict) -> list:
+    q = body.get("q") or "General"
+    offset = int(body.get("from") or 0)
+    size = int(body.get("size") or 50)
+    rnd = random.Random(f"{q}|{body.get('country')}|{offset}")
+    hits = []
+    for i in range(offset, min(offset + size, TOTAL_PER_QUERY)):
+        title = q if i % 3 else rnd.choice(OTHER_TITLES)
+        if i % 5 == 0:
+            title = f"Senior {title}"
+        years = rnd.randint(0, 12)
+        hits.append({
+            "id": f"{q.lower().replace(' ', '-')}-{i}",
+            "title": title,
+            "hiringOrganizationName": f"Company {rnd.randint(1, 500)}",
+            "country": body.get("country") or "",
+            "description": (f"We are hiring a {title}. {years}+ years of experience required. "
+                            + "You will work with a friendly team on interesting problems. " * 20),
+        })
+    return hits
+
+
+class _Handler(BaseHTTPRequestHandler):
+    delay_s = 0.05
+
+    def do_POST(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(n) or b"{}")
+        except ValueError:
+            body = {}
+        time.sleep(self.delay_s)
+        payload = json.dumps({"ok": True, "hits": stub_hits(body)}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start(port: int = 0, delay_ms: float = 50) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve in a daemon thread; returns (server, url). port=0 picks a free port."""
+    handler = type("Handler", (_Handler,), {"delay_s": delay_ms / 1000})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/search"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--delay-ms", type=float, default=50)
+    args = ap.parse_args()
+    server, url = start(args.port, args.delay_ms)
+    print(f"stub job API on {url} (JOB_API_URL={url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Small on-disk JSON cache shared by the Job_Matching processes.
+
+- one file per key under <root>/<key[:2]>/<key>.json
+- writes are atomic (temp file + os.replace), so readers never see half a file
+- LRU by mtime: a hit touches the file, eviction removes the oldest files
+  until the directory is back under `max_bytes`
+- puts keep a running size total, so the directory is only walked when that
+  total passes `max_bytes` or EVICT_INTERVAL_S has gone by (other processes'
+  writes are not in this process's total)
+- eviction (and anything else that needs it) runs under an exclusive file lock,
+  so several worker processes can share one cache directory
+"""
+import os
+import json
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+DEFAULT_CACHE_ROOT = os.getenv(
+    "JOB_MATCHING_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"),
+)
+EVICT_INTERVAL_S = 60.0
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """Exclusive inter-process lock on `path` (created if missing)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fh = open(path, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        yield
+    finally:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            fh.close()
+
+
+class DiskCache:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._size_lock = threading.Lock()
+        self._approx_bytes: Optional[int] = None  # size at the last walk + this process's puts since
+        self._last_walk = 0.0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        try:
+            os.utime(path, None)  # mark as recently used
+        except OSError:
+            pass
+        return value
+
+    def put(self, key: str, value: dict) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+                f.flush()
+                size = os.fstat(f.fileno()).st_size
+            os.replace(tmp, path)
+        except Exception:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        if self._evict_due(size - old_size):
+            self.evict()
+
+    def _evict_due(self, delta: int) -> bool:
+        if self.max_bytes <= 0:
+            return False
+        with self._size_lock:
+            now = time.monotonic()
+            if self._approx_bytes is not None:
+                self._approx_bytes += delta
+                if self._approx_bytes <= self.max_bytes and now - self._last_walk < EVICT_INTERVAL_S:
+                    return False
+            self._last_walk = now  # claimed: concurrent puts don't all walk
+            return True
+
+    @contextmanager
+    def lock(self, name: str = "cache") -> Iterator[None]:
+        with file_lock(os.path.join(self.root, f".{name}.lock")):
+            yield
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        out = []
+        for dirpath, _, files in os.walk(self.root):
+            for fn in files:
+                if not fn.endswith(".json"):
+                    continue
+                p = os.path.join(dirpath, fn)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                out.append((st.st_mtime, st.st_size, p))
+        return out
+
+    def evict(self) -> int:
+        """Drop least-recently-used entries until under max_bytes. Returns files removed."""
+        if self.max_bytes <= 0:
+            return 0
+        with self.lock():
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                self._set_walked(total)
+                return 0
+            target = int(self.max_bytes * 0.9)  # some headroom so we don't evict on every put
+            removed = 0
+            for _, size, p in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(p)
+                    total -= size
+                    removed += 1
+                except OSError:
+                    pass
+            self._set_walked(total)
+            return removed
+
+    def _set_walked(self, total: int) -> None:
+        with self._size_lock:
+            self._approx_bytes = total
+            self._last_walk = time.monotonic()
@@ -0,0 +1,56 @@
+"""
+Shared rapidfuzz matchers for role / title / city matching.
+
+The choice list is preprocessed once (lowercased, like the old call sites did
+by hand) and queries are scored against all of it in a single rapidfuzz call
+(`extractOne` for one query, `cdist` for many), with `score_cutoff` so rapidfuzz
+can bail out of hopeless comparisons early.
+"""
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from rapidfuzz import process
+
+# below this many query x choice comparisons, thread start-up costs more than it saves
+PARALLEL_MIN_PAIRS = 20000
+
+
+def _lower(s: str) -> str:
+    return s.lower()
+
+
+class ChoiceMatcher:
+    def __init__(self, choices: Sequence[str], labels: Optional[Sequence] = None,
+                 processor: Optional[Callable[[str], str]] = _lower):
+        self.choices = list(choices)
+        self.labels = list(labels) if labels is not None else self.choices
+        self.processor = processor
+        self.processed = [processor(c) for c in self.choices] if processor else list(self.choices)
+
+    def _prep(self, q: str) -> str:
+        return self.processor(q) if self.processor else q
+
+    def best(self, query: str, scorer, score_cutoff: float = 0) -> Optional[Tuple[object, float, int]]:
+        """(label, score, index) of the best choice scoring >= score_cutoff, else None."""
+        if not self.processed:
+            return None
+        res = process.extractOne(self._prep(query), self.processed, scorer=scorer,
+                                 processor=None, score_cutoff=score_cutoff)
+        if res is None:
+            return None
+        _, score, idx = res
+        return self.labels[idx], score, idx
+
+    def max_scores(self, queries: Sequence[str], scorer, score_cutoff: float = 0) -> List[float]:
+        """Best score of every query against all choices (0 where below score_cutoff)."""
+        if not queries:
+            return []
+        if not self.processed:
+            return [0.0] * len(queries)
+        # job feeds repeat titles a lot: score each distinct query once
+        qs = [self._prep(q) for q in queries]
+        uniq = list(dict.fromkeys(qs))
+        workers = -1 if len(uniq) * len(self.processed) >= PARALLEL_MIN_PAIRS else 1
+        mat = process.cdist(uniq, self.processed, scorer=scorer, processor=None,
+                            score_cutoff=score_cutoff, workers=workers)
+        best = dict(zip(uniq, mat.max(axis=1).tolist()))
+        return [best[q] for q in qs]
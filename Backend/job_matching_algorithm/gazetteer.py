@@ -0,0 +1,575 @@
+"""
+Offline gazetteer: place name -> country, from a bundled GeoNames extract.
+
+- data/gazetteer.tsv.gz is the seed, one place per line: name, country, kind
+  (city / admin / country), population, alternate names. It is built by
+  `python gazetteer.py seed` from GeoNames cities15000 (every city with at least
+  15000 people, with its Latin-script alternate names), the top-level ISO 3166-2
+  subdivisions and the country names from pycountry (sources, pinned versions and
+  checksum in data/README.md)
+- compile_index() turns the seed into one binary file: a place table, a string
+  blob, every normalized name / alternate name as a fixed-width record (sorted by
+  name, then by weight: population, primary names before alternates) and the
+  distinct names grouped by (first letter, length) as sorted fixed-width text
+- Gazetteer mmaps that file, so opening it reads only the header and a small
+  directory, and worker processes share its pages through the OS page cache
+- lookup() is a binary search within the query's (first letter, length) group;
+  candidates() scores only the groups with the query's first letter and a
+  similar length (one contiguous slice) with rapidfuzz and breaks near-ties by
+  population; resolve() combines the two
+- find_places() picks capitalized place names out of free text (what GeoText did)
+- open_gazetteer() compiles an index per seed version under a file lock, falling
+  back to the temp dir when the cache dir is not writable
+
+GeoNames data is CC BY 4.0 (https://www.geonames.org).
+"""
+import os
+import io
+import re
+import gzip
+import math
+import mmap
+import bisect
+import struct
+import hashlib
+import argparse
+import tempfile
+import unicodedata
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SEED_PATH = os.path.join(HERE, "data", "gazetteer.tsv.gz")
+
+MAGIC = b"GAZ1"
+VERSION = 1
+# magic, version, countries blob length, entry / place / group key / group directory counts,
+# entries / places / strings / group best / group keys / group directory offsets, seed sha1
+HEADER = struct.Struct("<4sHxx" + "I" * 11 + "20s")
+ENTRY = struct.Struct("<IHBxI")    # key offset, key length, key kind, place id
+PLACE = struct.Struct("<IHHIB3x")  # name offset, name length, country id, population, place kind
+GROUP_DIR = struct.Struct("<BxHII")  # first byte, key length, first group key index, keys blob offset
+GROUP_BEST = struct.Struct("<I")     # group key -> index of its best entry
+
+KEY_NAME, KEY_ALT = 0, 1
+PLACE_KINDS = ("city", "admin", "country")
+
+# Ranking weight = population, scaled down for alternate names (a big city's exonym
+# should not beat a smaller city that really has that name). Subdivisions have no
+# population in the seed and are weighted as a small city.
+ALT_NAME_WEIGHT = 0.25
+ADMIN_WEIGHT_POPULATION = 100_000
+FUZZY_CUTOFF = 90     # fuzz.ratio
+POPULATION_BONUS = 2  # score points per decade of weight, for fuzzy near-ties
+FUZZY_MIN_CHARS = 4
+MIN_TEXT_PLACE_CHARS = 3
+MAX_TEXT_PLACE_WORDS = 3
+
+# top-level subdivisions named like this are left out: they would match ordinary words
+GENERIC_ADMIN_NAMES = {
+    "central", "north", "south", "east", "west", "northern", "southern", "eastern", "western",
+    "capital", "centre", "center", "coast", "coastal", "islands", "lakes", "upper", "lower",
+    "greater", "midlands", "north east", "north west", "south east", "south west",
+}
+
+
+# cities15000 names that are ordinary words in a CV (skills, products, headings, months,
+# surnames); find_places() only takes them in a place context
+COMMON_WORD_PLACES = frozenset("""
+aurora central columbia concord cordova crystal cypress delta federal franklin imperial
+independence jackson jupiter liberty lincoln madison march meta mobile orange orion pearl
+phoenix providence spring sterling summit union unity university vista vite
+""".split())
+# "Location: Mobile", "based in Aurora": a label or phrase right before a place name
+_PLACE_CUE_RE = re.compile(r"\b(?:location|address|city|based|located|living|lives|resident|relocat\w*)"
+                           r"\b(?:\s+(?:in|at|of|to))?\s*[:\-–]?\s*$", re.I)
+
+
+# places GeoNames cities15000 lacks that CVs from our users mention (name, country)
+EXTRA_PLACES = [
+    ("Gampaha", "Sri Lanka"),
+]
+
+
+class Place(NamedTuple):
+    name: str
+    country: str
+    population: int
+    kind: str  # "city" | "admin" | "country"
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_WORD_RE = re.compile(r"[^\W\d_][\w'’.]*")
+
+
+def normalize(name: str) -> str:
+    """'São Paulo' -> 'sao paulo': accents folded, lowercase, punctuation -> single spaces."""
+    s = name or ""
+    if not s.isascii():
+        s = unicodedata.normalize("NFKD", s)
+        s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return " ".join(_TOKEN_RE.findall(s.lower()))
+
+
+def _is_latin(s: str) -> bool:
+    return all(ord(ch) < 0x250 or unicodedata.combining(ch) for ch in s)
+
+
+# =========================
+# Seed (TSV.gz)
+# =========================
+def read_seed(path: str = SEED_PATH) -> Iterator[Tuple[str, str, str, int, List[str]]]:
+    """(name, country, kind, population, alternate names) per seed line."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            name, country, kind, population, alts = line.rstrip("\n").split("\t")
+            yield name, country, kind, int(population or 0), [a for a in alts.split("|") if a]
+
+
+def _geotext_data_dir() -> Optional[str]:
+    import importlib.util
+    spec = importlib.util.find_spec("geotext")
+    return os.path.join(os.path.dirname(spec.origin), "data") if spec else None
+
+
+def build_seed(out_path: str = SEED_PATH, geonames_path: Optional[str] = None,
+               country_info_path: Optional[str] = None) -> int:
+    """
+    Write the seed from GeoNames cities15000.txt / countryInfo.txt / citypatches.txt (by
+    default the copies shipped with geotext), EXTRA_PLACES and pycountry's subdivisions.
+    Returns the number of places.
+    """
+    import pycountry
+    data_dir = _geotext_data_dir() or ""
+    geonames_path = geonames_path or os.path.join(data_dir, "cities15000.txt")
+    country_info_path = country_info_path or os.path.join(data_dir, "countryInfo.txt")
+
+    # country names as normalize_country() returns them (pycountry), GeoNames as a fallback
+    countries: Dict[str, str] = {}
+    country_names: Dict[str, List[str]] = {}
+    country_population: Dict[str, int] = {}
+    with open(country_info_path, encoding="utf-8-sig") as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            cols = line.rstrip("\n").split("\t")
+            countries[cols[0]] = cols[4]
+            country_names[cols[0]] = [cols[4]]
+            country_population[cols[0]] = int(cols[7] or 0)
+    for c in pycountry.countries:
+        countries[c.alpha_2] = c.name
+        names = [getattr(c, a, None) for a in ("name", "official_name", "common_name")]
+        country_names[c.alpha_2] = [n for n in names if n] + country_names.get(c.alpha_2, [])
+
+    rows = []
+    for cc, names in country_names.items():
+        alts = list(dict.fromkeys(n for n in names[1:] if normalize(n) != normalize(names[0])))
+        rows.append((names[0], countries[cc], "country", country_population.get(cc, 0), alts))
+    with open(geonames_path, encoding="utf-8") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            name, ascii_name, alts, cc, population = cols[1], cols[2], cols[3], cols[8], cols[14]
+            if cc not in countries:
+                continue
+            keys = {normalize(name)}
+            names = [ascii_name] if normalize(ascii_name) not in keys else []
+            keys.add(normalize(ascii_name))
+            for alt in alts.split(","):
+                key = normalize(alt)
+                # skip codes ("ALV"), non-Latin scripts and anything that folds to a known key
+                if len(key) < 3 or (alt.isupper() and len(alt) <= 4) or not _is_latin(alt) or key in keys:
+                    continue
+                keys.add(key)
+                names.append(alt)
+            rows.append((name, countries[cc], "city", int(population or 0), names))
+
+    # geotext's patch list (lowercase name, country code) + EXTRA_PLACES, for names not covered yet
+    known = {normalize(k) for r in rows if r[2] == "city" for k in [r[0]] + r[4]}
+    extras = [(name, country) for name, country in EXTRA_PLACES]
+    patches_path = os.path.join(data_dir, "citypatches.txt")
+    if os.path.exists(patches_path):
+        with open(patches_path, encoding="utf-8") as f:
+            for line in f:
+                cols = line.rstrip("\n").split("\t")
+                if len(cols) == 2 and cols[1] in countries:
+                    extras.append((cols[0].title(), countries[cols[1]]))
+    for name, country in extras:
+        if normalize(name) not in known:
+            known.add(normalize(name))
+            rows.append((name, country, "city", 0, []))
+
+    for sub in pycountry.subdivisions:
+        if sub.parent_code is not None or sub.country_code not in countries:
+            continue
+        name = sub.name.split(" [")[0].split(" / ")[0]
+        key = normalize(name)
+        if len(key) < 3 or key in GENERIC_ADMIN_NAMES:
+            continue
+        alts = []
+        short = re.sub(r"\s+(province|state|region|county|district|governorate|prefecture)$", "", name, flags=re.I)
+        if short != name and normalize(short) not in GENERIC_ADMIN_NAMES and len(normalize(short)) >= 4:
+            alts.append(short)
+        rows.append((name, countries[sub.country_code], "admin", 0, alts))
+
+    rows.sort(key=lambda r: (r[1], r[2], -r[3], r[0]))
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with gzip.GzipFile(out_path, "wb", mtime=0) as gz, io.TextIOWrapper(gz, encoding="utf-8", newline="\n") as f:
+        f.write("# name\tcountry\tkind\tpopulation\talternate names (|-separated)\n")
+        f.write("# GeoNames cities15000 (CC BY 4.0) + ISO 3166-2 top-level subdivisions + ISO 3166-1 countries\n")
+        for name, country, kind, population, alts in rows:
+            f.write(f"{name}\t{country}\t{kind}\t{population}\t{'|'.join(alts)}\n")
+    return len(rows)
+
+
+# =========================
+# Compiled index
+# =========================
+def _weight(population: int, place_kind: str, key_kind: int) -> float:
+    w = ADMIN_WEIGHT_POPULATION if place_kind == "admin" else population
+    return w * (ALT_NAME_WEIGHT if key_kind == KEY_ALT else 1.0)
+
+
+def seed_digest(path: str = SEED_PATH) -> bytes:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).digest()
+
+
+def compile_index(seed_path: str = SEED_PATH, out_path: str = "") -> dict:
+    """Compile the seed into `out_path` (atomically). Returns counts."""
+    countries: Dict[str, int] = {}
+    strings = bytearray()
+    string_offsets: Dict[str, int] = {}
+
+    def intern(s: str) -> Tuple[int, int]:
+        if s not in string_offsets:
+            string_offsets[s] = len(strings)
+            strings.extend(s.encode("utf-8"))
+        return string_offsets[s], len(s.encode("utf-8"))
+
+    places, entries = bytearray(), []
+    for pid, (name, country, kind, population, alts) in enumerate(read_seed(seed_path)):
+        cid = countries.setdefault(country, len(countries))
+        off, ln = intern(name)
+        places.extend(PLACE.pack(off, ln, cid, min(population, 2**32 - 1), PLACE_KINDS.index(kind)))
+        seen = set()
+        for key_kind, n in [(KEY_NAME, name)] + [(KEY_ALT, a) for a in alts]:
+            key = normalize(n)
+            if key and key not in seen:
+                seen.add(key)
+                entries.append((key, -_weight(population, kind, key_kind), key_kind, pid))
+    entries.sort()
+
+    packed, best_entry = bytearray(), {}
+    for i, (key, _, key_kind, pid) in enumerate(entries):
+        off, ln = intern(key)
+        packed.extend(ENTRY.pack(off, ln, key_kind, pid))
+        best_entry.setdefault(key, i)
+    country_blob = "\n".join(sorted(countries, key=countries.get)).encode("utf-8")
+
+    # name groups: the distinct keys grouped by (first letter, length), "\n"-terminated, so an
+    # exact lookup is a binary search over fixed-width records and the keys a fuzzy query
+    # can match come out of one slice + decode + split
+    group_keys = sorted(best_entry, key=lambda k: (k[0], len(k), k))
+    group_blob, group_best, group_dir, group = bytearray(), bytearray(), bytearray(), None
+    for i, key in enumerate(group_keys):
+        if (key[0], len(key)) != group:
+            group = (key[0], len(key))
+            group_dir.extend(GROUP_DIR.pack(ord(key[0]), len(key), i, len(group_blob)))
+        group_blob.extend(key.encode("utf-8") + b"\n")
+        group_best.extend(GROUP_BEST.pack(best_entry[key]))
+    group_dir.extend(GROUP_DIR.pack(255, 0xFFFF, len(group_keys), len(group_blob)))  # sentinel
+
+    entries_off = HEADER.size + len(country_blob)
+    places_off = entries_off + len(packed)
+    strings_off = places_off + len(places)
+    group_best_off = strings_off + len(strings)
+    group_keys_off = group_best_off + len(group_best)
+    group_dir_off = group_keys_off + len(group_blob)
+    header = HEADER.pack(MAGIC, VERSION, len(country_blob), len(entries), len(places) // PLACE.size,
+                         len(group_keys), len(group_dir) // GROUP_DIR.size, entries_off, places_off,
+                         strings_off, group_best_off, group_keys_off, group_dir_off, seed_digest(seed_path))
+
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out_dir, prefix=".gazetteer-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for part in (header, country_blob, packed, places, strings, group_best, group_blob, group_dir):
+                f.write(part)
+        os.replace(tmp, out_path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return {"places": len(places) // PLACE.size, "keys": len(entries), "countries": len(countries),
+            "bytes": group_dir_off + len(group_dir)}
+
+
+class Gazetteer:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, countries_len, self.n_entries, self.n_places, _, n_dir, self.entries_off,
+         self.places_off, self.strings_off, self.group_best_off, self.group_keys_off, group_dir_off,
+         self.digest) = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a gazetteer index (version {VERSION})")
+        self.countries = self.mm[HEADER.size:HEADER.size + countries_len].decode("utf-8").split("\n")
+        # [(first byte, key length, first group key index, blob offset)], under a thousand groups
+        self.group_dir = list(GROUP_DIR.iter_unpack(self.mm[group_dir_off:group_dir_off + n_dir * GROUP_DIR.size]))
+        self.groups = {(first, length): i for i, (first, length, _, _) in enumerate(self.group_dir)}
+
+    def close(self) -> None:
+        self.mm.close()
+
+    def _entry(self, i: int) -> Tuple[int, int, int, int]:
+        return ENTRY.unpack_from(self.mm, self.entries_off + i * ENTRY.size)
+
+    def _best_entry(self, key: bytes) -> Optional[int]:
+        """Index of the best entry for `key`: binary search in its (first letter, length) group."""
+        g = self.groups.get((key[0], len(key)))
+        if g is None:
+            return None
+        _, width, k0, b0 = self.group_dir[g]
+        n = self.group_dir[g + 1][2] - k0
+        base, step = self.group_keys_off + b0, width + 1  # fixed-width "key\n" records
+        lo, hi = 0, n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.mm[base + mid * step:base + mid * step + width] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == n or self.mm[base + lo * step:base + lo * step + width] != key:
+            return None
+        return GROUP_BEST.unpack_from(self.mm, self.group_best_off + (k0 + lo) * GROUP_BEST.size)[0]
+
+    def place(self, pid: int) -> Place:
+        off, ln, cid, population, kind = PLACE.unpack_from(self.mm, self.places_off + pid * PLACE.size)
+        start = self.strings_off + off
+        return Place(self.mm[start:start + ln].decode("utf-8"), self.countries[cid], population, PLACE_KINDS[kind])
+
+    def _matches(self, key: bytes, primary_only: bool = False) -> List[Place]:
+        i = self._best_entry(key)
+        if i is None:
+            return []
+        out, key_off = [], self._entry(i)[0]
+        while i < self.n_entries:
+            off, _, key_kind, pid = self._entry(i)
+            if off != key_off:  # keys are interned: same key, same offset
+                break
+            if not primary_only or key_kind == KEY_NAME:
+                out.append(self.place(pid))
+            i += 1
+        return out
+
+    def lookup(self, name: str, primary_only: bool = False) -> List[Place]:
+        """Places with exactly this (normalized) name or alternate name, best weight first."""
+        key = normalize(name)
+        return self._matches(key.encode("utf-8"), primary_only) if key else []
+
+    def candidates(self, name: str, limit: int = 5, score_cutoff: float = FUZZY_CUTOFF) -> List[Tuple[Place, float]]:
+        """
+        Fuzzy matches for `name` among the names with its first letter and a similar length:
+        [(place, fuzz.ratio)], ranked by ratio plus POPULATION_BONUS per decade of weight.
+        """
+        from rapidfuzz import fuzz, process
+        key = normalize(name)
+        if len(key) < FUZZY_MIN_CHARS:
+            return []
+        first, d = ord(key[0]), max(2, len(key) // 4)
+        lo = bisect.bisect_left(self.group_dir, (first, len(key) - d))
+        hi = bisect.bisect_left(self.group_dir, (first, len(key) + d + 1))
+        k0, b0 = self.group_dir[lo][2:]
+        b1 = self.group_dir[hi][3]
+        if b1 <= b0:
+            return []
+        keys = self.mm[self.group_keys_off + b0:self.group_keys_off + b1].decode("utf-8").split("\n")
+        found = process.extract(key, keys[:-1], scorer=fuzz.ratio, processor=None,
+                                score_cutoff=score_cutoff, limit=None)
+        ranked = []
+        for _, score, idx in found:
+            (entry,) = GROUP_BEST.unpack_from(self.mm, self.group_best_off + (k0 + idx) * GROUP_BEST.size)
+            _, _, key_kind, pid = self._entry(entry)
+            p = self.place(pid)
+            bonus = POPULATION_BONUS * math.log10(1 + _weight(p.population, p.kind, key_kind))
+            ranked.append((score + bonus, p, score))
+        ranked.sort(key=lambda r: -r[0])
+        return [(p, score) for _, p, score in ranked[:limit]]
+
+    def resolve(self, name: str) -> Optional[Place]:
+        """
+        Best place for a place string from a CV ("Colombo 07", "Bengaluru, KA", "Lndon"):
+        exact name first (the most populous wins), then the closest fuzzy candidate.
+        """
+        if not name:
+            return None
+        head = name.split(",")[0]
+        # postal districts and the like: "Colombo 07" -> "colombo"
+        key = " ".join(t for t in normalize(head).split() if not t.isdigit())
+        if not key:
+            return None
+        exact = self._matches(key.encode("utf-8"))
+        if exact:
+            return exact[0]
+        cands = self.candidates(key, limit=1)
+        return cands[0][0] if cands else None
+
+    def _text_runs(self, text: str) -> List[Tuple[int, int, str, List[Place]]]:
+        """(start, end, surface, places by weight) for capitalized runs that name a place."""
+        words = [m for m in _WORD_RE.finditer(text) if m.group()[0].isupper() and not m.group().isupper()]
+        runs, i = [], 0
+        while i < len(words):
+            for n in range(min(MAX_TEXT_PLACE_WORDS, len(words) - i), 0, -1):
+                run = words[i:i + n]
+                if any(text[a.end():b.start()] not in (" ", "-") for a, b in zip(run, run[1:])):
+                    continue
+                surface = text[run[0].start():run[-1].end()].rstrip(".")
+                if len(surface) < MIN_TEXT_PLACE_CHARS:
+                    continue
+                hits = self.lookup(surface, primary_only=True)
+                if hits:
+                    runs.append((run[0].start(), run[0].start() + len(surface), surface, hits))
+                    i += n
+                    break
+            else:
+                i += 1
+        return runs
+
+    def find_places(self, text: str) -> List[Tuple[str, Place]]:
+        """
+        [(surface text, place)] for capitalized runs of up to three words that are a
+        country, region or city name, in text order; longer names win ("New York" over "York").
+        Alternate names are not used here, they make too many ordinary words match.
+
+        - a name shared by several places resolves to one in a country the text names
+          (directly or through a region): "Santa Clara, California" is in the US, not Cuba,
+          and so is "Atlanta, Georgia"
+        - names that are also everyday CV words (COMMON_WORD_PLACES: "Mobile", "Spring")
+          only count in a place context: followed by ", <its region or country>" or after
+          a label such as "Location:"
+        """
+        runs = self._text_runs(text)
+        kept = []
+        for j, (start, end, surface, hits) in enumerate(runs):
+            if normalize(surface) in COMMON_WORD_PLACES:
+                nxt = runs[j + 1] if j + 1 < len(runs) else None
+                countries = {p.country for p in hits}
+                after = (nxt is not None and text[end:nxt[0]].strip() == ","
+                         and any(p.kind != "city" and p.country in countries for p in nxt[3]))
+                line = text[text.rfind("\n", 0, start) + 1:start]
+                if not after and not _PLACE_CUE_RE.search(line):
+                    continue
+            kept.append((start, end, surface, hits))
+
+        # "Atlanta, Georgia": a pair of names sharing a country is pinned to it
+        pinned: Dict[int, str] = {}
+        for j in range(len(kept) - 1):
+            (_, end, _, hits), (start, _, _, nxt) = kept[j], kept[j + 1]
+            if text[end:start].strip() != ",":
+                continue
+            shared = {p.country for p in hits} & {p.country for p in nxt}
+            if shared:
+                country = next(p.country for p in nxt if p.country in shared)
+                pinned.setdefault(j, country)
+                pinned.setdefault(j + 1, country)
+
+        def pick(hits: List[Place], prefer) -> Place:
+            return next((p for p in hits if p.country in prefer), hits[0])
+
+        # countries the text names outright: countries and regions
+        chosen = [pick(hits, {pinned.get(j)}) for j, (_, _, _, hits) in enumerate(kept)]
+        context = {p.country for p in chosen if p.kind != "city"}
+        return [(surface, chosen[j] if j in pinned else pick(hits, context))
+                for j, (_, _, surface, hits) in enumerate(kept)]
+
+
+def index_file(path: str, digest: bytes) -> str:
+    """gazetteer.idx -> gazetteer-<seed sha1 prefix>.idx: one file per seed version."""
+    root, ext = os.path.splitext(path)
+    return f"{root}-{digest.hex()[:12]}{ext or '.idx'}"
+
+
+def _open_current(path: str, digest: bytes) -> Optional[Gazetteer]:
+    try:
+        gaz = Gazetteer(path)
+    except (OSError, ValueError, struct.error):
+        return None
+    if gaz.digest == digest:
+        return gaz
+    gaz.close()
+    return None
+
+
+def _remove_stale(path: str, current: str) -> None:
+    """Indexes of older seeds next to `current`. One still mapped elsewhere stays (Windows)."""
+    root, ext = os.path.splitext(path)
+    prefix = os.path.basename(root) + "-"
+    folder = os.path.dirname(os.path.abspath(current))
+    for fn in os.listdir(folder):
+        p = os.path.join(folder, fn)
+        if fn.startswith(prefix) and fn.endswith(ext or ".idx") and p != os.path.abspath(current):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+
+def _open_or_compile(path: str, seed_path: str, digest: bytes) -> Gazetteer:
+    current = index_file(path, digest)
+    gaz = _open_current(current, digest)
+    if gaz is not None:
+        return gaz
+    from disk_cache import file_lock
+    with file_lock(path + ".lock"):
+        gaz = _open_current(current, digest)  # another process may have compiled it while we waited
+        if gaz is None:
+            compile_index(seed_path, current)
+            _remove_stale(path, current)
+            gaz = Gazetteer(current)
+    return gaz
+
+
+def open_gazetteer(path: str, seed_path: str = SEED_PATH) -> Gazetteer:
+    """
+    The index for the current seed, compiled first if needed. The file next to `path` is
+    named after the seed digest, so a new seed compiles a new file instead of replacing
+    one another process has mapped (which Windows refuses). If `path`'s directory cannot
+    be written, the index goes to the system temp dir; OSError only if that fails too.
+    """
+    digest = seed_digest(seed_path)
+    try:
+        return _open_or_compile(path, seed_path, digest)
+    except OSError:
+        fallback = os.path.join(tempfile.gettempdir(), os.path.basename(path) or "gazetteer.idx")
+        if os.path.abspath(fallback) == os.path.abspath(path):
+            raise
+        return _open_or_compile(fallback, seed_path, digest)
+
+
+def main() -> None:
+    from disk_cache import DEFAULT_CACHE_ROOT
+    ap = argparse.ArgumentParser(description="Offline gazetteer: build the seed / index, look names up")
+    ap.add_argument("--index", default=os.path.join(DEFAULT_CACHE_ROOT, "gazetteer.idx"))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sp = sub.add_parser("seed", help="rebuild data/gazetteer.tsv.gz from GeoNames + pycountry")
+    sp.add_argument("--geonames", help="cities15000.txt (default: geotext's copy)")
+    sp.add_argument("--country-info", help="countryInfo.txt (default: geotext's copy)")
+    sub.add_parser("build", help="compile the index from the seed")
+    lp = sub.add_parser("lookup", help="resolve place names")
+    lp.add_argument("names", nargs="+")
+    args = ap.parse_args()
+
+    if args.cmd == "seed":
+        print(f"{build_seed(SEED_PATH, args.geonames, args.country_info)} places -> {SEED_PATH}")
+    elif args.cmd == "build":
+        print(compile_index(SEED_PATH, index_file(args.index, seed_digest(SEED_PATH))))
+    else:
+        gaz = open_gazetteer(args.index)
+        for name in args.names:
+            print(f"{name!r}: {gaz.resolve(name)}  candidates={gaz.candidates(name)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Local SQLite index of job postings seen in job API responses, plus the
+per-job feature store.
+
+- jobs: one row per posting (its dedup key), with country, required years,
+  last fetch time and the raw hit as JSON
+- jobs_fts: FTS5 over title + description (external content, kept in sync by
+  triggers; re-ingesting an unchanged posting does not touch the FTS index)
+- upsert() ingests a batch in one transaction, search() answers
+  (terms, country, max years) ranked by bm25, expire() drops postings that
+  have not been seen for a while
+- job_features: features derived from a posting (required years, normalized
+  title, canonical role, seniority), keyed by job id + content hash, so they
+  are computed once per posting version
+- job_embeddings: ranking embeddings (float32 bytes) keyed by model + job id +
+  text hash, so a repeat search does not need the embedding model
+- WAL mode, so CLI runs, server workers and batch runs can share the file
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id             INTEGER PRIMARY KEY,
+    key            TEXT NOT NULL UNIQUE,
+    title          TEXT NOT NULL DEFAULT '',
+    description    TEXT NOT NULL DEFAULT '',
+    country        TEXT COLLATE NOCASE,
+    required_years REAL,
+    fetched_at     REAL NOT NULL,
+    payload        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_country_fetched ON jobs(country, fetched_at);
+CREATE INDEX IF NOT EXISTS jobs_fetched ON jobs(fetched_at);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    title, description, content='jobs', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS jobs_ai AFTER INSERT ON jobs BEGIN
+    INSERT INTO jobs_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_ad AFTER DELETE ON jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_au AFTER UPDATE OF title, description ON jobs
+WHEN old.title IS NOT new.title OR old.description IS NOT new.description BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO jobs_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+
+CREATE TABLE IF NOT EXISTS job_features (
+    key            TEXT PRIMARY KEY,
+    required_years REAL,
+    title_norm     TEXT,
+    role           TEXT,
+    seniority      TEXT,
+    computed_at    REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS job_features_computed ON job_features(computed_at);
+
+CREATE TABLE IF NOT EXISTS job_embeddings (
+    key            TEXT PRIMARY KEY,
+    vector         BLOB NOT NULL,
+    computed_at    REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS job_embeddings_computed ON job_embeddings(computed_at);
+"""
+
+UPSERT = """
+INSERT INTO jobs (key, title, description, country, required_years, fetched_at, payload)
+VALUES (:key, :title, :description, :country, :required_years, :fetched_at, :payload)
+ON CONFLICT(key) DO UPDATE SET
+    title = excluded.title,
+    description = excluded.description,
+    country = COALESCE(excluded.country, jobs.country),
+    required_years = excluded.required_years,
+    fetched_at = excluded.fetched_at,
+    payload = excluded.payload
+"""
+
+FEATURE_COLUMNS = ("required_years", "title_norm", "role", "seniority")
+SQLITE_MAX_VARS = 500  # keys per IN (...) query; well under SQLite's limit
+
+# bm25 column weights: a term in the title counts far more than one in the description
+BM25_WEIGHTS = (10.0, 1.0)
+
+
+def fts_query(terms: Iterable[str]) -> str:
+    """'"software engineer" OR "backend developer"': each term as a phrase, punctuation dropped."""
+    phrases = []
+    for t in terms:
+        words = re.findall(r"\w+", (t or "").lower())
+        if words:
+            phrases.append('"' + " ".join(words) + '"')
+    return " OR ".join(dict.fromkeys(phrases))
+
+
+class JobIndex:
+    def __init__(self, path: str, expire_every_s: float = 3600):
+        self.path = path
+        self.expire_every_s = expire_every_s
+        self._local = threading.local()
+        self._last_expire = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread, and never reuse one opened before a fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def upsert(self, rows: List[dict], fetched_at: Optional[float] = None) -> int:
+        """rows: {key, title, description, country, required_years, payload}. Returns rows written."""
+        now = fetched_at if fetched_at is not None else time.time()
+        params = [{
+            "key": r["key"],
+            "title": r.get("title") or "",
+            "description": r.get("description") or "",
+            "country": r.get("country"),
+            "required_years": r.get("required_years"),
+            "fetched_at": now,
+            "payload": json.dumps(r["payload"], ensure_ascii=False),
+        } for r in rows if r.get("key")]
+        if not params:
+            return 0
+        with self._conn() as conn:
+            conn.executemany(UPSERT, params)
+        return len(params)
+
+    def search(self, terms: Iterable[str], country: Optional[str] = None,
+               max_years: Optional[float] = None, max_age_s: Optional[float] = None,
+               limit: int = 100) -> List[dict]:
+        """Postings matching any of `terms`, best bm25 first, as the original hit dicts."""
+        query = fts_query(terms)
+        if not query:
+            return []
+        sql = ["SELECT j.payload FROM jobs_fts JOIN jobs j ON j.id = jobs_fts.rowid",
+               "WHERE jobs_fts MATCH ?"]
+        args: list = [query]
+        if country:
+            sql.append("AND j.country = ?")
+            args.append(country)
+        if max_years is not None:
+            sql.append("AND (j.required_years IS NULL OR j.required_years <= ?)")
+            args.append(max_years)
+        if max_age_s is not None:
+            sql.append("AND j.fetched_at >= ?")
+            args.append(time.time() - max_age_s)
+        sql.append("ORDER BY bm25(jobs_fts, ?, ?) LIMIT ?")
+        args.extend([*BM25_WEIGHTS, limit])
+        rows = self._conn().execute(" ".join(sql), args).fetchall()
+        return [json.loads(p) for (p,) in rows]
+
+    def get_features(self, keys: List[str]) -> Dict[str, dict]:
+        """{key: {required_years, title_norm, role, seniority}} for the keys that are stored."""
+        out: Dict[str, dict] = {}
+        conn = self._conn()
+        cols = ", ".join(FEATURE_COLUMNS)
+        for i in range(0, len(keys), SQLITE_MAX_VARS):
+            chunk = keys[i:i + SQLITE_MAX_VARS]
+            marks = ", ".join("?" * len(chunk))
+            for key, *vals in conn.execute(f"SELECT key, {cols} FROM job_features WHERE key IN ({marks})", chunk):
+                out[key] = dict(zip(FEATURE_COLUMNS, vals))
+        return out
+
+    def put_features(self, items: List[Tuple[str, dict]]) -> int:
+        """Store [(key, features)] in one transaction. Returns rows written."""
+        if not items:
+            return 0
+        now = time.time()
+        rows = [(key, *(f.get(c) for c in FEATURE_COLUMNS), now) for key, f in items]
+        with self._conn() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO job_features (key, {', '.join(FEATURE_COLUMNS)}, computed_at) "
+                f"VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def get_embeddings(self, keys: List[str]) -> Dict[str, bytes]:
+        """{key: float32 vector bytes} for the keys that are stored."""
+        out: Dict[str, bytes] = {}
+        conn = self._conn()
+        for i in range(0, len(keys), SQLITE_MAX_VARS):
+            chunk = keys[i:i + SQLITE_MAX_VARS]
+            marks = ", ".join("?" * len(chunk))
+            for key, vec in conn.execute(f"SELECT key, vector FROM job_embeddings WHERE key IN ({marks})", chunk):
+                out[key] = bytes(vec)
+        return out
+
+    def put_embeddings(self, items: List[Tuple[str, bytes]]) -> int:
+        """Store [(key, float32 vector bytes)] in one transaction. Returns rows written."""
+        if not items:
+            return 0
+        now = time.time()
+        with self._conn() as conn:
+            conn.executemany("INSERT OR REPLACE INTO job_embeddings (key, vector, computed_at) VALUES (?, ?, ?)",
+                             [(key, vec, now) for key, vec in items])
+        return len(items)
+
+    def expire(self, max_age_s: float) -> int:
+        """Delete postings (and job features / embeddings) older than max_age_s. Returns postings deleted."""
+        cutoff = time.time() - max_age_s
+        with self._conn() as conn:
+            cur = conn.execute("DELETE FROM jobs WHERE fetched_at < ?", (cutoff,))
+            conn.execute("DELETE FROM job_features WHERE computed_at < ?", (cutoff,))
+            conn.execute("DELETE FROM job_embeddings WHERE computed_at < ?", (cutoff,))
+        self._last_expire = time.time()
+        return cur.rowcount
+
+    def maybe_expire(self, max_age_s: float) -> Optional[int]:
+        """expire() at most once per expire_every_s in this process (cheap to call on every ingest)."""
+        if time.time() - self._last_expire < self.expire_every_s:
+            return None
+        return self.expire(max_age_s)
+
+    def stats(self) -> dict:
+        n, oldest, newest = self._conn().execute(
+            "SELECT COUNT(*), MIN(fetched_at), MAX(fetched_at) FROM jobs").fetchone()
+        return {"jobs": n, "oldest_fetched_at": oldest, "newest_fetched_at": newest}
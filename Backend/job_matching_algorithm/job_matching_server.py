@@ -0,0 +1,280 @@
+"""
+Long-lived JSON-lines server for Job_Matching.
+
+Started with `python Job_Matching.py --serve`. The parent process loads the
+spaCy + KeyBERT models once (warmup), then forks N workers that share the
+weights copy-on-write. Requests come in on stdin, one JSON object per line:
+
+    {"id": "abc", "cv": "<path or JSON arg>", "timeout": 60}
+
+and every request gets exactly one reply line on stdout:
+
+    {"id": "abc", "ok": true,  "result": {...}, "ms": 812}
+    {"id": "abc", "ok": false, "error": "timeout after 60s"}
+
+A request without "cv", or whose "timeout" is not a positive number of seconds,
+is answered right away with {"id": ..., "ok": false, "error": "bad_request: ..."}.
+
+A request with "stream": true also gets progress lines before its reply, each
+{"id": "abc", "event": "<stage event>", ...}; the reply line is unchanged (it
+has no "event" key), so clients that ignore events see the same protocol.
+
+Workers are recycled after `max_jobs` requests or once their RSS grows past
+`max_rss_mb`. A worker that blows its per-request timeout is killed and replaced.
+"""
+import os
+import sys
+import json
+import math
+import time
+import queue
+import signal
+import threading
+import multiprocessing as mp
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Callable, Optional
+
+from perf import current_rss_mb
+
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+DEFAULT_TIMEOUT_S = 120.0
+DEFAULT_MAX_JOBS = 200
+DEFAULT_MAX_RSS_MB = 1500
+
+
+def _worker_main(conn, handle: Callable[[dict], dict], warmup: Optional[Callable[[], None]],
+                 max_jobs: int, max_rss_mb: float) -> None:
+    # Only the parent owns the protocol stream; anything a library prints goes to stderr.
+    try:
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    except Exception:
+        pass
+    sys.stdout = sys.stderr
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    if warmup is not None:
+        warmup()  # no-op after fork (models already cached), real load under spawn
+
+    done = 0
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            return
+        if msg is None:
+            return
+        req_id, req = msg
+        t0 = time.perf_counter()
+        try:
+            if req.get("stream"):
+                result = handle(req, emit=lambda ev, _id=req_id: conn.send(("event", _id, ev)))
+            else:
+                result = handle(req)
+            reply = {"ok": True, "result": result}
+        except Exception as e:
+            reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        reply["ms"] = int((time.perf_counter() - t0) * 1000)
+        done += 1
+        recycle = bool((max_jobs and done >= max_jobs) or (max_rss_mb and current_rss_mb() >= max_rss_mb))
+        conn.send(("reply", req_id, reply, recycle))
+        if recycle:
+            return
+
+
+class _Worker:
+    def __init__(self, ctx, handle, warmup, max_jobs, max_rss_mb):
+        self.conn, child_conn = ctx.Pipe()
+        self.proc = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, handle, warmup, max_jobs, max_rss_mb),
+            daemon=True,
+        )
+        self.proc.start()
+        child_conn.close()
+        self.req_id = None
+        self.deadline = 0.0
+        self.timeout_s = 0.0
+
+    @property
+    def busy(self) -> bool:
+        return self.req_id is not None
+
+    def submit(self, req_id, req: dict, timeout_s: float) -> None:
+        self.req_id = req_id
+        self.timeout_s = timeout_s
+        self.deadline = time.monotonic() + timeout_s
+        self.conn.send((req_id, req))
+
+    def stop(self, kill: bool = False) -> None:
+        try:
+            if kill:
+                self.proc.kill()
+            else:
+                self.conn.send(None)
+        except Exception:
+            pass
+        self.proc.join(timeout=5)
+        if self.proc.is_alive():
+            self.proc.kill()
+            self.proc.join()
+        self.conn.close()
+
+
+def _emit(obj: dict, lock: threading.Lock) -> None:
+    line = json.dumps(obj, ensure_ascii=False)
+    with lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+
+def _check_request(req: dict) -> Optional[str]:
+    """Why the request cannot be run, or None. Normalizes "timeout" to a float."""
+    cv = req.get("cv")
+    if cv is None or (isinstance(cv, str) and not cv.strip()):
+        return "missing 'cv'"
+    if not isinstance(cv, str):
+        return "'cv' must be a path or a JSON string"
+    timeout = req.get("timeout")
+    if timeout is not None:
+        try:
+            if isinstance(timeout, bool):
+                raise ValueError
+            timeout = float(timeout)
+        except (TypeError, ValueError):
+            return f"'timeout' must be a number of seconds, got {timeout!r}"
+        if not (math.isfinite(timeout) and timeout > 0):
+            return f"'timeout' must be positive, got {timeout!r}"
+        req["timeout"] = timeout
+    return None
+
+
+def _read_requests(stream, inbox: "queue.Queue", out_lock: threading.Lock) -> None:
+    seq = 0
+    for raw in stream:
+        raw = raw.strip()
+        if not raw:
+            continue
+        seq += 1
+        try:
+            req = json.loads(raw)
+            if not isinstance(req, dict):
+                raise ValueError("request must be a JSON object")
+        except Exception as e:
+            _emit({"id": None, "ok": False, "error": f"bad_request: {e}"}, out_lock)
+            continue
+        if req.get("id") is None:
+            req["id"] = f"req-{seq}"
+        problem = _check_request(req)
+        if problem:
+            _emit({"id": req["id"], "ok": False, "error": f"bad_request: {problem}"}, out_lock)
+            continue
+        inbox.put(req)
+    inbox.put(None)  # EOF marker
+
+
+def serve(handle: Callable[[dict], dict],
+          warmup: Optional[Callable[[], None]] = None,
+          workers: int = DEFAULT_WORKERS,
+          timeout_s: float = DEFAULT_TIMEOUT_S,
+          max_jobs: int = DEFAULT_MAX_JOBS,
+          max_rss_mb: float = DEFAULT_MAX_RSS_MB,
+          stream=None) -> None:
+    """
+    Run the prefork JSON-lines loop until stdin (or `stream`) hits EOF.
+    `handle(request) -> result dict` runs inside a worker (called as
+    `handle(request, emit=...)` for stream requests); `warmup()` runs in the
+    parent before forking so workers inherit loaded models.
+    """
+    stream = stream if stream is not None else sys.stdin
+    # fork shares the warmed-up models; platforms without fork (Windows) fall back
+    # to spawn, where every worker runs warmup() itself.
+    method = "fork" if "fork" in mp.get_all_start_methods() else "spawn"
+    ctx = mp.get_context(method)
+
+    if warmup is not None and method == "fork":
+        warmup()
+
+    def spawn() -> _Worker:
+        return _Worker(ctx, handle, warmup, max_jobs, max_rss_mb)
+
+    # start the initial pool before any helper thread exists (cleaner fork)
+    pool = [spawn() for _ in range(max(1, workers))]
+
+    out_lock = threading.Lock()
+    _emit({"event": "ready", "workers": len(pool), "start_method": method, "pid": os.getpid()}, out_lock)
+
+    inbox: "queue.Queue" = queue.Queue()
+    reader = threading.Thread(target=_read_requests, args=(stream, inbox, out_lock), daemon=True)
+    reader.start()
+    pending: deque = deque()
+    eof = False
+
+    try:
+        while True:
+            # pull new requests (block briefly only when there is nothing in flight)
+            idle_wait = 0.1 if not pending and not any(w.busy for w in pool) else 0
+            try:
+                item = inbox.get(timeout=idle_wait) if idle_wait else inbox.get_nowait()
+                while True:
+                    if item is None:
+                        eof = True
+                    else:
+                        pending.append(item)
+                    item = inbox.get_nowait()
+            except queue.Empty:
+                pass
+
+            # dispatch
+            for i, w in enumerate(pool):
+                if not pending:
+                    break
+                if w.busy:
+                    continue
+                req = pending.popleft()
+                req_timeout = req.get("timeout") or timeout_s  # checked by _check_request
+                try:
+                    w.submit(req["id"], req, req_timeout)
+                except (BrokenPipeError, OSError):
+                    # worker died between jobs; replace it and retry on the next pass
+                    pending.appendleft(req)
+                    w.stop(kill=True)
+                    pool[i] = spawn()
+
+            busy = [w for w in pool if w.busy]
+            if eof and not pending and not busy:
+                break
+            if not busy:
+                continue
+
+            # collect replies
+            for conn in wait([w.conn for w in busy], timeout=0.05):
+                w = next(x for x in busy if x.conn is conn)
+                idx = pool.index(w)
+                try:
+                    msg = conn.recv()
+                except (EOFError, OSError):
+                    _emit({"id": w.req_id, "ok": False, "error": "worker_crashed"}, out_lock)
+                    w.stop(kill=True)
+                    pool[idx] = spawn()
+                    continue
+                if msg[0] == "event":
+                    _emit({"id": msg[1], **msg[2]}, out_lock)
+                    continue
+                _, req_id, reply, recycle = msg
+                w.req_id = None
+                _emit({"id": req_id, **reply}, out_lock)
+                if recycle:
+                    w.stop()
+                    pool[idx] = spawn()
+
+            # enforce per-request deadlines
+            now = time.monotonic()
+            for idx, w in enumerate(pool):
+                if w.busy and now > w.deadline:
+                    _emit({"id": w.req_id, "ok": False, "error": f"timeout after {w.timeout_s:g}s"}, out_lock)
+                    w.stop(kill=True)
+                    pool[idx] = spawn()
+    finally:
+        for w in pool:
+            w.stop(kill=w.busy)
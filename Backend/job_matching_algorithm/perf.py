@@ -0,0 +1,275 @@
+"""
+Lightweight per-run instrumentation for the matching pipeline.
+
+One Recorder per CV run, reachable through current(). The active recorder is a
+context variable: start() sets it for the calling context, and pool threads get
+it by running their task through in_context() (or contextvars.copy_context().run,
+which is what stage_graph does). Work that outlives its run, such as a
+background cache refresh or a fetch left running after an early stop, keeps
+reporting into its own run's (finished) recorder, never into a later run's.
+
+- stage(name): wall time, CPU time of the calling thread, RSS afterwards and,
+  with tracemalloc on, the traced-memory delta (stages that overlap in time
+  share one heap, so concurrent deltas are approximate)
+- count(name, n): counters (pages, OCR pages, chars, cache statuses, ...)
+- observe(name, value): samples, summarised as count/sum/min/max/p50/p95
+- snapshot() is the `_perf` output section; append_metrics() appends it to a
+  file in Prometheus text format (timestamped samples, one block per run)
+
+Disabled (JOB_MATCHING_PERF=0), current() is a shared no-op recorder: an
+instrumented call costs one context variable lookup and an empty `with`.
+"""
+import os
+import re
+import sys
+import time
+import threading
+import contextvars
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, List, Optional
+
+PERF_ENABLED = os.getenv("JOB_MATCHING_PERF", "1") != "0"
+# tracemalloc slows every allocation down noticeably, so it is opt-in
+PERF_TRACEMALLOC = os.getenv("JOB_MATCHING_PERF_TRACEMALLOC", "0") == "1"
+METRICS_FILE = os.getenv("JOB_MATCHING_METRICS_FILE", "")
+
+
+def current_rss_mb() -> float:
+    """Current resident set size of this process in MB (0.0 if unknown)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except Exception:
+        pass
+    return peak_rss_mb() or 0.0
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None where getrusage is missing)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KB on Linux, bytes on macOS
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except Exception:
+        return None
+
+
+def _summary(values: List[float]) -> dict:
+    vals = sorted(values)
+    n = len(vals)
+    return {
+        "count": n,
+        "sum": round(sum(vals), 3),
+        "min": round(vals[0], 3),
+        "max": round(vals[-1], 3),
+        "p50": round(vals[(n - 1) // 2], 3),
+        "p95": round(vals[min(n - 1, int(n * 0.95))], 3),
+    }
+
+
+class Recorder:
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, dict] = {}
+        self.counters: Dict[str, float] = {}
+        self.samples: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._started_tracing = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if trace_memory:
+            tracemalloc.reset_peak()
+        self._traced0 = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+        self._rss0 = current_rss_mb()
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self._final: Optional[dict] = None
+
+    @contextmanager
+    def stage(self, name: str):
+        m0 = tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+        c0 = time.thread_time()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = (time.perf_counter() - t0) * 1000
+            cpu = (time.thread_time() - c0) * 1000
+            rss = current_rss_mb()
+            m1 = tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+            with self._lock:
+                st = self.stages.setdefault(name, {"calls": 0, "wall_ms": 0.0, "cpu_ms": 0.0})
+                st["calls"] += 1
+                st["wall_ms"] += wall
+                st["cpu_ms"] += cpu
+                st["rss_mb"] = rss
+                if self.trace_memory:
+                    st["traced_kb_delta"] = st.get("traced_kb_delta", 0.0) + (m1 - m0) / 1024
+
+    def count(self, name: str, n: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            self.samples.setdefault(name, []).append(value)
+
+    def snapshot(self) -> dict:
+        if self._final is not None:
+            return self._final
+        with self._lock:
+            snap = {
+                "wall_ms": round((time.perf_counter() - self._t0) * 1000, 1),
+                "cpu_ms": round((time.process_time() - self._cpu0) * 1000, 1),
+                "rss_mb": {"start": round(self._rss0, 1), "end": round(current_rss_mb(), 1)},
+                "stages": {k: {f: (round(v, 1) if isinstance(v, float) else v) for f, v in st.items()}
+                           for k, st in self.stages.items()},
+                "counters": dict(self.counters),
+                "samples": {k: _summary(v) for k, v in self.samples.items() if v},
+            }
+        peak = peak_rss_mb()
+        if peak is not None:
+            snap["rss_mb"]["peak"] = round(peak, 1)
+        if self.trace_memory:
+            cur, peak_traced = tracemalloc.get_traced_memory()
+            snap["tracemalloc"] = {"delta_kb": round((cur - self._traced0) / 1024, 1),
+                                   "peak_kb": round(peak_traced / 1024, 1)}
+        return snap
+
+    def finish(self) -> dict:
+        """Final snapshot; stops tracemalloc if this recorder started it."""
+        snap = self.snapshot()
+        self._final = snap
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return snap
+
+
+class _NullRecorder:
+    trace_memory = False
+    _ctx = nullcontext()
+
+    def stage(self, name: str):
+        return self._ctx
+
+    def count(self, name: str, n: float = 1) -> None:
+        pass
+
+    def observe(self, name: str, value: float) -> None:
+        pass
+
+
+NULL_RECORDER = _NullRecorder()
+_CURRENT: contextvars.ContextVar = contextvars.ContextVar("perf_recorder", default=NULL_RECORDER)
+
+
+def current():
+    return _CURRENT.get()
+
+
+def start(enabled: Optional[bool] = None, trace_memory: Optional[bool] = None):
+    """Begin a run: current() reports into a fresh Recorder (or the no-op one if disabled)."""
+    if enabled is None:
+        enabled = PERF_ENABLED
+    if trace_memory is None:
+        trace_memory = PERF_TRACEMALLOC
+    rec = Recorder(trace_memory=trace_memory) if enabled else NULL_RECORDER
+    _CURRENT.set(rec)
+    return rec
+
+
+def stop():
+    """End the run; returns its recorder."""
+    rec = _CURRENT.get()
+    _CURRENT.set(NULL_RECORDER)
+    return rec
+
+
+def in_context(fn: Callable) -> Callable:
+    """`fn` bound to the caller's context: wherever it runs, current() is the caller's recorder."""
+    ctx = contextvars.copy_context()
+    # a Context can only be entered by one thread at a time, so every call runs in its own copy
+    return lambda *args, **kwargs: ctx.copy().run(fn, *args, **kwargs)
+
+
+def _label_str(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for k, v in sorted(labels.items()):
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+# metric -> (type, help). Every value is for one run (one timestamped block per run).
+METRICS = {
+    "run_wall_seconds": ("gauge", "Wall time of the run."),
+    "run_cpu_seconds": ("gauge", "Process CPU time used by the run."),
+    "rss_bytes": ("gauge", "Resident set size at the end of the run."),
+    "rss_peak_bytes": ("gauge", "Peak resident set size of the process."),
+    "stage_wall_seconds": ("gauge", "Wall time spent in a pipeline stage."),
+    "stage_cpu_seconds": ("gauge", "CPU time of the threads that ran a pipeline stage."),
+    "stage_calls": ("gauge", "Times a pipeline stage ran."),
+    "events_total": ("counter", "Events counted during the run (pages, cache statuses, ...)."),
+    "observation_count": ("gauge", "Number of samples of an observed value."),
+    "observation_sum": ("gauge", "Sum of the samples of an observed value."),
+    "observation_max": ("gauge", "Largest sample of an observed value."),
+    "tracemalloc_peak_bytes": ("gauge", "Peak memory traced by tracemalloc."),
+}
+
+
+def to_prometheus(snap: dict, labels: Optional[Dict[str, str]] = None,
+                  timestamp_ms: Optional[int] = None, prefix: str = "job_matching") -> str:
+    """Prometheus text format for one run snapshot: # HELP / # TYPE, then that metric's samples."""
+    labels = dict(labels or {})
+    ts = f" {timestamp_ms}" if timestamp_ms is not None else ""
+    families: Dict[str, List[str]] = {}
+
+    def emit(name: str, value: float, extra: Optional[Dict[str, str]] = None) -> None:
+        v = int(value) if float(value).is_integer() else round(value, 6)
+        families.setdefault(name, []).append(
+            f"{prefix}_{_metric_name(name)}{_label_str({**labels, **(extra or {})})} {v}{ts}")
+
+    emit("run_wall_seconds", snap["wall_ms"] / 1000)
+    emit("run_cpu_seconds", snap["cpu_ms"] / 1000)
+    emit("rss_bytes", int(snap["rss_mb"]["end"] * 1024 * 1024))
+    if "peak" in snap["rss_mb"]:
+        emit("rss_peak_bytes", int(snap["rss_mb"]["peak"] * 1024 * 1024))
+    for stage, st in snap["stages"].items():
+        emit("stage_wall_seconds", st["wall_ms"] / 1000, {"stage": stage})
+        emit("stage_cpu_seconds", st["cpu_ms"] / 1000, {"stage": stage})
+        emit("stage_calls", st["calls"], {"stage": stage})
+    for name, n in snap["counters"].items():
+        emit("events_total", n, {"event": name})
+    for name, s in snap["samples"].items():
+        emit("observation_count", s["count"], {"name": name})
+        emit("observation_sum", s["sum"], {"name": name})
+        emit("observation_max", s["max"], {"name": name})
+    if "tracemalloc" in snap:
+        emit("tracemalloc_peak_bytes", int(snap["tracemalloc"]["peak_kb"] * 1024))
+
+    lines = []
+    for name, samples in families.items():  # a family's samples must be contiguous
+        kind, help_text = METRICS[name]
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+def append_metrics(path: str, snap: dict, labels: Optional[Dict[str, str]] = None) -> None:
+    """Append one run to `path` (a single write, so concurrent workers don't interleave lines)."""
+    block = to_prometheus(snap, labels=labels, timestamp_ms=int(time.time() * 1000))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(block)
@@ -0,0 +1,130 @@
+"""
+TTL response cache with stale-while-revalidate and single-flight coalescing.
+
+Entries live in a DiskCache, so every Job_Matching process (CLI runs, server
+workers) shares them. For a key:
+
+- fresh (age < ttl)               -> "hit"
+- stale (ttl <= age < ttl+stale)  -> "stale": cached value now, refresh in background
+- missing / too old               -> "miss": fetch; concurrent callers for the same
+                                     key wait for that one fetch -> "coalesced"
+
+Coalescing works across threads (one in-flight fetch per key per process) and
+across processes (a file lock, re-checked after it is acquired). Keys share
+256 lock files by their first hex digits, so the lock files stay a fixed set.
+"""
+import time
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from disk_cache import DiskCache
+
+LOCK_STRIPE_CHARS = 2  # 256 lock files: keys are sha256 hex
+
+
+class ResponseCache:
+    def __init__(self, disk: DiskCache, ttl_s: float, stale_s: float,
+                 should_cache: Callable[[Any], bool] = lambda v: True):
+        self.disk = disk
+        self.ttl_s = ttl_s
+        self.stale_s = stale_s
+        self.should_cache = should_cache
+        self.counters = {"hit": 0, "stale": 0, "miss": 0, "coalesced": 0, "error": 0}
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Event] = {}
+        self._refreshing: set = set()
+
+    @staticmethod
+    def key_for(*parts: str) -> str:
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    def _count(self, status: str) -> None:
+        with self._lock:
+            self.counters[status] += 1
+
+    def _age(self, entry: Optional[dict]) -> Optional[float]:
+        if not entry or "saved_at" not in entry:
+            return None
+        return max(0.0, time.time() - float(entry["saved_at"]))
+
+    def _store(self, key: str, value: Any) -> None:
+        if self.should_cache(value):
+            try:
+                self.disk.put(key, {"saved_at": time.time(), "value": value})
+            except OSError:
+                pass
+
+    def _fetch_locked(self, key: str, fetch: Callable[[], Any]) -> Tuple[Any, str]:
+        """Fetch under the cross-process key lock, unless another process just did."""
+        with self.disk.lock(f"key-{key[:LOCK_STRIPE_CHARS]}"):
+            entry = self.disk.get(key)
+            age = self._age(entry)
+            if age is not None and age < self.ttl_s:
+                return entry["value"], "coalesced"
+            value = fetch()
+            self._store(key, value)
+            return value, "miss"
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Any]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._fetch_locked(key, fetch)
+            except Exception:
+                self._count("error")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        # daemon: a short-lived CLI run must not wait on it; the next expired read refetches
+        threading.Thread(target=run, name="cache-refresh", daemon=True).start()
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Any]) -> Tuple[Any, str]:
+        """Returns (value, status) with status in hit | stale | miss | coalesced."""
+        entry = self.disk.get(key)
+        age = self._age(entry)
+        if age is not None and age < self.ttl_s:
+            self._count("hit")
+            return entry["value"], "hit"
+        if age is not None and age < self.ttl_s + self.stale_s:
+            self._count("stale")
+            self._refresh_in_background(key, fetch)
+            return entry["value"], "stale"
+
+        with self._lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            event.wait()
+            entry = self.disk.get(key)
+            age = self._age(entry)
+            if age is not None and age < self.ttl_s:
+                self._count("coalesced")
+                return entry["value"], "coalesced"
+            # the leader's response was not cacheable (error), so the disk still holds
+            # nothing or an expired entry -> fetch ourselves
+
+        try:
+            value, status = self._fetch_locked(key, fetch)
+        except Exception:
+            self._count("error")
+            raise
+        finally:
+            if leader:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                event.set()
+        self._count(status)
+        return value, status
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
@@ -0,0 +1,112 @@
+"""
+Tiny dependency-graph executor for the matching pipeline.
+
+Each Stage names the stages it depends on; a stage starts on the thread pool as
+soon as all of its dependencies have finished, so independent work (model
+loading vs. text extraction, KeyBERT vs. the job API call, ...) overlaps.
+Every stage gets start/end timestamps relative to the start of the run; an
+optional `around(name)` context manager wraps each stage in its own thread
+(used for per-stage CPU/memory instrumentation), and an optional
+`on_done(name, result)` callback runs in the scheduling thread as each stage
+finishes (used for streaming progress events). Stages run in a copy of the
+caller's context, so context variables (the perf recorder) carry over.
+"""
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, List, NamedTuple, Optional, Tuple
+
+
+class Stage(NamedTuple):
+    name: str
+    deps: Tuple[str, ...]
+    fn: Callable[[Dict[str, Any]], Any]  # receives {dep_name: dep_result}
+
+
+class StageAbort(Exception):
+    """Raised by a stage to stop the run early with a final `result` (e.g. no CV text)."""
+    def __init__(self, result: dict):
+        super().__init__(result.get("error", "aborted"))
+        self.result = result
+        self.record: Optional[dict] = None  # timing of the stage that aborted
+        self.timeline: List[dict] = []
+
+
+def _run_one(stage: Stage, inputs: Dict[str, Any], t0: float,
+             around: Callable[[str], ContextManager]) -> Tuple[Any, dict]:
+    start = time.perf_counter()
+    rec = {"stage": stage.name, "start_ms": round((start - t0) * 1000, 1),
+           "thread": threading.current_thread().name}
+    try:
+        with around(stage.name):
+            return stage.fn(inputs), rec
+    except StageAbort as e:
+        e.record = rec
+        raise
+    finally:
+        end = time.perf_counter()
+        rec["end_ms"] = round((end - t0) * 1000, 1)
+        rec["ms"] = round((end - start) * 1000, 1)
+
+
+def run_stages(stages: List[Stage], max_workers: int = 4,
+               around: Optional[Callable[[str], ContextManager]] = None,
+               on_done: Optional[Callable[[str, Any], None]] = None) -> Tuple[Dict[str, Any], List[dict]]:
+    """
+    Run `stages` respecting their deps. Returns ({name: result}, timeline sorted by start).
+    The first exception stops scheduling and is re-raised (StageAbort carries the timeline).
+    """
+    around = around or (lambda name: nullcontext())
+    names = {s.name for s in stages}
+    for s in stages:
+        missing = [d for d in s.deps if d not in names]
+        if missing:
+            raise ValueError(f"stage {s.name!r} depends on unknown stage(s) {missing}")
+
+    t0 = time.perf_counter()
+    results: Dict[str, Any] = {}
+    timeline: List[dict] = []
+    remaining = {s.name: s for s in stages}
+    running: Dict[Any, str] = {}
+    ex = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage")
+    try:
+        while remaining or running:
+            for name, st in list(remaining.items()):
+                if all(d in results for d in st.deps):
+                    inputs = {d: results[d] for d in st.deps}
+                    running[ex.submit(contextvars.copy_context().run, _run_one, st, inputs, t0, around)] = name
+                    del remaining[name]
+            if not running:
+                raise ValueError(f"dependency cycle between stages {sorted(remaining)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                try:
+                    value, rec = fut.result()
+                except StageAbort as e:
+                    e.timeline = sorted(timeline + [e.record] if e.record else timeline,
+                                        key=lambda r: r["start_ms"])
+                    raise
+                results[name] = value
+                timeline.append(rec)
+                if on_done is not None:
+                    on_done(name, value)
+    finally:
+        ex.shutdown(wait=False, cancel_futures=True)
+    return results, sorted(timeline, key=lambda r: r["start_ms"])
+
+
+def critical_path(stages: List[Stage], timeline: List[dict]) -> List[str]:
+    """Walk back from the last stage to finish, always through the dependency that ended last."""
+    if not timeline:
+        return []
+    ends = {r["stage"]: r["end_ms"] for r in timeline}
+    deps = {s.name: s.deps for s in stages}
+    node = max(ends, key=ends.get)
+    path = [node]
+    while deps.get(node):
+        node = max(deps[node], key=lambda d: ends.get(d, 0.0))
+        path.append(node)
+    return path[::-1]
@@ -0,0 +1,50 @@
+import random
+import re
+
+import pytest
+
+import Job_Matching
+from Job_Matching import _trie_pattern
+
+
+def test_trie_pattern_factors_prefixes():
+    assert _trie_pattern(["india", "indonesia"]) == "ind(?:ia|onesia)"
+    assert _trie_pattern(["niger", "nigeria"]) == "niger(?:ia)?"
+    assert _trie_pattern(["a.b"]) == r"a\.b"
+    assert _trie_pattern([]) == ""
+
+
+def test_trie_pattern_matches_like_the_plain_alternation():
+    rng = random.Random(7)
+    words = sorted({"".join(rng.choice("abc ") for _ in range(rng.randint(1, 6))).strip() or "a"
+                    for _ in range(200)})
+    trie = re.compile(r"(?<!\w)" + _trie_pattern(words) + r"(?!\w)")
+    # longest first, which is what the trie's greedy branches amount to
+    plain = re.compile(r"(?<!\w)(?:" + "|".join(map(re.escape, sorted(words, key=len, reverse=True))) + r")(?!\w)")
+    for _ in range(300):
+        text = "".join(rng.choice("abc .") for _ in range(30))
+        assert [m.span() for m in trie.finditer(text)] == [m.span() for m in plain.finditer(text)], text
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return Job_Matching.country_matcher()
+
+
+def test_find_all_in_text_order(matcher):
+    text = "Worked in Niger, then Nigeria; moved to the United Kingdom. Not in Indiana."
+    assert [(t, c) for _, t, c in matcher.find_all(text)] == [
+        ("niger", "Niger"), ("nigeria", "Nigeria"), ("united kingdom", "United Kingdom")]
+    offset, found, _ = matcher.find_all(text)[2]
+    assert text[offset:offset + len(found)].lower() == found
+
+
+def test_find_all_uses_aliases(matcher):
+    for alias, country in Job_Matching.COUNTRY_ALIASES.items():
+        assert matcher.find_all(f"Based in {alias}.")[-1][2] == country
+
+
+def test_dotted_aliases_match_before_spaces_and_punctuation(matcher):
+    assert [c for _, _, c in matcher.find_all("U.S. Army veteran, then U.K., now the U.S.A.")] == \
+        ["United States", "United Kingdom", "United States"]
+    assert matcher.find_all("Focus on usability and business") == []
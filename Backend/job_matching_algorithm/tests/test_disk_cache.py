@@ -0,0 +1,100 @@
+import os
+import json
+import threading
+import time
+
+import pytest
+
+import disk_cache
+from disk_cache import DiskCache
+
+
+def entry_files(root):
+    return sorted(fn for _, _, files in os.walk(root) for fn in files if not fn.startswith("."))
+
+
+def test_round_trip_and_layout(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=0)
+    key = "ab" + "0" * 62
+    cache.put(key, {"text": "Colombo – Sri Lanka", "n": [1, 2]})
+    assert cache.get(key) == {"text": "Colombo – Sri Lanka", "n": [1, 2]}
+    path = tmp_path / "ab" / f"{key}.json"
+    assert json.loads(path.read_text(encoding="utf-8"))["n"] == [1, 2]
+    assert entry_files(tmp_path) == [f"{key}.json"]  # no temp files left behind
+
+
+def test_missing_and_corrupt_entries_read_as_none(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=0)
+    assert cache.get("cd" + "1" * 62) is None
+    key = "cd" + "2" * 62
+    cache.put(key, {"a": 1})
+    (tmp_path / "cd" / f"{key}.json").write_text('{"a": ', encoding="utf-8")
+    assert cache.get(key) is None
+
+
+def test_failed_write_keeps_the_old_entry(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=0)
+    key = "ef" + "3" * 62
+    cache.put(key, {"v": 1})
+    with pytest.raises(TypeError):
+        cache.put(key, {"v": object()})
+    assert cache.get(key) == {"v": 1}
+    assert entry_files(tmp_path) == [f"{key}.json"]
+
+
+def test_evict_drops_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=0)
+    keys = [f"{i:02x}" + "4" * 62 for i in range(10)]
+    for i, key in enumerate(keys):
+        cache.put(key, {"pad": "x" * 100})
+        t = time.time() - 100 + i
+        os.utime(cache._path(key), (t, t))
+    cache.get(keys[0])  # a hit makes the oldest entry the newest
+    size = os.path.getsize(cache._path(keys[0]))
+    cache.max_bytes = 5 * size
+    removed = cache.evict()
+    assert removed == 6  # down to 90% of max_bytes: 4 entries
+    assert [k for k in keys if cache.get(k) is not None] == [keys[0], *keys[7:]]
+
+
+def test_puts_do_not_walk_the_directory_every_time(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path), max_bytes=10 ** 9)
+    walks = []
+    real = cache._entries
+    monkeypatch.setattr(cache, "_entries", lambda: walks.append(1) or real())
+    for i in range(200):
+        cache.put(f"{i:064x}", {"i": i})
+    assert len(walks) == 1  # the first put measures the directory, the rest add to the total
+
+    monkeypatch.setattr(disk_cache, "EVICT_INTERVAL_S", 0.0)
+    cache.put("f" * 64, {"i": -1})
+    assert len(walks) == 2  # ... until the interval has passed
+
+
+def test_total_over_max_bytes_triggers_eviction(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=2000)
+    for i in range(100):
+        cache.put(f"{i:064x}", {"pad": "x" * 100})
+    total = sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(tmp_path)
+                for f in fs if f.endswith(".json"))
+    assert total <= 2000
+
+
+def test_file_lock_is_exclusive(tmp_path):
+    path = str(tmp_path / "locks" / ".x.lock")
+    order = []
+    held = threading.Event()
+
+    def other():
+        held.wait()
+        with disk_cache.file_lock(path):
+            order.append("other")
+
+    t = threading.Thread(target=other)
+    t.start()
+    with disk_cache.file_lock(path):
+        held.set()
+        time.sleep(0.2)
+        order.append("first")
+    t.join(5)
+    assert order == ["first", "other"]
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+import Job_Matching
+from job_index import JobIndex
+
+PAGE = Job_Matching.FETCH_PAGE_SIZE
+
+
+@pytest.fixture(autouse=True)
+def local_stores(tmp_path, monkeypatch):
+    # job features go to a throwaway index, not the shared cache directory
+    monkeypatch.setattr(Job_Matching, "_JOB_INDEX", JobIndex(str(tmp_path / "jobs.sqlite3")))
+    monkeypatch.setattr(Job_Matching, "FETCH_MAX_QUERIES", 3)
+    monkeypatch.setattr(Job_Matching, "FETCH_MAX_PAGES", 3)
+    monkeypatch.setattr(Job_Matching, "FETCH_CONCURRENCY", 2)
+
+
+class StubApi:
+    """Answers search bodies from {(q, page): hits}; records every call."""
+
+    def __init__(self, pages, delay=0.0, fail=()):
+        self.pages, self.delay, self.fail = pages, delay, set(fail)
+        self.calls, self.lock = [], threading.Lock()
+        self.in_flight = self.max_in_flight = 0
+
+    def __call__(self, body):
+        key = (body.get("q"), body["from"] // PAGE)
+        with self.lock:
+            self.calls.append(key)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if key in self.fail:
+                raise ConnectionError("reset")
+            return {"ok": True, "hits": self.pages.get(key, [])}, "miss"
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def hits(prefix, n, title="Data Analyst"):
+    return [{"id": f"{prefix}-{i}", "title": title, "description": ""} for i in range(n)]
+
+
+ROLE, TERMS = "Data Analyst", ["Data Analyst", "Business Data Analyst", "Reporting Analyst"]
+
+
+def fetch(monkeypatch, api, target=10 ** 6):
+    monkeypatch.setattr(Job_Matching, "call_api_jobs_cached", api)
+    monkeypatch.setattr(Job_Matching, "FETCH_TARGET_RESULTS", target)
+    return Job_Matching.fetch_jobs("Sri Lanka", ROLE, TERMS, years_exp=5)
+
+
+def test_queries_are_the_role_then_the_longest_synonyms():
+    assert Job_Matching.search_queries_for(ROLE, TERMS + ["DA"]) == \
+        ["Data Analyst", "Business Data Analyst", "Reporting Analyst"]
+    assert Job_Matching.search_queries_for(None, TERMS) == [None]
+
+
+def test_page_zero_of_every_query_goes_first_and_short_pages_end_a_query(monkeypatch):
+    api = StubApi({("Data Analyst", 0): hits("a0", PAGE), ("Data Analyst", 1): hits("a1", 3),
+                   ("Business Data Analyst", 0): hits("b0", 2),
+                   ("Reporting Analyst", 0): hits("r0", PAGE), ("Reporting Analyst", 1): hits("r1", 0)})
+    data, dbg = fetch(monkeypatch, api)
+    assert set(api.calls[:3]) == {("Data Analyst", 0), ("Business Data Analyst", 0), ("Reporting Analyst", 0)}
+    assert sorted(api.calls) == sorted([("Data Analyst", 0), ("Business Data Analyst", 0), ("Reporting Analyst", 0),
+                                        ("Data Analyst", 1), ("Reporting Analyst", 1)])
+    assert api.max_in_flight <= 2
+    assert [h["id"] for h in data["hits"]][:2] == ["a0-0", "a0-1"]
+    assert len(data["hits"]) == 2 * PAGE + 2 + 3  # (page, query) order
+    assert dbg["requests_started"] == dbg["requests_done"] == 5 and dbg["early_stop"] is False
+    assert "requests_skipped" not in dbg
+
+
+def test_duplicates_across_queries_are_removed(monkeypatch):
+    same = hits("x", 5)
+    moved = [{"title": "Data Analyst", "hiringOrganizationName": "Acme", "url": f"https://a/{i}"} for i in range(2)]
+    api = StubApi({("Data Analyst", 0): same + moved[:1], ("Business Data Analyst", 0): same,
+                   ("Reporting Analyst", 0): moved[1:]})
+    data, dbg = fetch(monkeypatch, api)
+    assert len(data["hits"]) == 6 and dbg["duplicates_removed"] == 6  # same title + company counts too
+
+
+def test_early_stop_submits_no_more_requests(monkeypatch):
+    pages = {(q, p): hits(f"{q}{p}", PAGE) for q in TERMS for p in range(3)}
+    api = StubApi(pages, delay=0.05)
+    data, dbg = fetch(monkeypatch, api, target=10)
+    assert dbg["early_stop"] is True
+    # the first response is enough: only the requests already in flight were started
+    assert dbg["requests_started"] == 2 == len(api.calls) and dbg["requests_planned"] == 9
+    assert dbg["requests_abandoned"] + dbg["requests_done"] == 2
+    assert dbg["requests_skipped"] >= 1
+    time.sleep(0.2)
+    assert len(api.calls) == 2  # nothing queued behind the stop
+
+
+def test_errors_are_reported_per_request(monkeypatch):
+    api = StubApi({("Business Data Analyst", 0): hits("b", 4)}, fail={("Data Analyst", 0), ("Reporting Analyst", 0)})
+    data, dbg = fetch(monkeypatch, api)
+    assert data["ok"] is True and len(data["hits"]) == 4 and "error" not in data
+    assert sorted(e["query"] for e in dbg["errors"]) == ["Data Analyst", "Reporting Analyst"]
+
+    api = StubApi({}, fail={(q, 0) for q in TERMS})
+    data, _ = fetch(monkeypatch, api)
+    assert data["ok"] is False and data["error"] == "ConnectionError: reset"
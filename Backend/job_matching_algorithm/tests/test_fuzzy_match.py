@@ -0,0 +1,33 @@
+from rapidfuzz import fuzz
+
+import fuzzy_match
+from fuzzy_match import ChoiceMatcher
+
+
+def test_best_returns_label_score_and_index():
+    m = ChoiceMatcher(["Software Engineer", "Data Analyst"], labels=["swe", "da"])
+    label, score, idx = m.best("software enginer", fuzz.ratio)
+    assert (label, idx) == ("swe", 0) and 90 < score < 100
+    assert m.best("plumber", fuzz.ratio, score_cutoff=80) is None
+    assert ChoiceMatcher([]).best("anything", fuzz.ratio) is None
+
+
+def test_matching_is_case_insensitive_by_default():
+    m = ChoiceMatcher(["Colombo"])
+    assert m.best("COLOMBO", fuzz.ratio)[1] == 100
+    assert ChoiceMatcher(["Colombo"], processor=None).best("COLOMBO", fuzz.ratio)[1] < 100
+
+
+def test_max_scores_matches_best_for_every_query(monkeypatch):
+    choices = ["backend developer", "frontend developer", "data scientist", "qa engineer"]
+    queries = ["Backend Developer", "Data Scientist II", "qa engineer", "Backend Developer", "chef"]
+    m = ChoiceMatcher(choices)
+    expected = [(m.best(q, fuzz.token_set_ratio, 60) or (None, 0.0))[1] for q in queries]
+    assert m.max_scores(queries, fuzz.token_set_ratio, 60) == expected
+    monkeypatch.setattr(fuzzy_match, "PARALLEL_MIN_PAIRS", 1)  # same result on the threaded path
+    assert m.max_scores(queries, fuzz.token_set_ratio, 60) == expected
+
+
+def test_max_scores_edge_cases():
+    assert ChoiceMatcher(["a"]).max_scores([], fuzz.ratio) == []
+    assert ChoiceMatcher([]).max_scores(["a", "b"], fuzz.ratio) == [0.0, 0.0]
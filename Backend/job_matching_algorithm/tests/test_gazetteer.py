@@ -0,0 +1,174 @@
+import gzip
+import os
+
+import pytest
+
+import gazetteer
+from gazetteer import Gazetteer, compile_index, normalize, open_gazetteer
+
+SEED_ROWS = [
+    # name, country, kind, population, alternate names
+    ("Sri Lanka", "Sri Lanka", "country", 21_000_000, []),
+    ("United States", "United States", "country", 330_000_000, ["USA"]),
+    ("Georgia", "Georgia", "country", 3_700_000, []),
+    ("Colombo", "Sri Lanka", "city", 648_034, ["Kolamba"]),
+    ("Kandy", "Sri Lanka", "city", 111_701, []),
+    ("São Paulo", "Brazil", "city", 12_400_000, ["Sao Paulo"]),
+    ("Santa Clara", "Cuba", "city", 250_512, []),
+    ("Santa Clara", "United States", "city", 126_215, []),
+    ("Mobile", "United States", "city", 195_111, []),
+    ("Atlanta", "United States", "city", 498_715, []),
+    ("New York", "United States", "city", 8_804_190, ["NYC"]),
+    ("York", "United Kingdom", "city", 153_717, []),
+    ("London", "United Kingdom", "city", 8_961_989, []),
+    ("London", "Canada", "city", 383_822, []),
+    ("Londonderry", "United Kingdom", "city", 83_652, []),
+    ("California", "United States", "admin", 0, []),
+    ("Alabama", "United States", "admin", 0, []),
+    ("Georgia", "United States", "admin", 0, []),
+    ("Western Province", "Sri Lanka", "admin", 0, ["Western"]),
+]
+
+
+def write_seed(path, rows):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("# name\tcountry\tkind\tpopulation\talternate names\n")
+        for name, country, kind, pop, alts in rows:
+            f.write(f"{name}\t{country}\t{kind}\t{pop}\t{'|'.join(alts)}\n")
+
+
+@pytest.fixture
+def seed(tmp_path):
+    path = str(tmp_path / "seed.tsv.gz")
+    write_seed(path, SEED_ROWS)
+    return path
+
+
+@pytest.fixture
+def gaz(seed, tmp_path):
+    out = str(tmp_path / "g.idx")
+    compile_index(seed, out)
+    g = Gazetteer(out)
+    yield g
+    g.close()
+
+
+def test_normalize():
+    assert normalize("São Paulo") == "sao paulo"
+    assert normalize("  New-York,  NY ") == "new york ny"
+    assert normalize("") == ""
+    assert normalize(None) == ""
+
+
+def test_read_seed_skips_comments(seed):
+    rows = list(gazetteer.read_seed(seed))
+    assert len(rows) == len(SEED_ROWS)
+    assert rows[3] == ("Colombo", "Sri Lanka", "city", 648_034, ["Kolamba"])
+
+
+def test_compile_counts(seed, tmp_path):
+    info = compile_index(seed, str(tmp_path / "g.idx"))
+    assert info["places"] == len(SEED_ROWS)
+    assert info["countries"] == 7
+    assert info["bytes"] == os.path.getsize(tmp_path / "g.idx")
+
+
+def test_every_name_is_found_by_binary_search(gaz):
+    for name, country, kind, _, alts in SEED_ROWS:
+        assert any(p.country == country and p.kind == kind for p in gaz.lookup(name)), name
+        for alt in alts:
+            assert any(p.country == country for p in gaz.lookup(alt)), alt
+
+
+def test_missing_names(gaz):
+    # same group (first letter, length) as existing keys, and groups that do not exist
+    assert gaz.lookup("Colomba") == []
+    assert gaz.lookup("Kandx") == []
+    assert gaz.lookup("Zzz") == []
+    assert gaz.lookup("") == []
+    assert gaz._best_entry(b"aaaaaaaaaaaaaaaaaaaaaaaaaaaaaa") is None
+
+
+def test_shared_name_ranked_by_weight(gaz):
+    assert [p.country for p in gaz.lookup("London")] == ["United Kingdom", "Canada"]
+    assert [p.country for p in gaz.lookup("Santa Clara")] == ["Cuba", "United States"]
+    # a country outweighs the region of the same name
+    assert [(p.country, p.kind) for p in gaz.lookup("Georgia")] == [("Georgia", "country"),
+                                                                    ("United States", "admin")]
+
+
+def test_alternate_names(gaz):
+    assert gaz.lookup("Kolamba")[0].name == "Colombo"
+    assert gaz.lookup("Kolamba", primary_only=True) == []
+    assert gaz.lookup("sao paulo")[0].name == "São Paulo"  # accents folded at compile time too
+
+
+def test_candidates_and_resolve(gaz):
+    assert gaz.candidates("Lndon")[0][0].name == "London"
+    assert gaz.candidates("Kan") == []  # shorter than FUZZY_MIN_CHARS
+    assert gaz.resolve("Colombo 07").name == "Colombo"
+    assert gaz.resolve("Kandy, Central Province").name == "Kandy"
+    assert gaz.resolve("Colmbo").name == "Colombo"
+    assert gaz.resolve("Qwertyuiop") is None
+    assert gaz.resolve("") is None
+
+
+def places(gaz, text):
+    return [(s, p.country, p.kind) for s, p in gaz.find_places(text)]
+
+
+def test_find_places_prefers_longest_run(gaz):
+    assert places(gaz, "Moved to New York in 2020") == [("New York", "United States", "city")]
+    assert places(gaz, "Born in York.") == [("York", "United Kingdom", "city")]
+
+
+def test_find_places_ignores_lowercase_and_acronyms(gaz):
+    assert places(gaz, "london and KANDY") == []
+
+
+def test_find_places_uses_the_text_context(gaz):
+    assert places(gaz, "Santa Clara office") == [("Santa Clara", "Cuba", "city")]
+    assert places(gaz, "Santa Clara office. Earlier: California") == [
+        ("Santa Clara", "United States", "city"), ("California", "United States", "admin")]
+    assert places(gaz, "Atlanta, Georgia") == [
+        ("Atlanta", "United States", "city"), ("Georgia", "United States", "admin")]
+    assert places(gaz, "London, Sri Lanka")[0][1] == "United Kingdom"  # no London in Sri Lanka
+
+
+def test_find_places_gates_common_words(gaz):
+    assert places(gaz, "Built Mobile apps") == []
+    assert places(gaz, "Mobile, Alabama")[0] == ("Mobile", "United States", "city")
+    assert places(gaz, "Location: Mobile") == [("Mobile", "United States", "city")]
+
+
+def test_bad_file_is_rejected(tmp_path):
+    bad = tmp_path / "bad.idx"
+    bad.write_bytes(b"\0" * 256)
+    with pytest.raises(ValueError):
+        Gazetteer(str(bad))
+
+
+def test_open_gazetteer_compiles_once_per_seed(seed, tmp_path):
+    path = str(tmp_path / "cache" / "g.idx")
+    g1 = open_gazetteer(path, seed)
+    first = g1.path
+    g2 = open_gazetteer(path, seed)
+    assert g2.path == first  # reused, not recompiled
+    assert os.path.basename(first).startswith("g-") and first.endswith(".idx")
+
+    write_seed(seed, SEED_ROWS + [("Gampaha", "Sri Lanka", "city", 0, [])])
+    g3 = open_gazetteer(path, seed)
+    assert g3.path != first and g3.lookup("Gampaha")
+    assert g1.lookup("Colombo")  # the old mapping still works while it is open
+    for g in (g1, g2, g3):
+        g.close()
+
+
+def test_open_gazetteer_falls_back_to_temp_dir(seed, tmp_path, monkeypatch):
+    blocker = tmp_path / "file"
+    blocker.write_text("not a directory")
+    monkeypatch.setattr(gazetteer.tempfile, "gettempdir", lambda: str(tmp_path / "tmp"))
+    g = open_gazetteer(str(blocker / "g.idx"), seed)
+    assert g.path.startswith(str(tmp_path / "tmp"))
+    assert g.resolve("Kandy").country == "Sri Lanka"
+    g.close()
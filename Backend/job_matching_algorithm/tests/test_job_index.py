@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+import Job_Matching
+from job_index import JobIndex, fts_query
+
+
+@pytest.fixture
+def idx(tmp_path):
+    return JobIndex(str(tmp_path / "jobs.sqlite3"))
+
+
+def posting(key, title, description="", country="Sri Lanka", years=None, **extra):
+    return {"key": key, "title": title, "description": description, "country": country,
+            "required_years": years, "payload": {"id": key, "title": title, **extra}}
+
+
+def test_fts_query():
+    assert fts_query(["Software Engineer", "C++ developer", "software engineer!", "", None]) == \
+        '"software engineer" OR "c developer"'
+    assert fts_query([]) == ""
+
+
+def test_search_ranks_title_matches_first(idx):
+    idx.upsert([
+        posting("a", "Accountant", "Work with our software engineer team on budgets"),
+        posting("b", "Senior Software Engineer", "Build services"),
+        posting("c", "Chef", "Cook"),
+    ])
+    assert [h["id"] for h in idx.search(["software engineer"])] == ["b", "a"]
+    assert idx.search(["   "]) == []
+
+
+def test_search_filters(idx):
+    old = time.time() - 3 * 86400
+    idx.upsert([posting("a", "Data Analyst", country="Sri Lanka", years=2),
+                posting("b", "Data Analyst", country="India", years=None),
+                posting("c", "Data Analyst", country="sri lanka", years=8)])
+    idx.upsert([posting("d", "Data Analyst", country="Sri Lanka", years=1)], fetched_at=old)
+    ids = lambda **kw: sorted(h["id"] for h in idx.search(["data analyst"], **kw))
+    assert ids(country="Sri Lanka") == ["a", "c", "d"]  # country is case-insensitive
+    assert ids(max_years=3) == ["a", "b", "d"]          # unknown years are kept
+    assert ids(max_age_s=86400) == ["a", "b", "c"]
+    assert ids(limit=1) and len(ids(limit=1)) == 1
+
+
+def test_upsert_updates_in_place_and_keeps_a_known_country(idx):
+    idx.upsert([posting("a", "Nurse", country="Kenya")])
+    idx.upsert([posting("a", "Registered Nurse", country=None)])
+    assert idx.stats()["jobs"] == 1
+    assert [h["title"] for h in idx.search(["registered nurse"], country="Kenya")] == ["Registered Nurse"]
+    assert idx.search(["plumber"]) == []
+    assert idx.upsert([{"title": "no key"}]) == 0
+
+
+def test_features_and_embeddings_round_trip(idx):
+    assert idx.put_features([("k1", {"required_years": 3.0, "title_norm": "data analyst",
+                                     "role": "Data Analyst", "seniority": "mid"})]) == 1
+    assert idx.get_features(["k1", "k2"]) == {"k1": {"required_years": 3.0, "title_norm": "data analyst",
+                                                     "role": "Data Analyst", "seniority": "mid"}}
+    vec = bytes(range(16))
+    idx.put_embeddings([("model:k1", vec)])
+    assert idx.get_embeddings(["model:k1", "model:k2"]) == {"model:k1": vec}
+    keys = [f"k{i}" for i in range(1200)]  # more than one IN (...) query
+    idx.put_features([(k, {"role": k}) for k in keys])
+    assert len(idx.get_features(keys)) == 1200
+
+
+def test_expire_drops_old_rows(idx):
+    idx.upsert([posting("a", "Welder")], fetched_at=time.time() - 100)
+    idx.upsert([posting("b", "Welder")])
+    idx.put_embeddings([("m:a", b"\0" * 4)])
+    assert idx.expire(50) == 1
+    assert [h["id"] for h in idx.search(["welder"])] == ["b"]
+    assert idx.maybe_expire(50) is None  # ran just now
+    assert idx.expire(-1) == 1 and idx.get_embeddings(["m:a"]) == {}
+
+
+@pytest.mark.parametrize("hit, country", [
+    ({"country": "sri lanka"}, "Sri Lanka"),
+    ({"countryCode": "India", "location": "Colombo"}, "India"),
+    ({"location": "Remote - Colombo, Sri Lanka"}, "Sri Lanka"),
+    ({"title": "Engineer"}, None),
+])
+def test_hit_country(hit, country):
+    assert Job_Matching.hit_country(hit) == country
+
+
+def test_index_job_hits_stores_each_posting_under_its_own_country(idx, monkeypatch):
+    monkeypatch.setattr(Job_Matching, "_JOB_INDEX", idx)
+    hits = [{"job_id": "1", "title": "Teacher", "description": "", "country": "India"},
+            {"job_id": "2", "title": "Teacher", "description": ""}]
+    assert Job_Matching.index_job_hits(hits, "Sri Lanka")["upserted"] == 2
+    assert [h["job_id"] for h in idx.search(["teacher"], country="India")] == ["1"]
+    assert [h["job_id"] for h in idx.search(["teacher"], country="Sri Lanka")] == ["2"]
@@ -0,0 +1,136 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import perf
+from stage_graph import Stage, run_stages
+
+
+@pytest.fixture(autouse=True)
+def no_run():
+    yield
+    perf.stop()
+
+
+def test_recorder_snapshot():
+    rec = perf.Recorder()
+    with rec.stage("text"):
+        time.sleep(0.01)
+    with rec.stage("text"):
+        pass
+    rec.count("pages", 3)
+    rec.count("pages")
+    for v in [5, 1, 3, 2, 4]:
+        rec.observe("http_ms", v)
+    snap = rec.finish()
+    assert snap["stages"]["text"]["calls"] == 2 and snap["stages"]["text"]["wall_ms"] >= 10
+    assert snap["counters"] == {"pages": 4}
+    assert snap["samples"]["http_ms"] == {"count": 5, "sum": 15, "min": 1, "max": 5, "p50": 3, "p95": 5}
+    rec.count("late")
+    assert rec.snapshot() is snap  # finished: later reports do not change the result
+
+
+def test_disabled_runs_use_the_null_recorder():
+    assert perf.start(enabled=False) is perf.NULL_RECORDER
+    with perf.current().stage("x"):
+        perf.current().count("y")
+    assert perf.stop() is perf.NULL_RECORDER
+
+
+def test_start_and_stop():
+    assert perf.current() is perf.NULL_RECORDER
+    rec = perf.start(enabled=True)
+    assert perf.current() is rec
+    assert perf.stop() is rec and perf.current() is perf.NULL_RECORDER
+
+
+def test_threads_report_into_the_run_that_started_them():
+    rec = perf.start(enabled=True)
+    with ThreadPoolExecutor(2) as ex:
+        list(ex.map(perf.in_context(lambda n: perf.current().count("page")), range(6)))
+    stages = [Stage("a", (), lambda r: perf.current().count("stage")),
+              Stage("b", ("a",), lambda r: perf.current().count("stage"))]
+    run_stages(stages, max_workers=2)
+    perf.stop()
+    assert rec.snapshot()["counters"] == {"page": 6, "stage": 2}
+
+
+def test_work_that_outlives_a_run_does_not_report_into_the_next_one():
+    release, done = threading.Event(), threading.Event()
+
+    def background():
+        release.wait(5)
+        perf.current().count("late")
+        done.set()
+
+    first = perf.start(enabled=True)
+    ex = ThreadPoolExecutor(1)
+    ex.submit(perf.in_context(background))
+    perf.stop()
+    second = perf.start(enabled=True)
+    release.set()
+    assert done.wait(5)
+    ex.shutdown()
+    assert first.counters == {"late": 1}
+    assert second.counters == {}
+
+
+def test_concurrent_runs_in_threads_are_separate():
+    recs = {}
+
+    def run(name):
+        recs[name] = perf.start(enabled=True)
+        with ThreadPoolExecutor(2) as ex:
+            list(ex.map(perf.in_context(lambda _: perf.current().count(name)), range(50)))
+        perf.stop()
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in ("a", "b")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert recs["a"].counters == {"a": 50} and recs["b"].counters == {"b": 50}
+
+
+SNAP = {
+    "wall_ms": 1500.0, "cpu_ms": 250.0, "rss_mb": {"start": 100.0, "end": 200.0, "peak": 256.0},
+    "stages": {"text": {"calls": 1, "wall_ms": 800.0, "cpu_ms": 100.0},
+               "nlp": {"calls": 2, "wall_ms": 500.0, "cpu_ms": 120.5}},
+    "counters": {"cache.api.hit": 2, 'odd "name"': 1},
+    "samples": {"http.job_api_ms": {"count": 3, "sum": 90.5, "min": 10, "max": 50, "p50": 30, "p95": 50}},
+}
+
+
+def test_prometheus_format():
+    text = perf.to_prometheus(SNAP, labels={"outcome": "ok"}, timestamp_ms=1700000000000)
+    lines = text.splitlines()
+    assert text.endswith("\n")
+    assert 'job_matching_stage_wall_seconds{outcome="ok",stage="text"} 0.8 1700000000000' in lines
+    assert 'job_matching_events_total{event="cache.api.hit",outcome="ok"} 2 1700000000000' in lines
+    assert 'job_matching_events_total{event="odd \\"name\\"",outcome="ok"} 1 1700000000000' in lines
+    assert 'job_matching_rss_peak_bytes{outcome="ok"} 268435456 1700000000000' in lines
+
+    sample = re.compile(r'^job_matching_[a-z_]+(\{[^}]*\})? -?[0-9.e+-]+ \d+$')
+    seen, family = [], None
+    for line in lines:
+        if line.startswith("# HELP "):
+            family = line.split()[2]
+            assert family not in seen  # one HELP/TYPE pair per family
+            seen.append(family)
+        elif line.startswith("# TYPE "):
+            assert line.split()[2] == family and line.split()[3] in ("gauge", "counter")
+        else:
+            assert sample.match(line), line
+            assert line.split("{")[0].split(" ")[0] == family  # samples follow their own header
+    assert "job_matching_events_total" in seen and "job_matching_stage_calls" in seen
+
+
+def test_append_metrics(tmp_path):
+    path = tmp_path / "m" / "metrics.prom"
+    perf.append_metrics(str(path), SNAP)
+    perf.append_metrics(str(path), SNAP)
+    text = path.read_text()
+    assert text.count("# TYPE job_matching_run_wall_seconds gauge") == 2
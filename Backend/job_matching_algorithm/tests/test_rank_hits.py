@@ -0,0 +1,105 @@
+import types
+
+import pytest
+
+import Job_Matching
+from job_index import JobIndex
+
+CV = "Data analyst: SQL, dashboards, reporting."
+
+
+class StubEncoder:
+    """KeyBERT-shaped: kb.model.embed(texts) -> vectors, from the first word that names one."""
+
+    VECTORS = {"data": [1.0, 0.0, 0.0], "analyst": [0.8, 0.6, 0.0],
+               "nurse": [0.0, 0.0, 1.0], "chef": [0.6, 0.8, 0.0]}
+
+    def __init__(self):
+        self.calls = []
+        self.model = types.SimpleNamespace(embed=self.embed)
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        out = []
+        for t in texts:
+            words = [w.strip(".:,").lower() for w in t.split()]
+            out.append(next((self.VECTORS[w] for w in words if w in self.VECTORS), [1.0, 1.0, 1.0]))
+        return [[3 * x for x in v] for v in out]  # not unit length: rank_hits normalizes
+
+
+@pytest.fixture(autouse=True)
+def local_stores(tmp_path, monkeypatch):
+    monkeypatch.setattr(Job_Matching, "_JOB_INDEX", JobIndex(str(tmp_path / "jobs.sqlite3")))
+    monkeypatch.setattr(Job_Matching, "_JOB_EMBEDDINGS", Job_Matching.MemoryLRU(100))
+    monkeypatch.setattr(Job_Matching, "JOB_FEATURE_STORE_ENABLED", True)
+
+    def no_model():
+        raise AssertionError("the model should not be loaded")
+    monkeypatch.setattr(Job_Matching, "load_keybert", no_model)
+
+
+def job(jid, title, description=""):
+    return {"id": jid, "title": title, "description": description}
+
+
+HITS = [job("n", "Nurse"), job("a", "Analyst, BI"), job("c", "Chef"), job("d", "Data Engineer")]
+
+
+def test_ranks_by_similarity_to_the_cv_in_one_batch():
+    kb = StubEncoder()
+    ranked, debug, cv_vector = Job_Matching.rank_hits(kb, CV, HITS)
+
+    assert [h["id"] for h in ranked] == ["d", "a", "c", "n"]
+    assert [h["match_score"] for h in ranked] == [1.0, 0.8, 0.6, 0.0]
+    assert len(kb.calls) == 1 and kb.calls[0][0] == CV  # CV first, then every job
+    assert len(kb.calls[0]) == 1 + len(HITS)
+    assert cv_vector == [1.0, 0.0, 0.0]  # normalized, ready to be cached with the CV
+    assert (debug["encoded"], debug["stored"], debug["cached"], debug["cv_cached"]) == (4, 0, 0, False)
+    assert HITS[0].get("match_score") is None  # the input hits are left alone
+
+
+def test_cached_cv_vector_and_stored_embeddings_need_no_model():
+    _, _, cv_vector = Job_Matching.rank_hits(StubEncoder(), CV, HITS)
+    # a fresh process: nothing in memory, everything in the job index
+    Job_Matching._JOB_EMBEDDINGS = Job_Matching.MemoryLRU(100)
+
+    ranked, debug, returned = Job_Matching.rank_hits(None, CV, HITS, cv_vector=cv_vector)
+
+    assert [h["id"] for h in ranked] == ["d", "a", "c", "n"]
+    assert (debug["encoded"], debug["stored"], debug["cached"], debug["cv_cached"]) == (0, 4, 0, True)
+    assert returned is cv_vector
+
+
+def test_only_new_or_edited_jobs_are_encoded():
+    kb = StubEncoder()
+    _, _, cv_vector = Job_Matching.rank_hits(kb, CV, HITS)
+    edited = job("n", "Nurse", "Night shifts")
+    hits = HITS[1:] + [edited, job("x", "Chef de partie")]
+
+    ranked, debug, _ = Job_Matching.rank_hits(kb, CV, hits, cv_vector=cv_vector)
+
+    assert kb.calls[1] == [Job_Matching.job_rank_text(edited), "Chef de partie. "]
+    assert (debug["encoded"], debug["cached"]) == (2, 3)
+    assert [h["id"] for h in ranked][:2] == ["d", "a"]
+
+
+def test_ties_keep_api_order():
+    hits = [job("c1", "Chef"), job("n", "Nurse"), job("c2", "Chef")]
+    ranked, _, _ = Job_Matching.rank_hits(StubEncoder(), "Chef", hits)
+    assert [h["id"] for h in ranked] == ["c1", "c2", "n"]
+
+
+def test_encoder_failure_keeps_api_order():
+    kb = StubEncoder()
+    kb.model.embed = lambda texts: (_ for _ in ()).throw(RuntimeError("CUDA out of memory"))
+
+    ranked, debug, cv_vector = Job_Matching.rank_hits(kb, CV, HITS, cv_vector=None)
+
+    assert ranked is HITS
+    assert debug["error"] == "RuntimeError: CUDA out of memory"
+    assert cv_vector is None
+
+
+def test_nothing_to_rank():
+    assert Job_Matching.rank_hits(None, CV, [])[0] == []
+    assert Job_Matching.rank_hits(None, "", HITS)[0] is HITS
@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+
+import pytest
+
+from disk_cache import DiskCache
+from response_cache import ResponseCache
+
+
+@pytest.fixture
+def disk(tmp_path):
+    return DiskCache(str(tmp_path), max_bytes=0)
+
+
+def age_entry(disk, key, seconds):
+    entry = disk.get(key)
+    entry["saved_at"] -= seconds
+    disk.put(key, entry)
+
+
+def wait_for(cond, timeout=5):
+    deadline = time.time() + timeout
+    while not cond() and time.time() < deadline:
+        time.sleep(0.01)
+    return cond()
+
+
+def test_miss_then_hit(disk):
+    cache = ResponseCache(disk, ttl_s=60, stale_s=60)
+    key = cache.key_for("jobs", "python", "LK")
+    assert cache.get_or_fetch(key, lambda: {"hits": [1]}) == ({"hits": [1]}, "miss")
+    assert cache.get_or_fetch(key, lambda: pytest.fail("fetched again")) == ({"hits": [1]}, "hit")
+    assert disk.get(key)["value"] == {"hits": [1]}
+    assert cache.snapshot()["hit"] == cache.snapshot()["miss"] == 1
+
+
+def test_stale_is_served_and_refreshed_in_background(disk):
+    cache = ResponseCache(disk, ttl_s=60, stale_s=600)
+    key = cache.key_for("k")
+    cache.get_or_fetch(key, lambda: "old")
+    age_entry(disk, key, 120)
+    assert cache.get_or_fetch(key, lambda: "new") == ("old", "stale")
+    assert wait_for(lambda: disk.get(key)["value"] == "new")
+    assert cache.get_or_fetch(key, lambda: "newer") == ("new", "hit")
+
+
+def test_too_old_is_a_miss(disk):
+    cache = ResponseCache(disk, ttl_s=60, stale_s=60)
+    key = cache.key_for("k")
+    cache.get_or_fetch(key, lambda: "old")
+    age_entry(disk, key, 600)
+    assert cache.get_or_fetch(key, lambda: "new") == ("new", "miss")
+
+
+def test_uncacheable_values_are_not_stored(disk):
+    cache = ResponseCache(disk, ttl_s=60, stale_s=60, should_cache=lambda v: "error" not in v)
+    key = cache.key_for("k")
+    assert cache.get_or_fetch(key, lambda: {"error": "429"}) == ({"error": "429"}, "miss")
+    assert disk.get(key) is None
+
+
+def test_fetch_errors_propagate_and_are_counted(disk):
+    cache = ResponseCache(disk, ttl_s=60, stale_s=60)
+
+    def boom():
+        raise RuntimeError("down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_fetch(cache.key_for("k"), boom)
+    assert cache.snapshot()["error"] == 1
+
+
+def test_concurrent_callers_share_one_fetch(disk):
+    cache = ResponseCache(disk, ttl_s=60, stale_s=60)
+    key = cache.key_for("k")
+    calls, release = [], threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch(key, slow)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    assert wait_for(lambda: len(calls) == 1)
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert len(calls) == 1
+    assert sorted(status for _, status in results) == ["coalesced"] * 7 + ["miss"]
+    assert {value for value, _ in results} == {"value"}
+
+
+def test_followers_refetch_when_the_leader_result_was_not_cached(disk):
+    cache = ResponseCache(disk, ttl_s=60, stale_s=60, should_cache=lambda v: v != "error")
+    key = cache.key_for("k")
+    answers, release = iter(["error", "ok"]), threading.Event()
+
+    def fetch():
+        release.wait(5)
+        return next(answers)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch(key, fetch)))
+               for _ in range(2)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert sorted(results) == [("error", "miss"), ("ok", "miss")]
+
+
+def test_lock_files_are_a_fixed_set(disk):
+    cache = ResponseCache(disk, ttl_s=60, stale_s=60)
+    for i in range(600):
+        cache.get_or_fetch(cache.key_for(str(i)), lambda: i)
+    locks = [fn for fn in os.listdir(disk.root) if fn.endswith(".lock")]
+    assert 0 < len(locks) <= 256
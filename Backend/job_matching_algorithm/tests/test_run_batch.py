@@ -0,0 +1,138 @@
+import concurrent.futures
+import json
+import os
+
+import pytest
+
+import Job_Matching
+
+TEXT = "Data Analyst with five years of SQL and reporting experience in Colombo."
+
+
+class StubPipeline:
+    """Stands in for extraction, the models and the job search; records what was matched."""
+
+    def __init__(self, texts, failing=(), cached=()):
+        self.texts, self.failing, self.cached = texts, set(failing), set(cached)
+        self.matched, self.stored = [], []
+
+    def extract(self, path):
+        name = os.path.basename(path)
+        if name in self.cached:
+            return {"path": path, "text": "", "debug": {}, "cached": {"text": name},
+                    "key": name, "cache_info": {"hit": True}}
+        return {"path": path, "text": self.texts.get(name, ""), "debug": {}, "cached": None,
+                "key": name, "cache_info": {"hit": False}}
+
+    def features(self, text, debug, nlp, kb, spacy_places=None, keywords=None):
+        return {"text": text}
+
+    def jobs(self, feats, call_api=True, kb=None, local_index=False):
+        self.matched.append(feats["text"])
+        if feats["text"] in self.failing:
+            raise TimeoutError("job API timed out")
+        return {"ok": True, "hits": []}
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    p = StubPipeline({"a.pdf": TEXT, "b.pdf": TEXT + " b", "c.pdf": ""})
+    # threads instead of processes, so the stubs are what the workers call
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", concurrent.futures.ThreadPoolExecutor)
+    monkeypatch.setattr(Job_Matching, "_batch_extract", p.extract)
+    monkeypatch.setattr(Job_Matching, "load_spacy", lambda: None)
+    monkeypatch.setattr(Job_Matching, "load_keybert", lambda: None)
+    monkeypatch.setattr(Job_Matching, "spacy_gpe_locations_batch", lambda nlp, texts: [[] for _ in texts])
+    monkeypatch.setattr(Job_Matching, "keybert_keywords_batch", lambda kb, texts, top_n: [[] for _ in texts])
+    monkeypatch.setattr(Job_Matching, "features_from_text", p.features)
+    monkeypatch.setattr(Job_Matching, "jobs_for_features", p.jobs)
+    monkeypatch.setattr(Job_Matching, "cv_rank_vector", lambda feats: None)
+    monkeypatch.setattr(Job_Matching, "store_cached_features", lambda key, feats, info: p.stored.append(key))
+    return p
+
+
+@pytest.fixture
+def cv_dir(tmp_path):
+    d = tmp_path / "cvs"
+    d.mkdir()
+    for name in ("a.pdf", "b.pdf", "c.pdf", "notes.txt"):
+        (d / name).write_bytes(b"")
+    return d
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(ln) for ln in f if ln.strip()]
+
+
+def read_lines_raw(path):
+    with open(path, encoding="utf-8") as f:
+        return [ln.rstrip("\n") for ln in f]
+
+
+def by_name(records):
+    return {os.path.basename(r["path"]): r for r in records}
+
+
+def test_checkpoint_records_only_successful_cvs(pipeline, cv_dir, tmp_path):
+    pipeline.failing = {TEXT + " b"}
+    out, ckpt = tmp_path / "out.jsonl", tmp_path / "out.jsonl.done"
+    stats = Job_Matching.run_batch(str(cv_dir), out_path=str(out), checkpoint=str(ckpt))
+
+    assert stats["total"] == 3  # notes.txt is not a CV
+    assert (stats["ok"], stats["errors"], stats["skipped_checkpoint"]) == (1, 2, 0)
+    recs = by_name(read_lines(out))
+    assert recs["a.pdf"]["ok"] and recs["a.pdf"]["result"]["ok"]
+    assert recs["b.pdf"]["error"] == "TimeoutError: job API timed out"
+    assert "no content" in recs["c.pdf"]["error"]
+    assert read_lines_raw(ckpt) == [str(cv_dir / "a.pdf")]
+    # features are cached even when the job search failed
+    assert sorted(pipeline.stored) == ["a.pdf", "b.pdf"]
+
+
+def test_resume_skips_checkpointed_cvs_and_retries_failures(pipeline, cv_dir, tmp_path):
+    out, ckpt = tmp_path / "out.jsonl", tmp_path / "out.jsonl.done"
+    pipeline.failing = {TEXT + " b"}
+    Job_Matching.run_batch(str(cv_dir), out_path=str(out), checkpoint=str(ckpt))
+
+    pipeline.failing, pipeline.matched = set(), []
+    stats = Job_Matching.run_batch(str(cv_dir), out_path=str(out), checkpoint=str(ckpt))
+
+    assert (stats["ok"], stats["errors"], stats["skipped_checkpoint"]) == (1, 1, 1)
+    assert pipeline.matched == [TEXT + " b"]  # a.pdf was not matched again
+    assert sorted(read_lines_raw(ckpt)) == [str(cv_dir / "a.pdf"), str(cv_dir / "b.pdf")]
+    assert len(read_lines(out)) == 5  # the output is appended to, not rewritten
+
+    stats = Job_Matching.run_batch(str(cv_dir), out_path=str(out), checkpoint=str(ckpt))
+    assert (stats["ok"], stats["errors"], stats["skipped_checkpoint"]) == (0, 1, 2)
+
+
+def test_cached_features_skip_extraction_and_nlp(pipeline, cv_dir, tmp_path):
+    pipeline.cached = {"c.pdf"}
+    out = tmp_path / "out.jsonl"
+    stats = Job_Matching.run_batch(str(cv_dir), out_path=str(out))
+
+    assert (stats["ok"], stats["errors"], stats["cache_hits"]) == (3, 0, 1)
+    assert sorted(pipeline.matched) == sorted([TEXT, TEXT + " b", "c.pdf"])
+    assert "c.pdf" not in pipeline.stored  # already cached with its vector
+
+
+def test_manifest_errors_are_reported_per_line(pipeline, cv_dir, tmp_path):
+    manifest = tmp_path / "batch.jsonl"
+    manifest.write_text("\n".join([
+        json.dumps({"cvId": 1, "filepath": str(cv_dir / "a.pdf")}),
+        "",
+        json.dumps({"cvId": 2, "filepath": str(cv_dir / "missing.pdf")}),
+        json.dumps({"cvId": 3}),
+    ]) + "\n", encoding="utf-8")
+    out, ckpt = tmp_path / "out.jsonl", tmp_path / "out.jsonl.done"
+    stats = Job_Matching.run_batch(str(manifest), out_path=str(out), checkpoint=str(ckpt))
+
+    assert (stats["total"], stats["ok"], stats["errors"]) == (3, 1, 2)
+    recs = read_lines(out)
+    ok = [r for r in recs if r["ok"]]
+    assert len(ok) == 1 and ok[0]["cvId"] == 1 and ok[0]["line"] == 1
+    bad = sorted((r for r in recs if not r["ok"]), key=lambda r: r["line"])
+    assert [r["line"] for r in bad] == [3, 4]
+    assert "does not exist" in bad[0]["error"] and "missing 'filepath'" in bad[1]["error"]
+    assert read_lines_raw(ckpt) == [str(cv_dir / "a.pdf")]
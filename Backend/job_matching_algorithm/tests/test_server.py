@@ -0,0 +1,77 @@
+import io
+import json
+import time
+
+import pytest
+
+import Job_Matching
+from job_matching_server import serve
+
+
+def handle(req, emit=None):
+    if emit is not None:
+        emit({"event": "stage", "stage": "text"})
+    if req["cv"] == "slow":
+        time.sleep(30)
+    if req["cv"] == "boom":
+        raise RuntimeError("bad pdf")
+    return {"cv": req["cv"]}
+
+
+def run(lines, capsys, **kw):
+    stream = io.StringIO("".join(json.dumps(l) + "\n" if not isinstance(l, str) else l + "\n"
+                                 for l in lines))
+    serve(handle, workers=kw.pop("workers", 2), stream=stream, **kw)
+    out = [json.loads(l) for l in capsys.readouterr().out.splitlines()]
+    assert out[0]["event"] == "ready"
+    return {r["id"]: r for r in out[1:] if "event" not in r}, [r for r in out[1:] if "event" in r]
+
+
+def test_every_request_gets_one_reply(capsys):
+    replies, _ = run([{"id": "a", "cv": "a.pdf"}, {"id": "b", "cv": "b.pdf"}, {"cv": "c.pdf"},
+                      {"id": "d", "cv": "boom"}], capsys)
+    assert replies["a"]["ok"] and replies["a"]["result"] == {"cv": "a.pdf"}
+    assert replies["req-3"]["result"] == {"cv": "c.pdf"}
+    assert replies["d"] == {"id": "d", "ok": False, "error": "RuntimeError: bad pdf", "ms": replies["d"]["ms"]}
+
+
+@pytest.mark.parametrize("req, error", [
+    ({"id": "x", "cv": "a.pdf", "timeout": "30s"}, "bad_request: 'timeout' must be a number"),
+    ({"id": "x", "cv": "a.pdf", "timeout": -1}, "bad_request: 'timeout' must be positive"),
+    ({"id": "x", "cv": "a.pdf", "timeout": True}, "bad_request: 'timeout' must be a number"),
+    ({"id": "x", "cv": "a.pdf", "timeout": [1]}, "bad_request: 'timeout' must be a number"),
+    ({"id": "x"}, "bad_request: missing 'cv'"),
+    ({"id": "x", "cv": "  "}, "bad_request: missing 'cv'"),
+    ({"id": "x", "cv": {"filepath": "a.pdf"}}, "bad_request: 'cv' must be a path or a JSON string"),
+])
+def test_bad_requests_are_answered_and_do_not_stop_the_server(req, error, capsys):
+    replies, _ = run([req, "not json", "[1]", {"id": "ok", "cv": "a.pdf", "timeout": "15"}], capsys)
+    assert replies["x"]["ok"] is False and replies["x"]["error"].startswith(error)
+    assert replies[None]["error"].startswith("bad_request")
+    assert replies["ok"]["result"] == {"cv": "a.pdf"}
+
+
+def test_timeout_kills_the_worker_and_the_server_goes_on(capsys):
+    t0 = time.monotonic()
+    replies, _ = run([{"id": "slow", "cv": "slow", "timeout": 0.5}, {"id": "next", "cv": "a.pdf"}],
+                     capsys, workers=1)
+    assert replies["slow"] == {"id": "slow", "ok": False, "error": "timeout after 0.5s"}
+    assert replies["next"]["ok"]
+    assert time.monotonic() - t0 < 20
+
+
+def test_stream_requests_get_events_before_the_reply(capsys):
+    replies, events = run([{"id": "s", "cv": "a.pdf", "stream": True}, {"id": "q", "cv": "a.pdf"}], capsys)
+    assert events == [{"id": "s", "event": "stage", "stage": "text"}]
+    assert replies["s"]["ok"] and replies["q"]["ok"]
+
+
+def test_workers_are_recycled_after_max_jobs(capsys):
+    replies, _ = run([{"id": str(i), "cv": f"{i}.pdf"} for i in range(5)], capsys, workers=1, max_jobs=2)
+    assert sorted(replies) == ["0", "1", "2", "3", "4"] and all(r["ok"] for r in replies.values())
+
+
+def test_handle_request_never_uses_the_default_cv():
+    out = Job_Matching.handle_request({})
+    assert out["error"] == "CV file not found or input invalid"
+    assert out["_debug_input"] == {"error": "missing 'cv'"}
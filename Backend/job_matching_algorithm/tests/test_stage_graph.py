@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+
+from stage_graph import Stage, StageAbort, critical_path, run_stages
+
+
+def test_results_follow_dependencies():
+    stages = [
+        Stage("a", (), lambda _: 1),
+        Stage("b", ("a",), lambda r: r["a"] + 1),
+        Stage("c", ("a", "b"), lambda r: r["a"] + r["b"]),
+    ]
+    results, timeline = run_stages(stages)
+    assert results == {"a": 1, "b": 2, "c": 3}
+    assert [r["stage"] for r in timeline] == ["a", "b", "c"]
+    ends = {r["stage"]: r["end_ms"] for r in timeline}
+    starts = {r["stage"]: r["start_ms"] for r in timeline}
+    assert starts["c"] >= ends["b"] >= ends["a"]
+
+
+def test_stage_order_in_list_does_not_matter():
+    stages = [Stage("late", ("early",), lambda r: r["early"] * 2), Stage("early", (), lambda _: 21)]
+    assert run_stages(stages)[0]["late"] == 42
+
+
+def test_independent_stages_overlap():
+    barrier = threading.Barrier(2, timeout=5)  # deadlocks (BrokenBarrierError) if run one by one
+    stages = [Stage("x", (), lambda _: barrier.wait()), Stage("y", (), lambda _: barrier.wait())]
+    results, _ = run_stages(stages, max_workers=2)
+    assert sorted(results.values()) == [0, 1]
+
+
+def test_unknown_dependency_and_cycle_are_rejected():
+    with pytest.raises(ValueError, match="unknown"):
+        run_stages([Stage("a", ("missing",), lambda r: None)])
+    with pytest.raises(ValueError, match="cycle"):
+        run_stages([Stage("a", ("b",), lambda r: None), Stage("b", ("a",), lambda r: None)])
+
+
+def test_abort_carries_result_and_timeline():
+    def abort(_):
+        raise StageAbort({"error": "no text"})
+
+    stages = [Stage("ok", (), lambda _: 1), Stage("text", ("ok",), abort),
+              Stage("after", ("text",), lambda r: pytest.fail("ran after abort"))]
+    with pytest.raises(StageAbort) as exc:
+        run_stages(stages)
+    assert exc.value.result == {"error": "no text"}
+    assert [r["stage"] for r in exc.value.timeline] == ["ok", "text"]
+
+
+def test_other_exceptions_propagate():
+    with pytest.raises(ZeroDivisionError):
+        run_stages([Stage("boom", (), lambda _: 1 / 0)])
+
+
+def test_on_done_and_around_hooks():
+    seen, wrapped = [], []
+
+    class Around:
+        def __init__(self, name):
+            self.name = name
+
+        def __enter__(self):
+            wrapped.append(self.name)
+
+        def __exit__(self, *exc):
+            return False
+
+    run_stages([Stage("a", (), lambda _: "A"), Stage("b", ("a",), lambda r: r["a"] + "B")],
+               around=Around, on_done=lambda name, value: seen.append((name, value)))
+    assert seen == [("a", "A"), ("b", "AB")]
+    assert sorted(wrapped) == ["a", "b"]
+
+
+def test_critical_path_follows_the_dependency_that_ended_last():
+    def sleep(s):
+        return lambda _: time.sleep(s)
+
+    stages = [
+        Stage("fast", (), sleep(0)),
+        Stage("slow", (), sleep(0.05)),
+        Stage("join", ("fast", "slow"), sleep(0)),
+    ]
+    _, timeline = run_stages(stages)
+    assert critical_path(stages, timeline) == ["slow", "join"]
+    assert critical_path(stages, []) == []
@@ -0,0 +1,123 @@
+import io
+import json
+
+import pytest
+
+import Job_Matching
+import perf
+from job_index import JobIndex
+
+CACHED = {
+    "text": "Jane Doe, Colombo, Sri Lanka. Data Analyst with 5 years of SQL and Power BI.",
+    "_debug_extract": {"steps": [{"step": "pdf_text", "engine": "pdfminer"}]},
+    "country_final": "Sri Lanka", "city_found": "Colombo", "country_mode": "country",
+    "role_raw": "Data Analyst", "role_final": "Data Analyst",
+    "role_terms": ["Data Analyst", "Business Data Analyst"],
+    "experience_years": 5.0, "experience_level": "mid", "experience_debug": {},
+    "keywords": [f"kw{i}" for i in range(20)],
+}
+
+
+def hits(n):
+    return [{"id": f"j{i}", "title": "Data Analyst" if i % 5 else "Chef", "description": ""} for i in range(n)]
+
+
+@pytest.fixture
+def cv(tmp_path, monkeypatch):
+    path = tmp_path / "cv.pdf"
+    path.write_bytes(b"%PDF-1.4")
+    monkeypatch.setattr(Job_Matching, "_JOB_INDEX", JobIndex(str(tmp_path / "jobs.sqlite3")))
+    monkeypatch.setattr(Job_Matching, "RANK_ENABLED", False)  # no model in these tests
+    monkeypatch.setattr(Job_Matching, "store_cached_features", lambda key, feats, info: None)
+    monkeypatch.setattr(perf, "METRICS_FILE", None)
+    return path
+
+
+def use_cached_features(monkeypatch, n_hits):
+    monkeypatch.setattr(Job_Matching, "lookup_cached_features",
+                        lambda path: (dict(CACHED), "k", {"enabled": True, "hit": True}))
+    monkeypatch.setattr(Job_Matching, "fetch_jobs_for",
+                        lambda country, role, exp, local_index=False: (
+                            {"ok": True, "hits": hits(n_hits)},
+                            {"source": "api", "requests_done": 2, "cache_statuses": {}}))
+
+
+def run_stream(capsys, *argv):
+    status = Job_Matching.main([*argv, "--stream"])
+    lines = capsys.readouterr().out.splitlines()
+    return status, [json.loads(ln) for ln in lines]
+
+
+def test_events_run_from_start_to_summary_in_dependency_order(cv, monkeypatch, capsys):
+    use_cached_features(monkeypatch, 25)
+    status, events = run_stream(capsys, str(cv))
+
+    assert status == 0
+    names = [ev["event"] for ev in events]
+    assert names[0] == "start" and events[0]["cv"] == str(cv)
+    assert names[-1] == "summary" and names.count("summary") == 1
+    assert sorted(set(names[1:-1])) == ["country", "experience", "fetch", "filters", "hits",
+                                        "keywords", "role", "search_body", "text"]
+    # with cached features only the fetch -> filters -> rank chain is ordered
+    for before, after in [("country", "fetch"), ("role", "fetch"),
+                          ("experience", "fetch"), ("fetch", "filters"), ("filters", "hits")]:
+        assert names.index(before) < names.index(after), (before, after)
+
+    progress = events[1:-1]
+    assert all("t_ms" in ev for ev in progress)
+    assert [ev["t_ms"] for ev in progress] == sorted(ev["t_ms"] for ev in progress)
+
+
+def test_event_payloads_match_the_summary(cv, monkeypatch, capsys):
+    use_cached_features(monkeypatch, 25)
+    _, events = run_stream(capsys, str(cv))
+    ev = {e["event"]: e for e in events}
+    result = ev["summary"]["result"]
+
+    assert ev["summary"]["ok"] is True
+    assert (ev["country"]["country_final"], ev["country"]["city_found"]) == ("Sri Lanka", "Colombo")
+    assert len(ev["keywords"]["keywords"]) == 12
+    assert ev["fetch"]["total"] == 25 and ev["fetch"]["requests"] == 2
+    assert ev["filters"]["after_role_filter"] == result["jobs"]["after_role_filter"] == 20
+    batches = [e for e in events if e["event"] == "hits"]
+    assert [b["batch"] for b in batches] == [0, 1]
+    assert [len(b["hits"]) for b in batches] == [10, 10]
+    assert [h["id"] for b in batches for h in b["hits"]] == [h["id"] for h in result["jobs"]["hits"]]
+
+
+def test_unreadable_cv_ends_with_a_failed_summary(cv, monkeypatch, capsys):
+    monkeypatch.setattr(Job_Matching, "lookup_cached_features", lambda path: (None, None, {"enabled": False}))
+    monkeypatch.setattr(Job_Matching, "extract_text_any", lambda path: ("", {"steps": []}))
+    monkeypatch.setattr(Job_Matching, "load_spacy", lambda: None)
+    monkeypatch.setattr(Job_Matching, "load_keybert", lambda: None)
+    status, events = run_stream(capsys, str(cv))
+
+    assert status == 0
+    assert [ev["event"] for ev in events] == ["start", "summary"]
+    assert events[-1]["ok"] is False
+    assert "no content" in events[-1]["result"]["error"]
+
+
+def test_invalid_input_is_a_summary_only(cv, capsys):
+    status, events = run_stream(capsys, str(cv.parent / "missing.pdf"))
+
+    assert status == 1
+    assert [ev["event"] for ev in events] == ["summary"]
+    assert events[0]["ok"] is False and events[0]["result"]["_debug_input"]["error"].startswith("Path not found")
+
+
+def test_ndjson_writer_writes_one_compact_line_per_event():
+    buf = io.StringIO()
+    emit = Job_Matching.ndjson_writer(buf)
+    emit({"event": "text", "chars": 10})
+    emit({"event": "country", "city_found": "São Paulo"})
+    assert buf.getvalue() == ('{"event":"text","chars":10}\n'
+                              '{"event":"country","city_found":"São Paulo"}\n')
+
+
+def test_text_event_counts_ocr_pages():
+    dbg = {"steps": [{"step": "pdf_text"}, {"step": "pdf_pages", "engine": "pdfminer+ocr",
+                                            "pages": [1, 2, 3], "ocr_pages": [3]}]}
+    assert Job_Matching.stage_events("text", ("x" * 40, dbg)) == \
+        [{"event": "text", "chars": 40, "engine": "pdfminer+ocr", "pages": 3, "ocr_pages": 1}]
+    assert Job_Matching.stage_events("nlp", object()) == []
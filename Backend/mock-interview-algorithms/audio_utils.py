@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Audio helpers for the mock-interview transcription scripts.
+
+- decode_pcm(): any browser upload -> 16 kHz 16-bit mono PCM (ffmpeg; plain WAV
+  files are read with the wave module when ffmpeg is not installed)
+- frame_rms() / silence_threshold(): a simple energy-based voice activity measure
+- trim_silence(): drop leading/trailing silence and shorten long pauses
+- split_on_silence(): overlapping segments cut in the middle of pauses
+- encode_compact(): PCM -> Ogg/Opus (FLAC if ffmpeg lacks libopus, WAV without
+  ffmpeg) for upload; wav_bytes(): PCM -> in-memory WAV
+"""
+
+import io
+import os
+import sys
+import wave
+import shutil
+import subprocess
+from array import array
+from operator import mul
+
+FFMPEG_BIN = os.environ.get("FFMPEG_BIN") or "ffmpeg"
+SAMPLE_RATE = 16000  # what Whisper resamples to anyway
+
+FRAME_MS = 30
+SILENCE_MIN_RMS = 300      # absolute floor (~ -40 dBFS): quieter frames are always silence
+SILENCE_NOISE_FACTOR = 2.5  # ... and so is anything within this factor of the noise floor
+
+OPUS_BITRATE = os.environ.get("WHISPER_OPUS_BITRATE") or "24k"  # plenty for 16 kHz speech
+
+
+def have_ffmpeg():
+    return shutil.which(FFMPEG_BIN) is not None
+
+
+def decode_pcm(path, sample_rate=SAMPLE_RATE):
+    """Returns (pcm_bytes, sample_rate): signed 16-bit little-endian mono."""
+    if have_ffmpeg():
+        cmd = [FFMPEG_BIN, "-nostdin", "-v", "error", "-i", path,
+               "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(sample_rate), "-"]
+        proc = subprocess.run(cmd, capture_output=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg decode failed: {proc.stderr.decode('utf-8', 'replace')[-500:]}")
+        return proc.stdout, sample_rate
+    # no ffmpeg: only PCM WAV can be read
+    try:
+        with wave.open(path, "rb") as w:
+            if w.getsampwidth() != 2:
+                raise RuntimeError("WAV is not 16-bit PCM")
+            channels, rate = w.getnchannels(), w.getframerate()
+            pcm = w.readframes(w.getnframes())
+    except (wave.Error, EOFError, RuntimeError) as e:
+        raise RuntimeError(f"ffmpeg not found and {os.path.basename(path)} is not a readable WAV: {e}")
+    return resample(downmix(pcm, channels), rate, sample_rate), sample_rate
+
+
+def _samples(pcm):
+    a = array("h")
+    a.frombytes(pcm[: len(pcm) - len(pcm) % 2])
+    if sys.byteorder == "big":
+        a.byteswap()
+    return a
+
+
+def _pcm(samples):
+    if sys.byteorder == "big":
+        samples = array("h", samples)
+        samples.byteswap()
+    return samples.tobytes()
+
+
+def downmix(pcm, channels):
+    """Interleaved 16-bit PCM with `channels` channels -> mono (channel average)."""
+    if channels <= 1:
+        return pcm
+    s = _samples(pcm)
+    n = len(s) // channels
+    chans = [s[c:n * channels:channels] for c in range(channels)]
+    return _pcm(array("h", (sum(fr) // channels for fr in zip(*chans))))
+
+
+def resample(pcm, src_rate, dst_rate):
+    """Linear-interpolation resampling of mono 16-bit PCM (the no-ffmpeg path only)."""
+    if src_rate == dst_rate:
+        return pcm
+    s = _samples(pcm)
+    if not s:
+        return pcm
+    if src_rate % dst_rate == 0:
+        # integer factor (48k/32k -> 16k): average each group of samples, a cheap low-pass
+        k = src_rate // dst_rate
+        n = len(s) // k
+        return _pcm(array("h", (sum(g) // k for g in zip(*(s[i:n * k:k] for i in range(k))))))
+    n = int(len(s) * dst_rate / src_rate)
+    step, last = src_rate / dst_rate, len(s) - 1
+    out = array("h")
+    for i in range(n):
+        x = i * step
+        j = int(x)
+        k = min(j + 1, last)
+        out.append(int(s[j] + (s[k] - s[j]) * (x - j)))
+    return _pcm(out)
+
+
+def duration_s(pcm, sample_rate):
+    return len(pcm) / 2 / sample_rate
+
+
+def frame_rms(pcm, sample_rate, frame_ms=FRAME_MS):
+    """RMS level of each `frame_ms` frame."""
+    s = _samples(pcm)
+    n = max(1, sample_rate * frame_ms // 1000)
+    out = []
+    for i in range(0, len(s), n):
+        fr = s[i:i + n]
+        out.append((sum(map(mul, fr, fr)) / len(fr)) ** 0.5)
+    return out
+
+
+def silence_threshold(rms):
+    """Frames at or below this RMS count as silence."""
+    if not rms:
+        return SILENCE_MIN_RMS
+    noise = sorted(rms)[len(rms) // 10]
+    return max(SILENCE_MIN_RMS, noise * SILENCE_NOISE_FACTOR)
+
+
+def trim_silence(pcm, sample_rate, pad_s=0.2, max_pause_s=1.0, frame_ms=FRAME_MS):
+    """
+    Cut leading/trailing silence (keeping `pad_s` around the speech) and shorten pauses
+    longer than `max_pause_s` to that length. Returns the PCM unchanged if it is all silence.
+    """
+    rms = frame_rms(pcm, sample_rate, frame_ms)
+    thr = silence_threshold(rms)
+    voiced = [i for i, level in enumerate(rms) if level > thr]
+    if not voiced:
+        return pcm
+    fb = sample_rate * frame_ms // 1000 * 2  # bytes per frame
+    pad = int(pad_s * 1000) // frame_ms
+    max_gap = max(2 * pad, int(max_pause_s * 1000) // frame_ms)
+    # keep runs of frames: each voiced frame +/- pad, merging runs closer than max_gap
+    spans = []
+    for i in voiced:
+        a, b = max(0, i - pad), min(len(rms), i + pad + 1)
+        if spans and a - spans[-1][1] <= max_gap:
+            spans[-1][1] = max(spans[-1][1], b)
+        else:
+            spans.append([a, b])
+    gap = bytes(max_gap * fb)  # a long pause becomes max_pause_s of silence
+    return gap.join(pcm[a * fb:b * fb] for a, b in spans)
+
+
+def split_on_silence(pcm, sample_rate, target_s=20.0, max_s=30.0, overlap_s=0.5,
+                     min_silence_ms=250, frame_ms=FRAME_MS):
+    """
+    Cut the audio into segments of about `target_s` (never more than `max_s`), each cut in
+    the middle of the pause closest to the target; with no pause long enough the cut is hard
+    at `max_s`. Segments extend `overlap_s` past each cut on both sides, so a word clipped by
+    a hard cut is heard whole by one of them (stitch the transcripts to drop the repeat).
+    Returns [{"start", "end", "cut"}] in samples; "cut" is how the segment ends.
+    """
+    total = len(pcm) // 2
+    if total <= int(max_s * sample_rate):
+        return [{"start": 0, "end": total, "cut": "end"}]
+    rms = frame_rms(pcm, sample_rate, frame_ms)
+    thr = silence_threshold(rms)
+    fs = sample_rate * frame_ms // 1000
+    min_run = max(1, min_silence_ms // frame_ms)
+    overlap = int(overlap_s * sample_rate)
+
+    # pauses as (first_frame, last_frame + 1)
+    pauses, run_start = [], None
+    for i, level in enumerate(rms + [thr + 1]):
+        if level <= thr:
+            run_start = i if run_start is None else run_start
+        elif run_start is not None:
+            if i - run_start >= min_run:
+                pauses.append((run_start, i))
+            run_start = None
+
+    segments, start = [], 0
+    while True:
+        if total - start <= int(max_s * sample_rate):
+            segments.append({"start": start, "end": total, "cut": "end"})
+            return segments
+        lo, hi = start + int(target_s / 2 * sample_rate), start + int(max_s * sample_rate)
+        target = start + int(target_s * sample_rate)
+        mids = [(a + b) * fs // 2 for a, b in pauses if lo <= (a + b) * fs // 2 <= hi]
+        if mids:
+            cut, how = min(mids, key=lambda m: abs(m - target)), "silence"
+        else:
+            cut, how = hi, "hard"
+        segments.append({"start": start, "end": min(total, cut + overlap), "cut": how})
+        start = max(start + 1, cut - overlap)
+
+
+def _ffmpeg_encode(pcm, sample_rate, args):
+    cmd = [FFMPEG_BIN, "-nostdin", "-v", "error", "-f", "s16le", "-ar", str(sample_rate), "-ac", "1",
+           "-i", "-", *args, "-"]
+    proc = subprocess.run(cmd, input=pcm, capture_output=True)
+    if proc.returncode != 0 or not proc.stdout:
+        raise RuntimeError(proc.stderr.decode("utf-8", "replace")[-300:])
+    return proc.stdout
+
+
+def encode_compact(pcm, sample_rate):
+    """Returns (data, ext, content_type, codec): Opus, else FLAC, else WAV."""
+    if have_ffmpeg():
+        try:
+            data = _ffmpeg_encode(pcm, sample_rate, ["-c:a", "libopus", "-b:a", OPUS_BITRATE,
+                                                     "-application", "voip", "-f", "ogg"])
+            return data, ".ogg", "audio/ogg", "opus"
+        except RuntimeError:
+            pass  # ffmpeg built without libopus
+        try:
+            return _ffmpeg_encode(pcm, sample_rate, ["-c:a", "flac", "-f", "flac"]), ".flac", "audio/flac", "flac"
+        except RuntimeError:
+            pass
+    return wav_bytes(pcm, sample_rate), ".wav", "audio/wav", "pcm_s16le"
+
+
+def wav_bytes(pcm, sample_rate):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm)
+    return buf.getvalue()
@@ -0,0 +1,111 @@
+"""
+Scoring against the stub completions endpoint.
+
+    python bench/bench_scoring.py [--questions 3,8,15,30] [--tokens-per-s 150]
+
+Runs score_answers.py as the Node side would (payload on stdin). For each
+interview length it reports:
+- one request holding every answer with the default 1200-token output budget
+  (how many answers came back before the reply was cut off)
+- chunked scoring run one chunk at a time and concurrently, and the time to the
+  final result
+- streaming: time to the first per-question result and to the final result
+- a stream whose connection is cut early: the answers parsed before the cut are
+  kept, and the rest are scored offline and listed in offline_questions
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import stub_scoring_api  # noqa: E402
+import score_answers  # noqa: E402
+
+SCRIPT = os.path.join(os.path.dirname(HERE), "score_answers.py")
+
+
+def payload(n):
+    return {"jobRole": "Backend Engineer", "responses": [
+        {"questionId": f"q{i}", "questionText": f"Question {i}?", "answer": "I designed and shipped it.",
+         "secondsSpent": 40} for i in range(1, n + 1)]}
+
+
+def run(url, body, stream, **env):
+    """(ms to first question, ms to result, parsed lines)"""
+    args = [sys.executable, SCRIPT] + (["--stream"] if stream else [])
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+                            env={**os.environ, "SCORING_API_URL": url, **env})
+    proc.stdin.write(json.dumps(body))
+    proc.stdin.close()
+    first, lines = None, []
+    for line in proc.stdout:
+        if line.strip():
+            lines.append(json.loads(line))
+            if first is None:
+                first = (time.perf_counter() - t0) * 1000
+    proc.wait()
+    return first, (time.perf_counter() - t0) * 1000, lines
+
+
+def one_request(url, body):
+    """The unchunked prompt as a single request: (ms, answers parsed from the reply)."""
+    prompt = score_answers.build_prompt(body["jobRole"], body["responses"])
+    t0 = time.perf_counter()
+    r = requests.post(url, json=score_answers.completion_body(prompt), timeout=300)
+    text = r.json()["choices"][0]["text"]
+    return (time.perf_counter() - t0) * 1000, len(score_answers.JsonObjectScanner("per_question").feed(text))
+
+
+def scored(result):
+    return len(result.get("per_question") or [])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--questions", default="3,8,15,30")
+    ap.add_argument("--tokens-per-s", type=float, default=150)
+    args = ap.parse_args()
+
+    ok = True
+    print(f"{'questions':>9s} {'1 req ms':>9s} {'1 req got':>10s} {'chunks':>6s} {'seq ms':>8s} "
+          f"{'conc ms':>8s} {'stream 1st':>10s} {'stream ms':>10s} {'cut: kept':>10s}")
+    for n in (int(q) for q in args.questions.split(",")):
+        body = payload(n)
+        server, url = stub_scoring_api.start(tokens_per_s=args.tokens_per_s)
+        one_ms, got = one_request(url, body)
+        _, seq_ms, seq = run(url, body, stream=False, SCORING_MAX_CONCURRENCY="1")
+        _, conc_ms, conc = run(url, body, stream=False)
+        first_ms, stream_ms, lines = run(url, body, stream=True)
+        server.shutdown()
+
+        # cut each chunk's stream right after its first answer
+        one_answer = len(stub_scoring_api.stub_completion("Q1: x\n")) // stub_scoring_api.CHARS_PER_TOKEN
+        server, url = stub_scoring_api.start(tokens_per_s=args.tokens_per_s * 4, cut_after=one_answer)
+        _, _, cut = run(url, body, stream=True)
+        server.shutdown()
+
+        final, result = lines[-1], conc[-1]
+        chunks = result.get("chunks", 1)
+        ok &= scored(result) == n and not result.get("partial")
+        ok &= [p["questionId"] for p in result["per_question"]] == [f"q{i}" for i in range(1, n + 1)]
+        ok &= final.get("per_question") == result.get("per_question") == seq[-1].get("per_question")
+        cut_result = cut[-1]
+        kept = n - len(cut_result.get("offline_questions") or [])
+        ok &= scored(cut_result) == n and not cut_result.get("partial") and 0 < kept < n
+        ok &= "without the AI reviewer" not in cut_result["overall"]["summary"]
+        print(f"{n:9d} {one_ms:9.0f} {got:>4d}/{n:<5d} {chunks:6d} {seq_ms:8.0f} {conc_ms:8.0f} "
+              f"{first_ms:10.0f} {stream_ms:10.0f} {kept:>5d}/{n:<4d}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
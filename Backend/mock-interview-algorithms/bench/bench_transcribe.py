@@ -0,0 +1,93 @@
+"""
+Transcription modes against the stub endpoint: the raw upload as before, the
+preprocessed single upload (mono 16 kHz, silence trimmed, Opus) and chunked
+concurrent transcription.
+
+    python bench/bench_transcribe.py [--minutes 1,3,6] [--concurrency 4]
+
+Each answer is synthetic speech (bench/stub_whisper_api.py) recorded like a
+browser upload: 48 kHz stereo, with silence before and after and a few long
+thinking pauses. Sentences are separated by short pauses, and one long run-on
+stretch forces hard cuts (and their overlap de-duplication). Every mode must
+return exactly the words that were spoken. Without ffmpeg the preprocessed
+upload is WAV instead of Opus and decoding is the slow pure-Python path.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import stub_whisper_api  # noqa: E402
+
+
+def make_answer(path, minutes, seed, sample_rate=48000, channels=2):
+    rnd = random.Random(seed)
+    per_word = stub_whisper_api.WORD_S + stub_whisper_api.GAP_S
+    sentences, spoken = [], 0.0
+    while spoken < minutes * 60:
+        # mostly normal sentences, now and then a 40 s run-on with no pause in it
+        n = int(40 / per_word) if rnd.random() < 0.1 else rnd.randint(6, 20)
+        sentences.append([rnd.choice(stub_whisper_api.WORDS) for _ in range(n)])
+        if rnd.random() < 0.15:
+            sentences.append(rnd.uniform(2, 5))  # thinking pause
+        spoken += n * per_word + stub_whisper_api.PAUSE_S
+    stub_whisper_api.synth_answer(path, sentences, sample_rate=sample_rate, channels=channels,
+                                  lead_s=3.0, tail_s=4.0)
+    return " ".join(w for s in sentences if isinstance(s, list) for w in s)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--minutes", default="1,3,6")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--base-ms", type=float, default=200)
+    ap.add_argument("--ms-per-audio-s", type=float, default=40)
+    args = ap.parse_args()
+
+    server, url = stub_whisper_api.start(base_ms=args.base_ms, ms_per_audio_s=args.ms_per_audio_s)
+    os.environ["WHISPER_API_URL"] = url
+    os.environ["WHISPER_MAX_CONCURRENCY"] = str(args.concurrency)
+    import transcribe_whisper as tw  # after the env is set: it reads config at import
+
+    tmp = tempfile.mkdtemp(prefix="whisper-bench-")
+    ok = True
+    print(f"{'answer':>7s} {'raw ms':>8s} {'prep ms':>8s} {'chunked ms':>10s} {'segs':>5s} {'hard':>5s} "
+          f"{'in KB':>8s} {'up KB':>8s} {'codec':>9s} {'in s':>6s} {'up s':>6s} {'exact':>6s}")
+    try:
+        for i, minutes in enumerate(float(m) for m in args.minutes.split(",")):
+            path = os.path.join(tmp, f"answer_{i}.wav")
+            expected = make_answer(path, minutes, seed=i)
+
+            t0 = time.perf_counter()
+            raw = tw.transcribe_single(path, "en")
+            raw_ms = (time.perf_counter() - t0) * 1000
+
+            t0 = time.perf_counter()
+            audio = tw.load_audio(path)
+            prep = tw.transcribe_single(path, "en", audio)
+            prep_ms = (time.perf_counter() - t0) * 1000
+
+            t0 = time.perf_counter()
+            chunked = tw.transcribe_chunked(path, "en", tw.load_audio(path))
+            chunked_ms = (time.perf_counter() - t0) * 1000
+
+            exact = raw["text"] == prep["text"] == chunked["text"] == expected
+            ok &= exact
+            hard = sum(1 for s in chunked["segments"] if s["cut"] == "hard")
+            p = prep["preprocess"]
+            print(f"{minutes:6.1f}m {raw_ms:8.0f} {prep_ms:8.0f} {chunked_ms:10.0f} {len(chunked['segments']):5d} "
+                  f"{hard:5d} {p['input_bytes'] / 1024:8.0f} {p['output_bytes'] / 1024:8.0f} {p['codec']:>9s} "
+                  f"{p['input_duration_s']:6.1f} {p['output_duration_s']:6.1f} {'yes' if exact else 'NO':>6s}")
+    finally:
+        server.shutdown()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
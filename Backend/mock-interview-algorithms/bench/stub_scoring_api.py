@@ -0,0 +1,106 @@
+"""
+Local stand-in for the completions endpoint used by score_answers.py.
+
+    python bench/stub_scoring_api.py [--port 8767] [--tokens-per-s 150] [--cut-after 0]
+    SCORING_API_URL=http://127.0.0.1:8767/v1/completions python score_answers.py --stream < payload.json
+
+Answers with a deterministic scoring JSON for however many questions the prompt
+holds (pretty-printed, like a model would write it). With "stream": true it is
+sent as OpenAI-style SSE, a few characters per token at `tokens_per_s`;
+otherwise the whole body comes back after the same generation time. Output
+stops at the request's max_tokens (finish_reason "length"), like a real model.
+`cut_after` > 0 drops the connection after that many tokens (no [DONE]).
+"""
+import re
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHARS_PER_TOKEN = 4
+
+
+def stub_completion(prompt):
+    n = len(re.findall(r"^Q\d+: ", prompt, flags=re.M))
+    per_question = []
+    for i in range(1, n + 1):
+        parts = {k: (i + j) % 6 for j, k in enumerate(["relevance", "clarity", "specificity", "accuracy", "communication"])}
+        per_question.append({
+            "questionId": f"q{i}",
+            "score_breakdown": parts,
+            "total_score": sum(parts.values()) * 4,
+            "brief_feedback": f"Answer {i} covers the question {{with}} \"quoted\" detail but stays general.",
+            "improvement_tip": "Add one concrete example with a measurable result.",
+        })
+    avg = round(sum(p["total_score"] for p in per_question) / n) if n else 0
+    return json.dumps({
+        "per_question": per_question,
+        "overall": {"average_score": avg, "summary": "Solid fundamentals; needs more specifics.",
+                    "next_steps": ["Use STAR", "Quantify impact", "Tie answers to the role"]},
+    }, indent=2)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    token_s = 1 / 150
+    cut_after = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        text = stub_completion(body.get("prompt") or "")
+        tokens = [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+        finish = "stop"
+        if body.get("max_tokens") and len(tokens) > body["max_tokens"]:
+            tokens, finish = tokens[:body["max_tokens"]], "length"
+        if not body.get("stream"):
+            time.sleep(self.token_s * len(tokens))
+            out = json.dumps({"choices": [{"text": "".join(tokens), "finish_reason": finish}]}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for n, tok in enumerate(tokens, start=1):
+            time.sleep(self.token_s)
+            self.wfile.write(f"data: {json.dumps({'choices': [{'text': tok}]})}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            if self.cut_after and n >= self.cut_after:
+                return
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, *args):
+        pass
+
+
+def start(port=0, tokens_per_s=150, cut_after=0):
+    """Serve in a daemon thread; returns (server, url). port=0 picks a free port."""
+    handler = type("Handler", (_Handler,), {"token_s": 1 / tokens_per_s, "cut_after": cut_after})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/completions"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8767)
+    ap.add_argument("--tokens-per-s", type=float, default=150)
+    ap.add_argument("--cut-after", type=int, default=0)
+    args = ap.parse_args()
+    server, url = start(args.port, args.tokens_per_s, args.cut_after)
+    print(f"stub completions API on {url} (SCORING_API_URL={url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
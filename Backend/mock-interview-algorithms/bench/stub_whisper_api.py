@@ -0,0 +1,164 @@
+"""
+Local stand-in for the Whisper transcription endpoint, for testing and benchmarks.
+
+    python bench/stub_whisper_api.py [--port 8766] [--base-ms 200] [--ms-per-audio-s 40]
+    WHISPER_API_URL=http://127.0.0.1:8766/v1/audio/transcriptions python transcribe_whisper.py
+
+Accepts the same multipart POST (file + model + language) and "transcribes"
+synthetic answers made by synth_answer(): every word is a short tone whose
+pitch encodes the word, so a transcript can be checked exactly, including words
+clipped or repeated at segment edges. Latency is base + per-second-of-audio,
+like a real server decoding the whole upload.
+"""
+import io
+import os
+import sys
+import json
+import math
+import time
+import wave
+import argparse
+import tempfile
+import threading
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import audio_utils  # noqa: E402
+
+WORDS = ("i have worked on backend services with python and go where i led a small team "
+         "that shipped payment features reliably under tight deadlines").split()
+BASE_HZ, STEP_HZ = 300, 60
+WORD_S, GAP_S, PAUSE_S = 0.25, 0.08, 0.6
+
+
+def word_hz(word):
+    return BASE_HZ + STEP_HZ * sorted(set(WORDS)).index(word)
+
+
+def synth_answer(path, sentences, sample_rate=16000, channels=1, lead_s=1.0, tail_s=1.0):
+    """
+    Write a WAV with one tone per word, short gaps between words and pauses between
+    sentences. A number instead of a sentence is that many seconds of extra silence.
+    """
+    s = array("h")
+
+    def silence(sec):
+        s.extend([0] * int(sec * sample_rate * channels))
+
+    silence(lead_s)
+    for sentence in sentences:
+        if isinstance(sentence, (int, float)):
+            silence(sentence)
+            continue
+        for j, w in enumerate(sentence):
+            hz, n = word_hz(w), int(WORD_S * sample_rate)
+            for i in range(n):
+                v = int(8000 * math.sin(2 * math.pi * hz * i / sample_rate))
+                s.extend([v] * channels)
+            if j < len(sentence) - 1:
+                silence(GAP_S)
+        silence(PAUSE_S)
+    silence(tail_s)
+    with wave.open(path, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(s.tobytes())
+
+
+def _decode(data):
+    """Mono PCM and its rate: WAV via the wave module, anything else (Opus, FLAC) via ffmpeg."""
+    if data[:4] == b"RIFF":
+        with wave.open(io.BytesIO(data), "rb") as w:
+            rate, channels = w.getframerate(), w.getnchannels()
+            return audio_utils.downmix(w.readframes(w.getnframes()), channels), rate
+    with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as f:
+        f.write(data)
+    try:
+        return audio_utils.decode_pcm(f.name)
+    finally:
+        os.unlink(f.name)
+
+
+def transcribe_wav(data):
+    """(text, duration_s) for a synthetic answer: one word per tone burst, pitch -> word."""
+    pcm, rate = _decode(data)
+    samples = audio_utils._samples(pcm)
+    frame = rate * audio_utils.FRAME_MS // 1000
+    loud = [r > audio_utils.SILENCE_MIN_RMS for r in audio_utils.frame_rms(pcm, rate)]
+    vocab = sorted(set(WORDS))
+    words, start = [], None
+    for i, on in enumerate(loud + [False]):
+        if on and start is None:
+            start = i
+        elif not on and start is not None:
+            burst = samples[start * frame:i * frame]
+            # pitch from the zero crossings; frames are not aligned to the tone, so time
+            # is measured between the first and last crossing, not over the whole burst
+            at = [j for j in range(1, len(burst)) if (burst[j - 1] < 0) != (burst[j] < 0)]
+            if len(at) > 2:
+                hz = (len(at) - 1) / 2 / ((at[-1] - at[0]) / rate)
+                idx = round((hz - BASE_HZ) / STEP_HZ)
+                if 0 <= idx < len(vocab):
+                    words.append(vocab[idx])
+            start = None
+    return " ".join(words), len(pcm) / 2 / rate
+
+
+def _multipart_file(body, content_type):
+    boundary = content_type.split("boundary=", 1)[1].strip('"').encode()
+    for part in body.split(b"--" + boundary):
+        head, _, data = part.partition(b"\r\n\r\n")
+        if b'name="file"' in head:
+            return data[:-2] if data.endswith(b"\r\n") else data
+    return b""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    base_s = 0.2
+    per_audio_s = 0.04
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        try:
+            text, dur = transcribe_wav(_multipart_file(body, self.headers.get("Content-Type", "")))
+            status, payload = 200, {"text": text}
+        except Exception as e:
+            dur, status, payload = 0, 400, {"error": {"message": f"could not decode audio: {e}"}}
+        time.sleep(self.base_s + self.per_audio_s * dur)
+        out = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, *args):
+        pass
+
+
+def start(port=0, base_ms=200, ms_per_audio_s=40):
+    """Serve in a daemon thread; returns (server, url). port=0 picks a free port."""
+    handler = type("Handler", (_Handler,), {"base_s": base_ms / 1000, "per_audio_s": ms_per_audio_s / 1000})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/audio/transcriptions"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--base-ms", type=float, default=200)
+    ap.add_argument("--ms-per-audio-s", type=float, default=40)
+    args = ap.parse_args()
+    server, url = start(args.port, args.base_ms, args.ms_per_audio_s)
+    print(f"stub Whisper API on {url} (WHISPER_API_URL={url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
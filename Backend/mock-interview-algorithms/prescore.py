@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Offline answer scoring for score_answers.py.
+
+- answer_features(): cheap features per answer (length, time spent, overlap with
+  the question and the job role, profanity, optionally MiniLM similarity)
+- degenerate_reason() / prescore(): answers that are clearly not worth an LLM
+  call (empty, one or two words, no time spent, mostly profanity) get fixed
+  scores and feedback here; only the rest go into the prompt
+- offline_score(): heuristic scores for an answer, used when the LLM cannot
+  be reached
+
+Scored items have the same shape as the LLM's per_question entries, plus
+"source": "prescore" or "offline".
+"""
+
+import os
+import re
+
+# MiniLM similarity is optional (sentence-transformers + model download); off by default
+MINILM_ENABLED = os.environ.get("SCORING_MINILM", "0") == "1"
+MINILM_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+MIN_WORDS = 3           # fewer words -> "too_short"
+NO_TIME_MAX_WORDS = 10  # secondsSpent == 0 with fewer words than this -> "no_time"
+PROFANITY_SHARE = 0.2   # share of profane words above which an answer is "profanity"
+
+BREAKDOWN_KEYS = ("relevance", "clarity", "specificity", "accuracy", "communication")
+# total_score weights: relevance and specificity count double (see SCORING_GUIDE)
+WEIGHTS = {"relevance": 2, "clarity": 1, "specificity": 2, "accuracy": 1, "communication": 1}
+
+PROFANITY_RE = re.compile(
+    r"\b(?:f+u+c+k\w*|motherf\w*|sh[i1]t\w*|bullsh\w*|b[i1]tch\w*|bastards?|assholes?|"
+    r"c+u+n+t+s?|dick(?:head)?s?|wtf|piss(?:ed)?\s+off|crap)\b", re.I)
+WORD_RE = re.compile(r"[a-z0-9][a-z0-9'+#.-]*", re.I)
+STOPWORDS = frozenset("""
+a an the and or but if then so of to in on at by for with from as is are was were be been being
+it its this that these those i me my we our you your he she they them their what which who whom
+how why when where do does did have has had can could would should will shall may might must
+not no yes about into over under than too very just also there here up out more most some any
+""".split())
+SPECIFIC_RE = re.compile(r"\b(?:for example|for instance|such as|e\.g\.|because|which meant|resulting in)\b"
+                         r"|\d+\s*%|\b\d+(?:\.\d+)?\b", re.I)
+
+FEEDBACK = {
+    "empty": ("No answer was given, so nothing could be assessed.",
+              "Always attempt an answer: outline your approach even if you are unsure."),
+    "too_short": ("The answer is only a word or two and does not address the question.",
+                  "Answer in full sentences: state your point, then back it with an example."),
+    "no_time": ("No time was spent on this question and the answer is too brief to assess.",
+                "Take a moment to structure your answer before you start speaking."),
+    "profanity": ("The answer relies on profanity, which is unprofessional in an interview.",
+                  "Keep the language professional and focus on the substance of the question."),
+}
+
+
+def _words(text):
+    return [w.lower().strip(".'-") for w in WORD_RE.findall(text or "")]
+
+
+def _content(words):
+    return {w for w in words if w not in STOPWORDS and len(w) > 1}
+
+
+_MINILM = None
+
+
+def _minilm():
+    global _MINILM
+    if _MINILM is None:
+        from sentence_transformers import SentenceTransformer
+        _MINILM = SentenceTransformer(MINILM_MODEL)
+    return _MINILM
+
+
+def minilm_similarity(pairs):
+    """Cosine similarity per (question, answer) pair, or None if MiniLM is unavailable."""
+    if not MINILM_ENABLED or not pairs:
+        return None
+    try:
+        model = _minilm()
+        emb = model.encode([t for pair in pairs for t in pair], normalize_embeddings=True)
+    except Exception:
+        return None
+    return [float(emb[2 * i] @ emb[2 * i + 1]) for i in range(len(pairs))]
+
+
+def answer_features(item, job_role, similarity=None):
+    answer = (item.get("answer") or "").strip()
+    words = _words(answer)
+    content = _content(words)
+    q_terms = _content(_words(item.get("questionText")))
+    role_terms = _content(_words(job_role))
+    profane = len(PROFANITY_RE.findall(answer))
+    seconds = item.get("secondsSpent")
+    feats = {
+        "words": len(words),
+        "unique_ratio": round(len(set(words)) / len(words), 3) if words else 0.0,
+        "seconds": seconds if isinstance(seconds, (int, float)) else None,
+        "question_overlap": round(len(content & q_terms) / len(q_terms), 3) if q_terms else 0.0,
+        "role_overlap": round(len(content & role_terms) / len(role_terms), 3) if role_terms else 0.0,
+        "profanity": profane,
+        "specific_markers": len(SPECIFIC_RE.findall(answer)),
+        "sentences": len([s for s in re.split(r"[.!?]+", answer) if s.strip()]),
+    }
+    if similarity is not None:
+        feats["similarity"] = round(similarity, 3)
+    return feats
+
+
+def degenerate_reason(f):
+    """Why an answer needs no LLM call, or None."""
+    if f["words"] == 0:
+        return "empty"
+    if f["profanity"] and (f["profanity"] / f["words"] >= PROFANITY_SHARE or f["words"] < NO_TIME_MAX_WORDS):
+        return "profanity"
+    if f["words"] < MIN_WORDS:
+        return "too_short"
+    if f["seconds"] == 0 and f["words"] < NO_TIME_MAX_WORDS:
+        return "no_time"
+    return None
+
+
+def total_score(breakdown):
+    return round(100 * sum(WEIGHTS[k] * breakdown[k] for k in BREAKDOWN_KEYS) / (5 * sum(WEIGHTS.values())))
+
+
+def _item(question_id, breakdown, feedback, tip, source):
+    return {
+        "questionId": question_id,
+        "score_breakdown": breakdown,
+        "total_score": total_score(breakdown),
+        "brief_feedback": feedback,
+        "improvement_tip": tip,
+        "source": source,
+    }
+
+
+def prescore(item, f, reason, index):
+    """Fixed scores for a degenerate answer."""
+    breakdown = dict.fromkeys(BREAKDOWN_KEYS, 0)
+    if reason in ("too_short", "no_time"):
+        breakdown["relevance"] = 1 if f["question_overlap"] or f["role_overlap"] else 0
+    feedback, tip = FEEDBACK[reason]
+    return _item(item.get("questionId") or f"q{index + 1}", breakdown, feedback, tip, "prescore")
+
+
+def _clamp(x):
+    return max(0, min(5, int(round(x))))
+
+
+def offline_score(item, f, index):
+    """Heuristic scores for an answer that was not prescored (LLM unreachable)."""
+    topical = max(f["question_overlap"], f["role_overlap"] / 2, f.get("similarity", 0.0))
+    words = f["words"]
+    breakdown = {
+        "relevance": _clamp(1 + 5 * topical),
+        "clarity": _clamp(1 + min(words, 150) / 50 + (1 if f["sentences"] >= 3 else 0)),
+        "specificity": _clamp(1 + f["specific_markers"] + (1 if words >= 80 else 0)),
+        "accuracy": _clamp(2 + 2 * topical),
+        "communication": _clamp(4 - 2 * f["profanity"] + (f["unique_ratio"] > 0.5)),
+    }
+    weak = min(breakdown, key=lambda k: (breakdown[k], k))
+    tips = {
+        "relevance": "Address the question directly and use its key terms.",
+        "clarity": "Structure the answer: situation, action, result.",
+        "specificity": "Add a concrete example with numbers or outcomes.",
+        "accuracy": "Double-check the technical details you mention.",
+        "communication": "Keep the tone professional and avoid repetition.",
+    }
+    feedback = (f"Scored offline from answer length, structure and overlap with the question "
+                f"({words} words). The weakest area is {weak}.")
+    return _item(item.get("questionId") or f"q{index + 1}", breakdown, feedback, tips[weak], "offline")
+
+
+def _summary(per_question, avg, offline_reason=None, chunk_summaries=()):
+    """
+    Summary for the whole interview when no single LLM summary covers it: says which part
+    of the scores came from where and, when known, why the AI reviewer did not score the
+    rest (e.g. "its reply was cut off"), followed by the LLM's summaries of its chunks.
+    """
+    sources = [p.get("source") for p in per_question if isinstance(p, dict)]
+    offline, llm = sources.count("offline"), sum(s is None for s in sources)
+    text = f"Average score {avg}/100 across {len(sources)} answers"
+    if not llm:
+        text += ", scored without the AI reviewer" + (f" ({offline_reason})." if offline_reason else ".")
+    elif offline:
+        why = f"because {offline_reason}" if offline_reason else "because the AI reviewer could not score them"
+        text += f": {llm} scored by the AI reviewer, {offline} scored offline {why}."
+    elif chunk_summaries:
+        text += ", scored by the AI reviewer."
+    else:
+        text += ", scored by the AI reviewer (its summary was not received)."
+    return " ".join([text, *chunk_summaries])
+
+
+def overall(per_question, summary=None, next_steps=None, offline_reason=None, chunk_summaries=()):
+    scores = [int(p.get("total_score", 0) or 0) for p in per_question if isinstance(p, dict)]
+    avg = round(sum(scores) / len(scores)) if scores else 0
+    return {
+        "average_score": avg,
+        "summary": summary or _summary(per_question, avg, offline_reason, chunk_summaries),
+        "next_steps": next_steps or ["Answer every question in full sentences",
+                                     "Support each point with a concrete example",
+                                     "Keep a steady, professional tone"],
+    }
+
+
+def split_responses(job_role, responses):
+    """(prescored {index: item}, [(index, response) still needing the LLM], features per index)."""
+    sims = minilm_similarity([((r.get("questionText") or ""), (r.get("answer") or "")) for r in responses])
+    feats = [answer_features(r, job_role, sims[i] if sims else None) for i, r in enumerate(responses)]
+    done, rest = {}, []
+    for i, (r, f) in enumerate(zip(responses, feats)):
+        reason = degenerate_reason(f)
+        if reason:
+            done[i] = prescore(r, f, reason, i)
+        else:
+            rest.append((i, r))
+    return done, rest, feats
@@ -1,12 +1,29 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import sys, json, requests
+import os, re, sys, json, math, threading, requests
+from concurrent.futures import ThreadPoolExecutor
 
-# DEV key (hardcoded for now) – move to env for prod
-GROQ_API_KEY = "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"
-GROQ_COMPLETIONS_URL = "https://api.groq.com/openai/v1/completions"
-HEADERS = {"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"}
+import prescore
+
+GROQ_API_KEY = os.environ.get("GROQ_API_KEY")  # from env only: SCORING_API_URL may point anywhere
+GROQ_COMPLETIONS_URL = os.environ.get("SCORING_API_URL") or "https://api.groq.com/openai/v1/completions"
+HEADERS = {"Content-Type": "application/json"}
+if GROQ_API_KEY:
+    HEADERS["Authorization"] = f"Bearer {GROQ_API_KEY}"
+MODEL = os.environ.get("SCORING_MODEL") or "openai/gpt-oss-20b"
+MAX_TOKENS = int(os.environ.get("SCORING_MAX_TOKENS") or 1200)  # output budget per request
+REQUEST_TIMEOUT_S = 90
+
+# Long interviews are split into chunks whose prompt fits the input budget and whose
+# reply fits MAX_TOKENS; chunks are scored concurrently, so latency tracks the largest one.
+INPUT_TOKEN_BUDGET   = int(os.environ.get("SCORING_INPUT_TOKENS") or 6000)
+OUTPUT_TOKENS_PER_Q  = 130  # one per_question object, pretty-printed
+OUTPUT_TOKENS_OVERALL = 180
+CHARS_PER_TOKEN = 3.5       # conservative for English prose + JSON
+MAX_CONCURRENCY = int(os.environ.get("SCORING_MAX_CONCURRENCY") or 4)
+# LLM unreachable -> heuristic scores from prescore.py instead of an error
+OFFLINE_FALLBACK = os.environ.get("SCORING_OFFLINE_FALLBACK", "1") != "0"
 
 SCORING_GUIDE = """
 You are an experienced hiring manager. For each answer, score on:
@@ -27,14 +44,15 @@ For each question, return:
 Also return "overall": { average_score, summary (2–3 sentences), next_steps [3 tips] }.
 """
 
+def prompt_item(i, it):
+    q = (it.get("questionText") or "").strip()
+    a = (it.get("answer") or "").strip()
+    t = it.get("secondsSpent") or 0
+    return f"Q{i}: {q}\nA{i}: {a}\nTimeSpentSec: {t}\n"
+
 def build_prompt(job_role, items):
     header = f"ROLE: {job_role}\n{SCORING_GUIDE}\n\n"
-    body = []
-    for i, it in enumerate(items, start=1):
-        q = (it.get("questionText") or "").strip()
-        a = (it.get("answer") or "").strip()
-        t = it.get("secondsSpent") or 0
-        body.append(f"Q{i}: {q}\nA{i}: {a}\nTimeSpentSec: {t}\n")
+    body = [prompt_item(i, it) for i, it in enumerate(items, start=1)]
     tail = """
 Return JSON exactly like:
 {
@@ -52,7 +70,309 @@ Return JSON exactly like:
 """
     return header + "\n".join(body) + tail
 
+def completion_body(prompt, stream=False):
+    body = {"model": MODEL, "prompt": prompt, "max_tokens": MAX_TOKENS, "temperature": 0.2}
+    if stream:
+        body["stream"] = True
+    return body
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def chunk_responses(job_role, rest):
+    """
+    Split (index, response) pairs into consecutive chunks whose prompt fits INPUT_TOKEN_BUDGET
+    and whose expected reply fits MAX_TOKENS, then even out the chunk sizes.
+    """
+    per_chunk = max(1, (MAX_TOKENS - OUTPUT_TOKENS_OVERALL) // OUTPUT_TOKENS_PER_Q)
+    room = INPUT_TOKEN_BUDGET - estimate_tokens(build_prompt(job_role, []))
+    sizes = [estimate_tokens(prompt_item(len(rest), r)) for _, r in rest]
+
+    def pack(limit):
+        chunks, cur, used = [], [], 0
+        for pair, size in zip(rest, sizes):
+            if cur and (len(cur) >= limit or used + size > room):
+                chunks.append(cur)
+                cur, used = [], 0
+            cur.append(pair)  # an answer larger than the budget still goes, alone
+            used += size
+        if cur:
+            chunks.append(cur)
+        return chunks
+
+    chunks = pack(per_chunk)
+    return pack(-(-len(rest) // len(chunks))) if len(chunks) > 1 else chunks
+
+def outcome(chunk, per_question=(), overall=None, complete=False, error=None, raw=None):
+    """What one chunk's completion produced: items in chunk order, overall, and how it ended."""
+    return {"chunk": chunk, "per_question": list(per_question), "overall": overall,
+            "complete": complete, "error": error, "raw": raw}
+
+def score_chunk(job_role, chunk):
+    """
+    Blocking completion for one chunk -> [outcome]. A truncated or unparseable reply
+    covering several answers is retried as two halves.
+    """
+    try:
+        r = requests.post(GROQ_COMPLETIONS_URL, headers=HEADERS,
+                          json=completion_body(build_prompt(job_role, [it for _, it in chunk])),
+                          timeout=REQUEST_TIMEOUT_S)
+        r.raise_for_status()
+        choice = (r.json().get("choices") or [{}])[0]
+        text = (choice.get("text") or "").strip()
+    except Exception as e:
+        return [outcome(chunk, error=str(e))]
+
+    try:
+        result = json.loads(text)
+        if not isinstance(result, dict):
+            raise ValueError("not an object")
+    except ValueError:
+        result = None
+    if (result is None or choice.get("finish_reason") == "length") and len(chunk) > 1:
+        mid = len(chunk) // 2
+        return score_chunk(job_role, chunk[:mid]) + score_chunk(job_role, chunk[mid:])
+    if result is None:
+        return [outcome(chunk, raw=text)]
+    items = result.get("per_question") if isinstance(result.get("per_question"), list) else []
+    overall = result.get("overall") if isinstance(result.get("overall"), dict) else None
+    return [outcome(chunk, items, overall, complete=overall is not None and len(items) >= len(chunk))]
+
+def usable(outcomes):
+    return any(o["per_question"] or o["overall"] for o in outcomes)
+
+def chunk_summaries(outcomes):
+    """The LLM's summary of each chunk, labelled with the questions it covers, repeats dropped."""
+    out, seen = [], set()
+    for o in outcomes:
+        text = (o["overall"] or {}).get("summary")
+        if not isinstance(text, str) or not text.strip() or text.strip() in seen:
+            continue
+        seen.add(text.strip())
+        covered = o["chunk"][:len(o["per_question"])] or o["chunk"]  # what the reply got to
+        first, last = covered[0][0] + 1, covered[-1][0] + 1
+        label = f"Question {first}" if first == last else f"Questions {first}-{last}"
+        out.append(f"{label}: {text.strip()}")
+    return out
+
+def offline_reason(errors):
+    """Why answers were left to offline scoring, from combine's error list, for the summary."""
+    causes = []
+    for e in errors:
+        cause = {"incomplete_response": "the AI reviewer's reply was cut off",
+                 "unparseable_response": "the AI reviewer's reply could not be read"}.get(
+                     e, "the request to the AI reviewer failed")
+        if cause not in causes:
+            causes.append(cause)
+    return " or ".join(causes) or None
+
+def combine(responses, done, feats, outcomes):
+    """
+    One result from the prescored answers and every chunk's outcome, in the original order:
+    questionIds come from the request and average_score is recomputed over all answers. With
+    OFFLINE_FALLBACK every answer the LLM did not score (its chunk failed, or the reply was cut
+    before reaching it) is scored offline; without it those answers are missing and the result
+    is marked partial. Returns (result, {index: offline item}).
+    """
+    by_index, overalls, offline, errors = dict(done), [], {}, []
+    for o in outcomes:
+        if o["error"] or o["raw"] is not None:
+            errors.append(o["error"] or "unparseable_response")
+        for (i, r), item in zip(o["chunk"], o["per_question"]):
+            if isinstance(item, dict):
+                item["questionId"] = r.get("questionId") or item.get("questionId") or f"q{i+1}"
+                by_index[i] = item
+        if o["overall"] is not None:
+            overalls.append(o["overall"])
+        if not o["complete"] and not o["error"] and o["raw"] is None:
+            errors.append("incomplete_response")
+        if OFFLINE_FALLBACK:
+            for i, r in o["chunk"]:
+                if i not in by_index:
+                    by_index[i] = offline[i] = prescore.offline_score(r, feats[i], i)
+
+    per_question = [by_index[i] for i in sorted(by_index)]
+    next_steps = []
+    for ov in overalls:
+        next_steps += [t for t in ov.get("next_steps") or [] if t not in next_steps]
+    if len(outcomes) == 1 and not offline:
+        # one reply covered every answer the LLM saw
+        overall = prescore.overall(per_question, overalls[0].get("summary") if overalls else None, next_steps[:3])
+    else:
+        # a chunk's summary only describes its own answers: lead with where every score came from
+        overall = prescore.overall(per_question, None, next_steps[:3], offline_reason(errors),
+                                   chunk_summaries(outcomes))
+    result = {"per_question": per_question, "overall": overall}
+    if done:
+        result["prescored"] = len(done)
+    if len(outcomes) > 1:
+        result["chunks"] = len(outcomes)
+    if offline:
+        result["offline_questions"] = sorted(offline)
+        if not usable(outcomes):
+            result["offline"] = True
+    if errors:
+        result["llm_error"] = "; ".join(dict.fromkeys(errors))
+    if len(per_question) < len(responses):
+        result["partial"] = True
+        result["answered"] = len(per_question)
+        result["expected"] = len(responses)
+        result["error"] = result.get("llm_error", "")
+    return result, offline
+
+# --- Streaming (--stream / "stream": true)
+class JsonObjectScanner:
+    """
+    Incremental scanner for the objects inside one JSON array, e.g. "per_question": [...].
+    feed() text as it arrives; it returns every element object completed so far. Strings
+    (and braces inside them) are tracked, so partial tokens never confuse the depth count.
+    """
+    def __init__(self, key):
+        self.start_re = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self.text = ""
+        self.pos = 0          # next char to scan
+        self.state = "seek"   # seek -> array -> done
+        self.depth = 0
+        self.in_str = self.esc = False
+        self.obj_start = None
+        self.bad = []         # element texts that were not valid JSON
+
+    def feed(self, chunk):
+        self.text += chunk
+        out = []
+        if self.state == "seek":
+            m = self.start_re.search(self.text, self.pos)
+            if not m:
+                self.pos = max(0, len(self.text) - 64)  # the key may be split across chunks
+                return out
+            self.state, self.pos = "array", m.end()
+        text, i = self.text, self.pos
+        while self.state == "array" and i < len(text):
+            c = text[i]
+            if self.in_str:
+                if self.esc:
+                    self.esc = False
+                elif c == "\\":
+                    self.esc = True
+                elif c == '"':
+                    self.in_str = False
+            elif c == '"':
+                self.in_str = True
+            elif c in "{[":
+                if self.depth == 0:
+                    self.obj_start = i
+                self.depth += 1
+            elif c in "}]":
+                if self.depth == 0:
+                    self.state = "done"  # the array itself closed
+                else:
+                    self.depth -= 1
+                    if self.depth == 0:
+                        raw = text[self.obj_start:i + 1]
+                        try:
+                            out.append(json.loads(raw))
+                        except ValueError:
+                            self.bad.append(raw)
+            i += 1
+        self.pos = i
+        return out
+
+def extract_object(text, key):
+    """The value of `"key": {...}` in possibly truncated JSON text, or None."""
+    m = re.search(r'"%s"\s*:\s*\{' % re.escape(key), text)
+    if not m:
+        return None
+    depth, in_str, esc = 0, False, False
+    for i in range(m.end() - 1, len(text)):
+        c = text[i]
+        if in_str:
+            if esc:
+                esc = False
+            elif c == "\\":
+                esc = True
+            elif c == '"':
+                in_str = False
+        elif c == '"':
+            in_str = True
+        elif c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                try:
+                    return json.loads(text[m.end() - 1:i + 1])
+                except ValueError:
+                    return None
+    return None
+
+def sse_text_chunks(resp):
+    """Text deltas from an OpenAI-style completions SSE stream."""
+    for line in resp.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        choice = (json.loads(data).get("choices") or [{}])[0]
+        text = choice.get("text")
+        if text is None:  # chat-style delta
+            text = (choice.get("delta") or {}).get("content") or ""
+        if text:
+            yield text
+
+_EMIT_LOCK = threading.Lock()
+
+def emit(obj):
+    line = json.dumps(obj, ensure_ascii=False) + "\n"
+    with _EMIT_LOCK:  # chunks stream concurrently
+        sys.stdout.write(line)
+        sys.stdout.flush()
+
+def stream_chunk(job_role, chunk, on_item):
+    """
+    Streaming completion for one chunk -> [outcome]. on_item(index, item) is called as each
+    per_question object completes; a cut stream keeps what was parsed.
+    """
+    scanner = JsonObjectScanner("per_question")
+    items, error = [], None
+
+    def take(new):
+        for item in new:
+            if len(items) >= len(chunk):
+                continue  # more objects than answers asked about
+            i, r = chunk[len(items)]
+            if isinstance(item, dict):
+                item["questionId"] = r.get("questionId") or item.get("questionId") or f"q{i+1}"
+            items.append(item)
+            on_item(i, item)
+
+    try:
+        prompt = build_prompt(job_role, [it for _, it in chunk])
+        with requests.post(GROQ_COMPLETIONS_URL, headers=HEADERS, json=completion_body(prompt, stream=True),
+                           timeout=REQUEST_TIMEOUT_S, stream=True) as r:
+            r.raise_for_status()
+            for text in sse_text_chunks(r):
+                take(scanner.feed(text))
+    except Exception as e:
+        error = str(e)
+
+    text = scanner.text.strip()
+    overall = extract_object(text, "overall")
+    if not items and overall is None:
+        return [outcome(chunk, error=error, raw=None if error else text)]
+    complete = scanner.state == "done" and overall is not None and error is None and len(items) >= len(chunk)
+    return [outcome(chunk, items, overall, complete, error)]
+
+def score_chunks(job_role, rest, scorer):
+    """Score `rest` chunk by chunk, concurrently; outcomes come back in chunk order."""
+    chunks = chunk_responses(job_role, rest) if rest else []
+    if len(chunks) <= 1:
+        return [o for chunk in chunks for o in scorer(chunk)]
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_CONCURRENCY, len(chunks)))) as ex:
+        return [o for outs in ex.map(scorer, chunks) for o in outs]
+
 def main():
+    stream_flag = "--stream" in sys.argv[1:]
     try:
         payload = json.loads(sys.stdin.read() or "{}")
     except Exception as e:
@@ -63,39 +383,40 @@ def main():
     if not responses:
         print(json.dumps({"error":"no_responses"})); sys.exit(0)
 
-    prompt = build_prompt(job, responses)
+    # degenerate answers (empty, a word or two, no time spent, profanity) are scored
+    # locally; only the rest go to the LLM
+    done, rest, feats = prescore.split_responses(job, responses)
 
-    try:
-        r = requests.post(
-            GROQ_COMPLETIONS_URL,
-            headers=HEADERS,
-            json={"model":"openai/gpt-oss-20b","prompt":prompt,"max_tokens":1200,"temperature":0.2},
-            timeout=90
-        )
-        r.raise_for_status()
-        data = r.json()
-        text = (data.get("choices") or [{}])[0].get("text","").strip()
-    except Exception as e:
-        print(json.dumps({"error":"groq_request_failed","detail":str(e)})); sys.exit(2)
+    # --stream / "stream": true prints {"event": "question", "index", "item"} lines as answers
+    # are scored ("index" is the position in `responses`), then {"event": "result", ...}
+    stream = stream_flag or payload.get("stream")
+    if stream:
+        for i in sorted(done):
+            emit({"event": "question", "index": i, "item": done[i]})
+        scorer = lambda chunk: stream_chunk(job, chunk, lambda i, item: emit({"event": "question", "index": i, "item": item}))
+    else:
+        scorer = lambda chunk: score_chunk(job, chunk)
+    outcomes = score_chunks(job, rest, scorer)
 
-    try:
-        result = json.loads(text)
-    except Exception:
-        result = {"raw": text}
-
-    # backfill ids + average
-    qids = [it.get("questionId") for it in responses]
-    if isinstance(result.get("per_question"), list):
-        for i, item in enumerate(result["per_question"]):
-            if "questionId" not in item:
-                item["questionId"] = qids[i] if i < len(qids) else f"q{i+1}"
-
-    if "overall" in result and "average_score" not in result["overall"]:
-        scores = [int(p.get("total_score",0) or 0) for p in result.get("per_question",[]) if isinstance(p,dict)]
-        if scores:
-            result["overall"]["average_score"] = round(sum(scores)/len(scores))
-
-    print(json.dumps(result, ensure_ascii=False))
+    if rest and not OFFLINE_FALLBACK and not usable(outcomes):
+        errors = [o["error"] for o in outcomes if o["error"]]
+        if errors:
+            if stream:
+                emit({"event": "error", "error": "groq_request_failed", "detail": "; ".join(errors)})
+            else:
+                print(json.dumps({"error":"groq_request_failed","detail":"; ".join(errors)}))
+            sys.exit(2)
+        result = {"raw": "\n".join(o["raw"] for o in outcomes if o["raw"] is not None)}
+    else:
+        result, offline = combine(responses, done, feats, outcomes)
+        if stream:
+            for i, item in sorted(offline.items()):
+                emit({"event": "question", "index": i, "item": item})
+
+    if stream:
+        emit({"event": "result", **result})
+    else:
+        print(json.dumps(result, ensure_ascii=False))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,70 @@
+import math
+from array import array
+
+import audio_utils
+from audio_utils import split_on_silence
+from transcribe_whisper import stitch_texts
+
+RATE = 16000
+
+
+def pcm(*parts):
+    """
+    parts: (seconds, speech) -> 16-bit mono PCM. Speech is 200 ms bursts of a 220 Hz tone
+    with 60 ms gaps between them (like syllables, too short to cut in); the rest is silence.
+    """
+    s = array("h")
+    for seconds, speech in parts:
+        for i in range(int(seconds * RATE)):
+            voiced = speech and i % int(0.26 * RATE) < int(0.2 * RATE)
+            s.append(int(8000 * math.sin(2 * math.pi * 220 * i / RATE)) if voiced else 0)
+    return audio_utils._pcm(s)
+
+
+def test_short_audio_is_one_segment():
+    audio = pcm((10, True))
+    assert split_on_silence(audio, RATE) == [{"start": 0, "end": 10 * RATE, "cut": "end"}]
+
+
+def test_cuts_in_the_pause_closest_to_the_target():
+    # pauses centred at 12.5 s and 21.5 s; the target is 20 s
+    audio = pcm((12, True), (1, False), (8, True), (1, False), (18, True))
+    segs = split_on_silence(audio, RATE, overlap_s=0)
+    assert [s["cut"] for s in segs] == ["silence", "end"]
+    assert abs(segs[0]["end"] / RATE - 21.5) < 0.05
+    assert segs[1]["start"] == segs[0]["end"] and segs[1]["end"] == len(audio) // 2
+
+
+def test_short_pauses_are_not_cut_points():
+    audio = pcm((20, True), (0.1, False), (25, True))
+    segs = split_on_silence(audio, RATE, overlap_s=0, min_silence_ms=250)
+    assert segs[0] == {"start": 0, "end": 30 * RATE, "cut": "hard"}
+
+
+def test_hard_cuts_overlap_and_cover_everything():
+    audio = pcm((75, True))
+    segs = split_on_silence(audio, RATE, overlap_s=0.5)
+    overlap = int(0.5 * RATE)
+    assert [s["cut"] for s in segs] == ["hard", "hard", "end"]
+    assert segs[0]["start"] == 0 and segs[-1]["end"] == 75 * RATE
+    for a, b in zip(segs, segs[1:]):
+        assert a["end"] - b["start"] == 2 * overlap  # each side extends past the cut
+    assert all(s["end"] - s["start"] <= 30 * RATE + overlap for s in segs)
+
+
+def test_stitch_drops_the_repeated_overlap():
+    assert stitch_texts(["I worked on the payment", "the payment service for two years"]) == \
+        "I worked on the payment service for two years"
+    # case and punctuation differ across segments
+    assert stitch_texts(["We shipped it. Then", "then, we measured"]) == "We shipped it. Then we measured"
+
+
+def test_stitch_without_repeat_or_with_empty_segments():
+    assert stitch_texts(["first part", "second part"]) == "first part second part"
+    assert stitch_texts(["", "only", ""]) == "only"
+    assert stitch_texts([]) == ""
+
+
+def test_stitch_looks_back_at_most_max_words():
+    repeat = "a b c d e f g h i j"
+    assert stitch_texts([repeat, repeat + " k"], max_words=8) == repeat + " " + repeat + " k"
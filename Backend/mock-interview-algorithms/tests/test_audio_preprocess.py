@@ -0,0 +1,81 @@
+import io
+import math
+import wave
+from array import array
+
+import pytest
+
+import audio_utils
+
+RATE = 16000
+
+
+def samples(pcm):
+    return list(audio_utils._samples(pcm))
+
+
+def tone(seconds, rate=RATE, amp=8000):
+    return audio_utils._pcm(array("h", (int(amp * math.sin(2 * math.pi * 220 * i / rate))
+                                        for i in range(int(seconds * rate)))))
+
+
+def silence(seconds, rate=RATE):
+    return bytes(2 * int(seconds * rate))
+
+
+def test_pcm_round_trip_is_little_endian():
+    pcm = audio_utils._pcm(array("h", [1, -2, 32767, -32768]))
+    assert pcm == b"\x01\x00\xfe\xff\xff\x7f\x00\x80"
+    assert samples(pcm) == [1, -2, 32767, -32768]
+    assert samples(pcm + b"\x05") == [1, -2, 32767, -32768]  # a trailing odd byte is dropped
+
+
+def test_downmix_averages_channels():
+    stereo = audio_utils._pcm(array("h", [100, 300, -100, -300, 7, 7]))
+    assert samples(audio_utils.downmix(stereo, 2)) == [200, -200, 7]
+    assert audio_utils.downmix(stereo, 1) is stereo
+
+
+def test_resample_integer_factor_averages_groups():
+    pcm = audio_utils._pcm(array("h", [0, 30, 60, 90, 120, 150, 999]))
+    assert samples(audio_utils.resample(pcm, 48000, 16000)) == [30, 120]
+
+
+def test_resample_other_rates_keep_the_duration():
+    out = audio_utils.resample(tone(1.0, rate=44100), 44100, 16000)
+    assert len(out) // 2 == 16000
+    assert audio_utils.resample(b"", 44100, 16000) == b""
+
+
+def test_trim_silence_drops_edges_and_shortens_pauses():
+    speech = tone(1.0)
+    pcm = silence(2.0) + speech + silence(4.0) + speech + silence(2.0)
+    out = audio_utils.trim_silence(pcm, RATE, pad_s=0.2, max_pause_s=1.0)
+    # 2 x 1 s speech with 0.2 s pad on each side, joined by 1 s of silence (frame rounding aside)
+    assert 3.7 <= audio_utils.duration_s(out, RATE) <= 3.9
+    assert audio_utils.trim_silence(silence(3.0), RATE) == silence(3.0)
+
+
+def test_wav_bytes_is_a_readable_wav():
+    pcm = tone(0.5)
+    with wave.open(io.BytesIO(audio_utils.wav_bytes(pcm, RATE)), "rb") as w:
+        assert (w.getnchannels(), w.getsampwidth(), w.getframerate()) == (1, 2, RATE)
+        assert w.readframes(w.getnframes()) == pcm
+
+
+def test_decode_pcm_reads_wav_without_ffmpeg(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio_utils, "have_ffmpeg", lambda: False)
+    path = tmp_path / "answer.wav"
+    stereo = audio_utils._pcm(array("h", [1000, 3000] * 48000))
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(48000)
+        w.writeframes(stereo)
+    pcm, rate = audio_utils.decode_pcm(str(path))
+    assert rate == RATE and samples(pcm) == [2000] * 16000
+
+    bad = tmp_path / "answer.webm"
+    bad.write_bytes(b"\x1aE\xdf\xa3 not a wav")
+    with pytest.raises(RuntimeError, match="not a readable WAV"):
+        audio_utils.decode_pcm(str(bad))
@@ -0,0 +1,90 @@
+import pytest
+
+import prescore
+
+
+def feats(answer, seconds=30, question="Describe a time you improved performance", role="Backend Engineer"):
+    return prescore.answer_features({"answer": answer, "secondsSpent": seconds, "questionText": question},
+                                    role)
+
+
+def test_answer_features():
+    f = feats("I improved API performance by 40% because the cache was cold. For example, "
+              "we precomputed the responses. Backend work is fun!")
+    assert f["words"] == 21 and f["sentences"] == 3 and f["seconds"] == 30
+    assert f["question_overlap"] == 0.5  # improved, performance of describe/time/improved/performance
+    assert f["role_overlap"] == 0.5
+    assert f["specific_markers"] == 3 and f["profanity"] == 0
+    assert "similarity" not in f
+    assert prescore.answer_features({"answer": "yes"}, "", similarity=0.81234)["similarity"] == 0.812
+
+
+@pytest.mark.parametrize("answer, seconds, reason", [
+    ("", 30, "empty"),
+    ("   ", None, "empty"),
+    ("idk", 30, "too_short"),
+    ("no idea", 30, "too_short"),
+    ("I would use a queue", 0, "no_time"),
+    ("this is shit", 30, "profanity"),
+    ("fuck fuck fuck this question honestly fuck it", 30, "profanity"),
+    ("I would use a queue", 30, None),
+    ("I would use a queue and retry failed jobs with backoff", 0, None),
+    ("The old system was crap, so we rewrote the ingestion path in Go and cut latency by half "
+     "while keeping the same storage layer and deployment process for the team", 60, None),
+])
+def test_degenerate_reason(answer, seconds, reason):
+    assert prescore.degenerate_reason(feats(answer, seconds)) == reason
+
+
+def test_total_score_weights():
+    assert prescore.total_score(dict.fromkeys(prescore.BREAKDOWN_KEYS, 5)) == 100
+    assert prescore.total_score(dict.fromkeys(prescore.BREAKDOWN_KEYS, 0)) == 0
+    zero = dict.fromkeys(prescore.BREAKDOWN_KEYS, 0)
+    # relevance and specificity count double
+    assert prescore.total_score({**zero, "relevance": 5}) == 29
+    assert prescore.total_score({**zero, "specificity": 5}) == 29
+    assert prescore.total_score({**zero, "clarity": 5}) == 14
+
+
+def test_prescore_and_offline_items_have_the_llm_shape():
+    item = {"questionId": "abc", "answer": "idk"}
+    pre = prescore.prescore(item, feats("idk"), "too_short", 0)
+    off = prescore.offline_score({"answer": "x"}, feats("I tuned the slow queries with indexes"), 4)
+    for it in (pre, off):
+        assert set(it) >= {"questionId", "score_breakdown", "total_score", "brief_feedback", "improvement_tip"}
+        assert set(it["score_breakdown"]) == set(prescore.BREAKDOWN_KEYS)
+        assert all(0 <= v <= 5 for v in it["score_breakdown"].values())
+    assert pre["questionId"] == "abc" and pre["source"] == "prescore" and pre["total_score"] <= 10
+    assert off["questionId"] == "q5" and off["source"] == "offline"
+
+
+def test_offline_scores_reward_longer_specific_answers():
+    weak = prescore.offline_score({}, feats("I made it faster somehow"), 0)
+    strong = prescore.offline_score({}, feats(
+        "I improved the checkout performance by 35% last year. For example, we profiled the hot path, "
+        "because the time went into serialization, and replaced it. " * 3), 0)
+    assert strong["total_score"] > weak["total_score"]
+
+
+def test_split_responses():
+    responses = [{"questionId": "a", "answer": "", "questionText": "Q1"},
+                 {"questionId": "b", "answer": "I would profile first and then fix the slowest query",
+                  "questionText": "Q2", "secondsSpent": 40}]
+    done, rest, fs = prescore.split_responses("Engineer", responses)
+    assert list(done) == [0] and done[0]["source"] == "prescore"
+    assert rest == [(1, responses[1])] and len(fs) == 2
+
+
+def test_overall_summary_says_where_scores_came_from():
+    llm = {"total_score": 80}
+    off = {"total_score": 40, "source": "offline"}
+    assert prescore.overall([llm, off], "From the LLM")["summary"] == "From the LLM"
+    assert prescore.overall([llm, off])["average_score"] == 60
+    assert "1 scored by the AI reviewer, 1 scored offline" in prescore.overall([llm, off])["summary"]
+    assert "without the AI reviewer" in prescore.overall([off])["summary"]
+    assert prescore.overall([llm, off], offline_reason="its reply was cut off")["summary"].endswith(
+        "1 scored by the AI reviewer, 1 scored offline because its reply was cut off.")
+    assert prescore.overall([off], offline_reason="the request failed")["summary"].endswith(
+        "scored without the AI reviewer (the request failed).")
+    assert "its summary was not received" in prescore.overall([llm])["summary"]
+    assert prescore.overall([])["average_score"] == 0
@@ -0,0 +1,237 @@
+import importlib
+import json
+
+import pytest
+
+import score_answers
+from score_answers import JsonObjectScanner, extract_object, sse_text_chunks
+
+REPLY = json.dumps({
+    "per_question": [
+        {"questionId": "q1", "score": 7, "feedback": "Covers {the} basics"},
+        {"questionId": "q2", "score": 4, "feedback": "He said \"use [brackets]\" \\ ok"},
+    ],
+    "overall": {"average_score": 5.5, "summary": "Fine"},
+})
+
+
+def feed_in_pieces(scanner, text, size):
+    out = []
+    for i in range(0, len(text), size):
+        out += scanner.feed(text[i:i + size])
+    return out
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, len(REPLY)])
+def test_scanner_finds_every_element_across_splits(size):
+    scanner = JsonObjectScanner("per_question")
+    items = feed_in_pieces(scanner, REPLY, size)
+    assert items == json.loads(REPLY)["per_question"]
+    assert scanner.state == "done" and scanner.bad == []
+
+
+def test_scanner_returns_elements_as_they_complete():
+    scanner = JsonObjectScanner("per_question")
+    cut = REPLY.index("}, {") + 1
+    assert scanner.feed(REPLY[:cut - 1]) == []
+    assert scanner.feed(REPLY[cut - 1:cut]) == [json.loads(REPLY)["per_question"][0]]
+    assert scanner.state == "array"
+
+
+def test_scanner_key_split_across_chunks():
+    scanner = JsonObjectScanner("per_question")
+    assert scanner.feed('{"per_que') == []
+    assert scanner.feed('stion": [{"a": 1}') == [{"a": 1}]
+
+
+def test_scanner_ignores_other_arrays_and_nested_values():
+    scanner = JsonObjectScanner("per_question")
+    text = '{"other": [{"x": 1}], "per_question": [{"tags": [1, {"y": 2}]}, {"z": 3}], "after": [{"w": 4}]}'
+    assert scanner.feed(text) == [{"tags": [1, {"y": 2}]}, {"z": 3}]
+    assert scanner.state == "done"
+
+
+def test_scanner_keeps_invalid_elements():
+    scanner = JsonObjectScanner("per_question")
+    assert scanner.feed('"per_question": [{"a": 1,}, {"b": 2}]') == [{"b": 2}]
+    assert scanner.bad == ['{"a": 1,}']
+
+
+def test_extract_object():
+    assert extract_object(REPLY, "overall") == {"average_score": 5.5, "summary": "Fine"}
+    assert extract_object('{"overall": {"summary": "a } b", "n": {"x": 1}}}', "overall") == \
+        {"summary": "a } b", "n": {"x": 1}}
+    assert extract_object('{"overall": {"summary": "cut off', "overall") is None
+    assert extract_object('{"per_question": []}', "overall") is None
+
+
+class FakeStream:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+
+def test_sse_text_chunks():
+    resp = FakeStream([
+        ": keep-alive",
+        "",
+        'data: {"choices": [{"text": "{\\"per_"}]}',
+        'data: {"choices": [{"text": ""}]}',
+        'data: {"choices": [{"delta": {"content": "question\\""}}]}',
+        'data: {"choices": []}',
+        "data: [DONE]",
+        'data: {"choices": [{"text": "after done"}]}',
+    ])
+    assert list(sse_text_chunks(resp)) == ['{"per_', 'question"']
+
+
+@pytest.fixture
+def reload_with_env(monkeypatch):
+    def load(key):
+        if key is None:
+            monkeypatch.delenv("GROQ_API_KEY", raising=False)
+        else:
+            monkeypatch.setenv("GROQ_API_KEY", key)
+        return importlib.reload(score_answers)
+    yield load
+    monkeypatch.undo()
+    importlib.reload(score_answers)
+
+
+def test_api_key_comes_from_the_environment(reload_with_env):
+    assert "Authorization" not in reload_with_env(None).HEADERS
+    assert reload_with_env("gsk_test").HEADERS["Authorization"] == "Bearer gsk_test"
+
+
+def response(i, words=40):
+    return {"questionId": f"id{i}", "questionText": "Tell me about a project you led",
+            "answer": " ".join(["I led the migration project for our team"] * (words // 8)),
+            "secondsSpent": 60}
+
+
+def test_chunk_sizes_are_even_and_keep_order():
+    rest = [(i, response(i)) for i in range(15)]
+    chunks = score_answers.chunk_responses("Engineer", rest)
+    per_chunk = (score_answers.MAX_TOKENS - score_answers.OUTPUT_TOKENS_OVERALL) // score_answers.OUTPUT_TOKENS_PER_Q
+    assert all(len(c) <= per_chunk for c in chunks)
+    assert max(map(len, chunks)) - min(map(len, chunks)) <= 1  # 5/5/5, not 7/7/1
+    assert [pair for c in chunks for pair in c] == rest
+
+
+def test_one_chunk_when_it_fits():
+    rest = [(i, response(i)) for i in range(3)]
+    assert score_answers.chunk_responses("Engineer", rest) == [rest]
+    assert score_answers.chunk_responses("Engineer", []) == []
+
+
+def test_input_budget_splits_and_oversize_answer_goes_alone(monkeypatch):
+    header = score_answers.estimate_tokens(score_answers.build_prompt("Engineer", []))
+    monkeypatch.setattr(score_answers, "INPUT_TOKEN_BUDGET", header + 200)
+    rest = [(0, response(0)), (1, response(1, words=2000)), (2, response(2)), (3, response(3))]
+    chunks = score_answers.chunk_responses("Engineer", rest)
+    assert [[i for i, _ in c] for c in chunks] == [[0], [1], [2, 3]]
+
+
+def scored():
+    return {"questionId": "from-llm", "score_breakdown": {}, "total_score": 80,
+            "brief_feedback": "ok", "improvement_tip": "more"}
+
+
+def features(r):
+    return score_answers.prescore.answer_features(r, "Engineer")
+
+
+def run_combine(outcomes, n, done=None):
+    responses = [response(i) for i in range(n)]
+    return score_answers.combine(responses, done or {}, [features(r) for r in responses], outcomes)
+
+
+def test_combine_complete_reply():
+    chunk = [(0, response(0)), (1, response(1))]
+    o = score_answers.outcome(chunk, [scored(), scored()], {"summary": "Good", "next_steps": ["a"]},
+                              complete=True)
+    result, offline = run_combine([o], 2)
+    assert offline == {}
+    assert [p["questionId"] for p in result["per_question"]] == ["id0", "id1"]  # ids from the request
+    assert result["overall"]["summary"] == "Good" and result["overall"]["average_score"] == 80
+    assert "llm_error" not in result and "partial" not in result
+
+
+def test_combine_fills_a_cut_off_reply_offline():
+    first = [(0, response(0)), (1, response(1))]
+    second = [(2, response(2)), (3, response(3))]
+    outcomes = [score_answers.outcome(first, [scored(), scored()], {"summary": "Good"}, complete=True),
+                score_answers.outcome(second, [scored()])]  # cut before answer 3 and the overall
+    result, offline = run_combine(outcomes, 4)
+    assert sorted(offline) == [3] and result["offline_questions"] == [3]
+    assert [p.get("source") for p in result["per_question"]] == [None, None, None, "offline"]
+    assert result["llm_error"] == "incomplete_response"
+    assert result["chunks"] == 2 and "partial" not in result and "offline" not in result
+
+
+def test_combine_without_fallback_marks_partial(monkeypatch):
+    monkeypatch.setattr(score_answers, "OFFLINE_FALLBACK", False)
+    chunk = [(0, response(0)), (1, response(1))]
+    result, offline = run_combine([score_answers.outcome(chunk, [scored()])], 2)
+    assert offline == {}
+    assert result["partial"] is True and (result["answered"], result["expected"]) == (1, 2)
+    assert result["error"] == "incomplete_response"
+    assert "scored by the AI reviewer" in result["overall"]["summary"]
+
+
+def test_combine_all_failed_is_offline():
+    chunk = [(0, response(0)), (1, response(1))]
+    result, offline = run_combine([score_answers.outcome(chunk, error="timeout")], 2)
+    assert result["offline"] is True and sorted(offline) == [0, 1]
+    assert result["llm_error"] == "timeout"
+    assert result["overall"]["summary"].endswith(
+        "scored without the AI reviewer (the request to the AI reviewer failed).")
+
+
+def test_combine_keeps_prescored_answers():
+    done = {0: score_answers.prescore.prescore(response(0), features(response(0)), "empty", 0)}
+    chunk = [(1, response(1))]
+    o = score_answers.outcome(chunk, ["not an object"], {"summary": "Ok"})
+    result, offline = run_combine([o], 2, done)
+    assert result["prescored"] == 1 and sorted(offline) == [1]
+    assert [p["source"] for p in result["per_question"]] == ["prescore", "offline"]
+
+
+def test_offline_summary_names_the_cause():
+    first, second = [(0, response(0))], [(1, response(1))]
+    whole = score_answers.outcome(first, [scored()], complete=True)
+    cut = [whole, score_answers.outcome(second, [])]
+    result, _ = run_combine(cut, 2)
+    assert result["overall"]["summary"].endswith(
+        "1 scored by the AI reviewer, 1 scored offline because the AI reviewer's reply was cut off.")
+
+    failed = [whole, score_answers.outcome(second, error="503 Server Error")]
+    result, _ = run_combine(failed, 2)
+    assert "scored offline because the request to the AI reviewer failed." in result["overall"]["summary"]
+    assert "cut off" not in result["overall"]["summary"]
+
+
+def test_offline_reason():
+    assert score_answers.offline_reason([]) is None
+    assert score_answers.offline_reason(["timeout", "503", "unparseable_response", "timeout"]) == \
+        "the request to the AI reviewer failed or the AI reviewer's reply could not be read"
+
+
+def test_multi_chunk_summary_covers_every_chunk():
+    first, second, third = [(0, response(0)), (1, response(1))], [(2, response(2))], [(3, response(3))]
+    outcomes = [score_answers.outcome(first, [scored(), scored()], {"summary": "Strong on design."}, complete=True),
+                score_answers.outcome(second, [scored()], {"summary": " Weak on testing. "}, complete=True),
+                score_answers.outcome(third, [scored()], {"summary": "Strong on design."}, complete=True)]
+    result, _ = run_combine(outcomes, 4)
+    assert result["overall"]["summary"] == ("Average score 80/100 across 4 answers, scored by the AI reviewer. "
+                                            "Questions 1-2: Strong on design. Question 3: Weak on testing.")
+
+
+def test_one_chunk_with_offline_answers_does_not_pass_its_summary_off_as_the_whole():
+    chunk = [(0, response(0)), (1, response(1))]
+    result, _ = run_combine([score_answers.outcome(chunk, [scored()], {"summary": "Good answer."})], 2)
+    assert result["overall"]["summary"] == (
+        "Average score " + str(result["overall"]["average_score"]) + "/100 across 2 answers: 1 scored by the "
+        "AI reviewer, 1 scored offline because the AI reviewer's reply was cut off. Question 1: Good answer.")
@@ -0,0 +1,104 @@
+import pytest
+
+import transcribe_whisper
+
+
+@pytest.fixture
+def upload(monkeypatch):
+    sent = []
+
+    def post_audio(filename, fileobj, content_type, language, timeout):
+        data = fileobj if isinstance(fileobj, bytes) else fileobj.read()
+        sent.append((filename, data, content_type))
+        return {"text": f"text of {filename}"}
+
+    monkeypatch.setattr(transcribe_whisper, "post_audio", post_audio)
+    return sent
+
+
+@pytest.fixture
+def answer(tmp_path):
+    path = tmp_path / "answer.webm"
+    path.write_bytes(b"o" * 1000)
+    info = {"input_bytes": 1000, "input_duration_s": 12.0, "output_duration_s": 10.0, "duration_saved_s": 2.0}
+    return str(path), (b"\0" * 32000, 16000, info)
+
+
+def encoder(monkeypatch, size, codec):
+    monkeypatch.setattr(transcribe_whisper, "encode_for_upload",
+                        lambda pcm, rate, preprocess=True: (b"e" * size, "." + codec, f"audio/{codec}", codec))
+
+
+def test_smaller_re_encode_is_uploaded(upload, answer, monkeypatch):
+    encoder(monkeypatch, 300, "ogg")
+    path, audio = answer
+    result = transcribe_whisper.transcribe_single(path, "en", audio)
+    assert upload == [("answer.ogg", b"e" * 300, "audio/ogg")]
+    rep = result["preprocess"]
+    assert (rep["sent"], rep["codec"], rep["output_bytes"], rep["bytes_saved"]) == ("preprocessed", "ogg", 300, 700)
+
+
+@pytest.mark.parametrize("size", [1000, 4000])
+def test_larger_re_encode_sends_the_original(upload, answer, monkeypatch, size):
+    encoder(monkeypatch, size, "flac")
+    path, audio = answer
+    result = transcribe_whisper.transcribe_single(path, "en", audio)
+    assert upload == [("answer.webm", b"o" * 1000, "application/octet-stream")]
+    rep = result["preprocess"]
+    assert (rep["sent"], rep["codec"], rep["output_bytes"], rep["bytes_saved"]) == ("original", "original", 1000, 0)
+    assert (rep["encoded_codec"], rep["encoded_bytes"]) == ("flac", size)
+    assert result["text"] == "text of answer.webm"
+
+
+@pytest.fixture
+def segments(monkeypatch):
+    # four 25 s segments of a 100 s answer, uploaded raw
+    monkeypatch.setattr(transcribe_whisper, "SEGMENT_RETRY_DELAY_S", 0)
+    monkeypatch.setattr(transcribe_whisper.audio_utils, "split_on_silence",
+                        lambda pcm, rate, **kw: [{"start": i * 400000, "end": (i + 1) * 400000, "cut": "silence"}
+                                                 for i in range(4)])
+    monkeypatch.setattr(transcribe_whisper, "encode_for_upload",
+                        lambda pcm, rate, preprocess=True: (b"x" * 10, ".ogg", "audio/ogg", "opus"))
+    info = {"input_bytes": 1000, "input_duration_s": 100.0, "output_duration_s": 100.0, "duration_saved_s": 0.0}
+    return (b"\0" * 3200000, 16000, info)
+
+
+def flaky(monkeypatch, failures):
+    """post_audio that fails segment i failures[i] times before answering."""
+    calls = []
+
+    def post_audio(filename, fileobj, content_type, language, timeout):
+        i = int(filename.split(".")[1])
+        calls.append(i)
+        if calls.count(i) <= failures.get(i, 0):
+            raise ConnectionError(f"503 for segment {i}")
+        return {"text": f"part{i} end{i}" if i < 3 else f"end{i - 1} part{i}"}
+
+    monkeypatch.setattr(transcribe_whisper, "post_audio", post_audio)
+    return calls
+
+
+def test_a_transient_failure_is_retried(monkeypatch, segments):
+    calls = flaky(monkeypatch, {1: 1})
+    result = transcribe_whisper.transcribe_chunked("a.webm", "en", segments)
+    assert sorted(calls) == [0, 1, 1, 2, 3]
+    assert result["text"] == "part0 end0 part1 end1 part2 end2 part3"
+    assert "partial" not in result and result["segments"][1]["retried"] is True
+    assert result["preprocess"]["output_bytes"] == 40
+
+
+def test_a_segment_that_keeps_failing_gives_a_partial_transcript(monkeypatch, segments):
+    flaky(monkeypatch, {1: 2})
+    result = transcribe_whisper.transcribe_chunked("a.webm", "en", segments)
+    assert result["text"] == "part0 end0 ... part2 end2 part3"
+    assert result["partial"] is True and result["failed_segments"] == [1]
+    assert result["segment_error"] == "ConnectionError: 503 for segment 1"
+    assert "error" not in result
+    assert result["segments"][1]["error"] and "bytes" not in result["segments"][1]
+    assert result["preprocess"]["output_bytes"] == 30
+
+
+def test_all_segments_failing_raises(monkeypatch, segments):
+    flaky(monkeypatch, {i: 2 for i in range(4)})
+    with pytest.raises(ConnectionError, match="segment 0"):
+        transcribe_whisper.transcribe_chunked("a.webm", "en", segments)
@@ -1,17 +1,192 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import sys, os, json
+import sys, os, re, json, time
+from concurrent.futures import ThreadPoolExecutor
 import requests
 
+import audio_utils
+
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")  # ← read from env
-API_URL = "https://api.groq.com/openai/v1/audio/transcriptions"
-MODEL   = "whisper-large-v3"
+API_URL = os.environ.get("WHISPER_API_URL") or "https://api.groq.com/openai/v1/audio/transcriptions"
+MODEL   = os.environ.get("WHISPER_MODEL") or "whisper-large-v3"
+REQUEST_TIMEOUT_S = float(os.environ.get("WHISPER_TIMEOUT_S") or 120)
+
+# Chunked mode: the answer is cut on pauses into overlapping segments that are
+# transcribed concurrently, so latency tracks the longest segment, not the answer.
+# "auto" chunks answers longer than CHUNK_MAX_S (when the audio can be decoded).
+WHISPER_MODE      = os.environ.get("WHISPER_MODE") or "auto"  # single | chunked | auto
+CHUNK_TARGET_S    = float(os.environ.get("WHISPER_CHUNK_TARGET_S") or 20)
+CHUNK_MAX_S       = float(os.environ.get("WHISPER_CHUNK_MAX_S") or 30)
+CHUNK_OVERLAP_S   = float(os.environ.get("WHISPER_CHUNK_OVERLAP_S") or 0.5)
+MAX_CONCURRENCY   = int(os.environ.get("WHISPER_MAX_CONCURRENCY") or 4)
+SEGMENT_TIMEOUT_S = float(os.environ.get("WHISPER_SEGMENT_TIMEOUT_S") or 60)
+SEGMENT_RETRY_DELAY_S = 1.0  # a failed segment is retried once, after this pause
+STITCH_MAX_WORDS  = 8  # longest repeat looked for where two segments overlap
+
+# Preprocessing before upload: decode, downmix to mono, resample to 16 kHz, trim
+# leading/trailing silence, shorten long pauses, re-encode as Opus (see audio_utils).
+PREPROCESS  = os.environ.get("WHISPER_PREPROCESS", "1") != "0"
+TRIM_PAD_S  = 0.2
+MAX_PAUSE_S = float(os.environ.get("WHISPER_MAX_PAUSE_S") or 1.0)
 
 def fail(error, detail=""):
     print(json.dumps({"error": error, "detail": detail}), end="")
     sys.exit(0)
 
+def post_audio(filename, fileobj, content_type, language, timeout):
+    files = { "file": (filename, fileobj, content_type) }
+    data  = { "model": MODEL, "language": language }
+    headers = { "Authorization": f"Bearer {GROQ_API_KEY}" } if GROQ_API_KEY else {}
+    r = requests.post(API_URL, headers=headers, data=data, files=files, timeout=timeout)
+    r.raise_for_status()
+    return r.json()
+
+def load_audio(audio_path, preprocess=True):
+    """
+    Decoded 16 kHz mono PCM as (pcm, rate, info), silence-trimmed when `preprocess`.
+    Raises if the audio cannot be decoded here (e.g. webm without ffmpeg).
+    """
+    t0 = time.perf_counter()
+    pcm, rate = audio_utils.decode_pcm(audio_path)
+    info = {"input_bytes": os.path.getsize(audio_path),
+            "input_duration_s": round(audio_utils.duration_s(pcm, rate), 2)}
+    if preprocess:
+        pcm = audio_utils.trim_silence(pcm, rate, pad_s=TRIM_PAD_S, max_pause_s=MAX_PAUSE_S)
+    info["output_duration_s"] = round(audio_utils.duration_s(pcm, rate), 2)
+    info["duration_saved_s"] = round(info["input_duration_s"] - info["output_duration_s"], 2)
+    info["ms"] = int((time.perf_counter() - t0) * 1000)
+    return pcm, rate, info
+
+def encode_for_upload(pcm, rate, preprocess=True):
+    """(data, ext, content_type, codec)"""
+    if preprocess:
+        return audio_utils.encode_compact(pcm, rate)
+    return audio_utils.wav_bytes(pcm, rate), ".wav", "audio/wav", "pcm_s16le"
+
+def _upload_report(info, uploaded, codec, sent):
+    """sent: "preprocessed" | "original" (the re-encode was not smaller) | "segments"."""
+    return {**info, "output_bytes": uploaded, "bytes_saved": info["input_bytes"] - uploaded,
+            "codec": codec, "sent": sent}
+
+def transcribe_single(audio_path, language, audio=None):
+    """One upload: the preprocessed `audio` from load_audio() if given, else the file as is."""
+    if audio is None:
+        with open(audio_path, "rb") as f:
+            resp = post_audio(os.path.basename(audio_path), f, "application/octet-stream", language, REQUEST_TIMEOUT_S)
+        return {"text": resp.get("text") or "", "language": language, "mode": "single", "raw": resp}
+
+    pcm, rate, info = audio
+    t0 = time.perf_counter()
+    data, ext, content_type, codec = encode_for_upload(pcm, rate)
+    encode_ms = int((time.perf_counter() - t0) * 1000)
+    if len(data) >= info["input_bytes"]:
+        # e.g. FLAC (ffmpeg without libopus) is larger than the browser's Opus: send the original
+        with open(audio_path, "rb") as f:
+            resp = post_audio(os.path.basename(audio_path), f, "application/octet-stream", language, REQUEST_TIMEOUT_S)
+        report = {**_upload_report(info, info["input_bytes"], "original", "original"),
+                  "encoded_bytes": len(data), "encoded_codec": codec}
+    else:
+        base = os.path.splitext(os.path.basename(audio_path))[0]
+        resp = post_audio(base + ext, data, content_type, language, REQUEST_TIMEOUT_S)
+        report = _upload_report(info, len(data), codec, "preprocessed")
+    return {"text": resp.get("text") or "", "language": language, "mode": "single", "raw": resp,
+            "preprocess": {**report, "encode_ms": encode_ms}}
+
+def _words(text):
+    return [re.sub(r"[^\w']", "", w.lower()) for w in text.split()]
+
+def stitch_texts(texts, max_words=STITCH_MAX_WORDS):
+    """Join segment transcripts, dropping words repeated across each overlap."""
+    out = []
+    for text in texts:
+        words = text.split()
+        if out and words:
+            tail, head = _words(" ".join(out[-max_words:])), _words(" ".join(words[:max_words]))
+            for k in range(min(len(tail), len(head)), 0, -1):
+                if tail[-k:] == head[:k]:
+                    words = words[k:]
+                    break
+        out.extend(words)
+    return " ".join(out)
+
+def transcribe_chunked(audio_path, language, audio, preprocess=True):
+    """
+    Transcribe `audio` (from load_audio) as overlapping segments, concurrently. A segment
+    whose upload fails is retried once; if it fails again the other segments are still
+    returned, stitched, with "partial": true, the failed indexes in "failed_segments" and
+    their errors in "segment_error".
+    Raises only when every segment failed.
+    """
+    pcm, rate, info = audio
+    segments = audio_utils.split_on_silence(pcm, rate, target_s=CHUNK_TARGET_S, max_s=CHUNK_MAX_S,
+                                            overlap_s=CHUNK_OVERLAP_S)
+    base = os.path.splitext(os.path.basename(audio_path))[0]
+
+    def upload(i):
+        seg = segments[i]
+        t0 = time.perf_counter()
+        data, ext, content_type, codec = encode_for_upload(pcm[seg["start"] * 2:seg["end"] * 2], rate, preprocess)
+        resp = post_audio(f"{base}.{i:03d}{ext}", data, content_type, language, SEGMENT_TIMEOUT_S)
+        text = (resp.get("text") or "").strip()
+        return text, {"codec": codec, "bytes": len(data), "chars": len(text),
+                      "ms": int((time.perf_counter() - t0) * 1000)}
+
+    def run(i):
+        seg = segments[i]
+        st = {"index": i, "start_s": round(seg["start"] / rate, 2), "end_s": round(seg["end"] / rate, 2),
+              "cut": seg["cut"]}
+        try:
+            text, up = upload(i)
+        except Exception:
+            time.sleep(SEGMENT_RETRY_DELAY_S)
+            st["retried"] = True
+            try:
+                text, up = upload(i)
+            except Exception as e:
+                return None, {**st, "error": f"{type(e).__name__}: {e}"}, e
+        return text, {**st, **up}, None
+
+    t0 = time.perf_counter()
+    workers = max(1, min(MAX_CONCURRENCY, len(segments)))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        results = list(ex.map(run, range(len(segments))))
+    failed = [st["index"] for text, st, _ in results if text is None]
+    if len(failed) == len(results):
+        raise results[0][2]  # nothing to return: fail like a single upload would
+
+    # stitch each run of consecutive segments; a failed segment leaves a visible gap
+    runs, current = [], []
+    for text, _, _ in results:
+        if text is None:
+            if current:
+                runs.append(stitch_texts(current))
+            current = []
+        else:
+            current.append(text)
+    if current:
+        runs.append(stitch_texts(current))
+    stats = [st for _, st, _ in results]
+    sent = [st for st in stats if "error" not in st]
+    result = {
+        "text": " ... ".join(r for r in runs if r),
+        "language": language,
+        "mode": "chunked",
+        "duration_s": round(audio_utils.duration_s(pcm, rate), 2),
+        "workers": workers,
+        "segments": stats,
+        "ms": int((time.perf_counter() - t0) * 1000),
+    }
+    if failed:
+        result["partial"] = True
+        result["failed_segments"] = failed
+        # not "error": the Node controller treats any "error" key as a failed transcription
+        result["segment_error"] = "; ".join(dict.fromkeys(st["error"] for st in stats if "error" in st))
+    if preprocess:
+        # segments cannot be cut from the original file, so they are sent re-encoded whatever the size
+        result["preprocess"] = _upload_report(info, sum(st["bytes"] for st in sent), sent[0]["codec"], "segments")
+    return result
+
 def main():
     try:
         payload = json.loads(sys.stdin.read() or "{}")
@@ -20,30 +195,41 @@ def main():
 
     audio_path = payload.get("audio_path")
     language   = payload.get("language") or "en"
+    mode       = payload.get("mode") or WHISPER_MODE
+    preprocess = bool(payload.get("preprocess", PREPROCESS))
 
     if not audio_path or not os.path.isfile(audio_path):
         return fail("file_not_found", f"audio_path missing or not found: {audio_path}")
 
-    if not GROQ_API_KEY:
+    if not GROQ_API_KEY and "api.groq.com" in API_URL:
         return fail("missing_api_key", "Set GROQ_API_KEY in your environment")
 
+    # decoding is needed to preprocess and to split; when it is not possible here,
+    # the file is uploaded as is (except in forced chunked mode)
+    audio, audio_error = None, None
+    if preprocess or mode != "single":
+        try:
+            audio = load_audio(audio_path, preprocess)
+        except Exception as e:
+            audio_error = str(e)
+    if mode == "chunked" and audio is None:
+        return fail("decode_failed", audio_error)
+
     try:
-        with open(audio_path, "rb") as f:
-            files = { "file": (os.path.basename(audio_path), f, "application/octet-stream") }
-            data  = { "model": MODEL, "language": language }
-            headers = { "Authorization": f"Bearer {GROQ_API_KEY}" }
-
-            r = requests.post(API_URL, headers=headers, data=data, files=files, timeout=120)
-            r.raise_for_status()
-            resp = r.json()
-            text = resp.get("text") or ""
-            if not text:
-                return fail("empty_transcript", f"raw={resp}")
-            print(json.dumps({"text": text, "language": language}), end="")
+        if audio is not None and (mode == "chunked" or (mode == "auto" and audio[2]["output_duration_s"] > CHUNK_MAX_S)):
+            result = transcribe_chunked(audio_path, language, audio, preprocess)
+        else:
+            result = transcribe_single(audio_path, language, audio if preprocess else None)
+        if audio_error:
+            result["preprocess"] = {"error": audio_error}
+        raw = result.pop("raw", None)
+        if not result["text"]:
+            return fail("empty_transcript", f"raw={raw if raw is not None else result}")
+        print(json.dumps(result), end="")
     except requests.HTTPError as e:
         return fail("http_error", f"{e} :: {e.response.text if e.response is not None else ''}")
     except Exception as e:
         return fail("request_failed", str(e))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()